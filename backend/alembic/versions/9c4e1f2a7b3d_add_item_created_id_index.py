@@ -0,0 +1,38 @@
+"""Add item (created, id) index for keyset pagination
+
+Revision ID: 9c4e1f2a7b3d
+Revises: 52306dc8a73f
+Create Date: 2026-10-18 09:12:41.204311
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4e1f2a7b3d"
+down_revision: Union[str, None] = "52306dc8a73f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, but it keeps the item
+    # table writable while the index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_item_created_id",
+            "item",
+            ["created", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_item_created_id", table_name="item", postgresql_concurrently=True
+        )
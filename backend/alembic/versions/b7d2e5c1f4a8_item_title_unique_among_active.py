@@ -0,0 +1,43 @@
+"""Make item titles unique among active items only
+
+Revision ID: b7d2e5c1f4a8
+Revises: 9c4e1f2a7b3d
+Create Date: 2026-10-18 15:02:17.530912
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2e5c1f4a8"
+down_revision: Union[str, None] = "9c4e1f2a7b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Soft deleted items keep their row, and with it their title. Only
+    # active items need unique titles, so a deleted title can be reused.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_item_title_active",
+            "item",
+            ["title"],
+            unique=True,
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint("item_title_key", "item", type_="unique")
+
+
+def downgrade() -> None:
+    # Fails if a deleted title has been reused since the upgrade
+    op.create_unique_constraint("item_title_key", "item", ["title"])
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_item_title_active", table_name="item", postgresql_concurrently=True
+        )
@@ -0,0 +1,38 @@
+"""Add item (title, id) index for keyset pagination by title
+
+Revision ID: e4a9c2d7f1b6
+Revises: b7d2e5c1f4a8
+Create Date: 2026-10-18 19:41:05.118243
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a9c2d7f1b6"
+down_revision: Union[str, None] = "b7d2e5c1f4a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ix_item_title_active only covers active items, so it can't serve
+    # order_by=title pages that include inactive ones
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_item_title_id",
+            "item",
+            ["title", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_item_title_id", table_name="item", postgresql_concurrently=True
+        )
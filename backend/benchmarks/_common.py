@@ -0,0 +1,67 @@
+"""
+Timing and reporting shared by the micro benchmarks that call a function or
+a Lambda handler in process (delete, request_logging, warm_invocation).
+Timings are kept in seconds and only converted when reported.
+"""
+import copy
+import statistics
+import time
+
+# Scale from seconds and the format each unit is printed with
+UNITS = {"ms": (1_000, "7.3f"), "us": (1_000_000, "8.1f")}
+
+
+class FakeContext:
+    function_name = "benchmark"
+    aws_request_id = "benchmark"
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def call(handler, event: dict) -> float:
+    """Times a Lambda handler on a copy of event, which has to succeed"""
+    event = copy.deepcopy(event)
+    context = FakeContext()
+    start = time.perf_counter()
+    response = handler(event, context)
+    elapsed = time.perf_counter() - start
+    assert response["statusCode"] == 200, response
+    return elapsed
+
+
+def time_calls(handlers: list, event: dict, iterations: int) -> list[list[float]]:
+    # Interleaved so drift over the run (GC, the connection pool, the cache)
+    # lands on every handler equally
+    timings = [[] for _ in handlers]
+    for _ in range(iterations):
+        for handler, handler_timings in zip(handlers, timings):
+            handler_timings.append(call(handler, event))
+    return timings
+
+
+def p95(timings: list[float]) -> float:
+    timings = sorted(timings)
+    return timings[int(len(timings) * 0.95) - 1]
+
+
+def report(
+    name: str, timings: list[float], unit: str = "ms", baseline: float | None = None
+) -> None:
+    """
+    Prints the mean, p50 and p95 of timings and, given the baseline's p50,
+    the overhead over it
+    """
+    scale, spec = UNITS[unit]
+    scaled = [t * scale for t in timings]
+    median = statistics.median(scaled)
+    line = (
+        f"{name:<24} mean={statistics.mean(scaled):{spec}}{unit} "
+        f"p50={median:{spec}}{unit} p95={p95(scaled):{spec}}{unit}"
+    )
+    if baseline is not None:
+        line += f" overhead={median - baseline * scale:{spec}}{unit}"
+    print(line)
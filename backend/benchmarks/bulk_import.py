@@ -0,0 +1,60 @@
+"""
+Compares loading rows with multi-row INSERTs (CRUDBase.create_many) and with
+COPY into a staging table (CRUDItem.import_rows). Run against the
+docker-compose Postgres.
+
+    cd backend; python -m benchmarks.bulk_import --rows 100000
+"""
+import argparse
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from src.crud.item import CRUDItem
+from src.models import Item, ItemCreate
+from src.models.session import engine
+
+# No cache, so both paths only pay for the database
+items = CRUDItem(Item)
+SEED_PREFIX = "bench-import-"
+
+
+def rows(count: int) -> list[dict]:
+    run_id = uuid.uuid4().hex[:8]
+    return [
+        {"title": f"{SEED_PREFIX}{run_id}-{i}", "description": "import benchmark"}
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with Session(engine, expire_on_commit=False) as db:
+        objs_in = [ItemCreate(**row) for row in rows(args.rows)]
+        start = time.perf_counter()
+        items.create_many(db, objs_in=objs_in)
+        insert_s = time.perf_counter() - start
+        db.expunge_all()
+
+        start = time.perf_counter()
+        result = items.import_rows(db, rows=rows(args.rows))
+        copy_s = time.perf_counter() - start
+        assert result.inserted == args.rows, result
+
+        db.execute(
+            text("DELETE FROM item WHERE title LIKE :prefix"),
+            {"prefix": SEED_PREFIX + "%"},
+        )
+        db.commit()
+
+    for name, seconds in (("insert", insert_s), ("copy", copy_s)):
+        print(f"{name:<8} {seconds:8.2f}s {args.rows / seconds:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
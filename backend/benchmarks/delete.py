@@ -0,0 +1,55 @@
+"""
+Compares per-row delete latency for the load-then-delete path
+(CRUDBase.delete), the single statement path (CRUDBase.delete_by_id) and
+soft deletes. Run against the docker-compose Postgres.
+
+    cd backend; python -m benchmarks.delete --rows 2000
+"""
+import argparse
+import uuid
+
+from sqlmodel import Session
+
+from benchmarks._common import report, timed
+from src.crud.item import CRUDItem
+from src.models import Item, ItemCreate
+from src.models.session import engine
+
+hard = CRUDItem(Item)
+soft = CRUDItem(Item, soft_delete=True)
+
+
+def seed(db: Session, rows: int) -> list[uuid.UUID]:
+    run_id = uuid.uuid4().hex[:8]
+    objs_in = [
+        ItemCreate(title=f"bench-delete-{run_id}-{i}", description="delete benchmark")
+        for i in range(rows)
+    ]
+    return [db_obj.id for db_obj in hard.create_many(db, objs_in=objs_in).items]
+
+
+def time_deletes(db: Session, ids: list[uuid.UUID], delete) -> list[float]:
+    return [timed(delete, db, id) for id in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    paths = {
+        "select + delete": lambda db, id: hard.delete(db, id=id),
+        "delete returning": lambda db, id: hard.delete_by_id(db, id=id),
+        "soft delete": lambda db, id: soft.delete_by_id(db, id=id),
+    }
+    with Session(engine, expire_on_commit=False) as db:
+        for name, delete in paths.items():
+            ids = seed(db, args.rows)
+            db.expunge_all()
+            report(name, time_deletes(db, ids, delete))
+        # Soft deleted rows are still there
+        hard.delete_many(db, ids=ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Profiles cold import time of the app using `python -X importtime` and
+prints the slowest modules. With --check it exits non-zero when the median
+total import time is over the budget in import_budget.json, which is what
+tests/test_import_time.py runs under pytest.
+
+The default module is src.main rather than lambda_handler. Importing the
+handler also runs its init, a schema check that may apply migrations and
+a lifespan startup that connects to the db, so its timing would depend on
+the network and could change the db. The budget covers Python imports
+only.
+
+    cd backend; python -m benchmarks.import_time --top 25 --tree importtime.txt
+    cd backend; python -m benchmarks.import_time --check
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+BUDGET_FILE = Path(__file__).parent / "import_budget.json"
+APP_MODULE = "src.main"
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def run_importtime(module: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return result.stderr
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    records = []
+    for line in output.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append(
+            ImportRecord(
+                module=name.strip(),
+                depth=depth,
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+            )
+        )
+    return records
+
+
+def total_ms(records: list[ImportRecord]) -> float:
+    # Top level imports are the ones at the smallest indentation
+    top_depth = min(record.depth for record in records)
+    return sum(r.cumulative_us for r in records if r.depth == top_depth) / 1000
+
+
+def report(records: list[ImportRecord], top: int) -> None:
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    ranked = sorted(records, key=lambda r: r.cumulative_us, reverse=True)
+    for record in ranked[:top]:
+        print(
+            f"{record.cumulative_us / 1000:14.1f} {record.self_us / 1000:9.1f}  "
+            f"{record.module}"
+        )
+    print(f"\ntotal import time: {total_ms(records):.1f}ms")
+
+
+def median_import_ms(module: str, runs: int) -> float:
+    timings = [total_ms(parse_importtime(run_importtime(module))) for _ in range(runs)]
+    return statistics.median(timings)
+
+
+def load_budget(module: str) -> float:
+    budget = json.loads(BUDGET_FILE.read_text())
+    if budget["module"] != module:
+        raise ValueError(f"No import budget stored for {module}")
+    return budget["max_cumulative_ms"]
+
+
+def check_budget(module: str, runs: int) -> int:
+    limit = load_budget(module)
+    median = median_import_ms(module, runs)
+    print(f"{module}: median cold import {median:.1f}ms, budget {limit}ms")
+    return 0 if median <= limit else 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default=APP_MODULE)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--tree", help="Write the raw importtime tree to this file")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(check_budget(args.module, args.runs))
+
+    output = run_importtime(args.module)
+    if args.tree:
+        Path(args.tree).write_text(output)
+    report(parse_importtime(output), args.top)
+
+
+if __name__ == "__main__":
+    main()
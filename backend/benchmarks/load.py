@@ -0,0 +1,411 @@
+"""
+Load test for every route in src/api/items.py. Seeds the docker-compose
+Postgres, drives each route at the given concurrency and reports p50, p95,
+p99 and throughput per route. Results are written as JSON so runs can be
+compared. With --baseline it exits non-zero when a route's p95 or
+throughput regressed by more than --threshold, which is how CI flags
+regressions.
+
+Two targets:
+  asgi      requests are sent straight to src.main.app in process
+  emulator  Lambda function URL events are posted to the runtime interface
+            emulator (see local_request.py). It runs one invocation at a
+            time, so concurrency there only measures queueing.
+
+    cd backend; python -m benchmarks.load --seed 100000 --requests 500
+    cd backend; python -m benchmarks.load --target emulator --routes read,list
+    cd backend; python -m benchmarks.load --baseline benchmarks/results/base.json
+"""
+import argparse
+import asyncio
+import copy
+import csv
+import io
+import json
+import statistics
+import subprocess
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import text
+
+from benchmarks.pagination import cleanup, seed
+from local_request import cf_request_event
+from src.models.session import engine
+
+SEED_PREFIX = "bench-load-"
+RESULTS_DIR = Path(__file__).parent / "results"
+EMULATOR_URL = "http://localhost:9000/2015-03-31/functions/function/invocations"
+BULK_SIZE = 100
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: str = ""
+    headers: dict = field(default_factory=dict)
+    body: Optional[bytes] = None
+
+
+@dataclass
+class State:
+    """Rows the scenarios read and write, filled in by prepare()"""
+
+    ids: list[uuid.UUID] = field(default_factory=list)
+    # Created up front for the delete scenarios, which consume them
+    delete_ids: list[uuid.UUID] = field(default_factory=list)
+    counter: int = 0
+
+    def next_ids(self, count: int = 1) -> list[uuid.UUID]:
+        self.counter += count
+        return [self.ids[(self.counter - i) % len(self.ids)] for i in range(count)]
+
+    def next_title(self) -> str:
+        self.counter += 1
+        return f"{SEED_PREFIX}new-{uuid.uuid4().hex[:12]}-{self.counter}"
+
+
+def json_body(content) -> tuple[dict, bytes]:
+    return {"content-type": "application/json"}, json.dumps(content).encode()
+
+
+def create(state: State) -> Request:
+    headers, body = json_body({"title": state.next_title(), "description": "x"})
+    return Request("POST", "/api/items", headers=headers, body=body)
+
+
+def list_items(state: State) -> Request:
+    return Request("GET", "/api/items", query="limit=100")
+
+
+def read(state: State) -> Request:
+    (id,) = state.next_ids()
+    return Request("GET", f"/api/items/{id}")
+
+
+def update(state: State) -> Request:
+    (id,) = state.next_ids()
+    headers, body = json_body({"description": f"updated {state.counter}"})
+    return Request("PATCH", f"/api/items/{id}", headers=headers, body=body)
+
+
+def delete(state: State) -> Request:
+    return Request("DELETE", f"/api/items/{state.delete_ids.pop()}")
+
+
+def bulk_create(state: State) -> Request:
+    items = [
+        {"title": state.next_title(), "description": "x"} for _ in range(BULK_SIZE)
+    ]
+    headers, body = json_body({"items": items})
+    return Request("POST", "/api/items/bulk", headers=headers, body=body)
+
+
+def bulk_update(state: State) -> Request:
+    items = [
+        {"id": str(id), "description": f"bulk {state.counter}"}
+        for id in state.next_ids(BULK_SIZE)
+    ]
+    headers, body = json_body({"items": items})
+    return Request("PATCH", "/api/items/bulk", headers=headers, body=body)
+
+
+def bulk_delete(state: State) -> Request:
+    ids = [str(state.delete_ids.pop()) for _ in range(BULK_SIZE)]
+    headers, body = json_body({"ids": ids})
+    return Request("DELETE", "/api/items/bulk", headers=headers, body=body)
+
+
+def export(state: State) -> Request:
+    return Request("GET", "/api/items/export")
+
+
+def import_items(state: State) -> Request:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["title", "description"])
+    writer.writerows([state.next_title(), "imported"] for _ in range(BULK_SIZE))
+    return Request(
+        "POST",
+        "/api/items/import",
+        query="format=csv",
+        headers={"content-type": "text/csv"},
+        body=buffer.getvalue().encode(),
+    )
+
+
+@dataclass
+class Scenario:
+    build: Callable[[State], Request]
+    # Cap for routes whose every request is expensive
+    max_requests: Optional[int] = None
+    # Rows each request deletes
+    deletes: int = 0
+
+
+SCENARIOS = {
+    "create": Scenario(create),
+    "list": Scenario(list_items),
+    "read": Scenario(read),
+    "update": Scenario(update),
+    "delete": Scenario(delete, deletes=1),
+    "bulk_create": Scenario(bulk_create),
+    "bulk_update": Scenario(bulk_update),
+    "bulk_delete": Scenario(bulk_delete, deletes=BULK_SIZE),
+    "export": Scenario(export, max_requests=20),
+    "import": Scenario(import_items),
+}
+
+
+def prepare(state: State, delete_rows: int) -> None:
+    with engine.begin() as conn:
+        state.ids = list(
+            conn.scalars(
+                text("SELECT id FROM item WHERE title LIKE :prefix LIMIT 10000"),
+                {"prefix": SEED_PREFIX + "%"},
+            )
+        )
+        if delete_rows:
+            state.delete_ids = list(
+                conn.scalars(
+                    text(
+                        """
+                        INSERT INTO item (id, is_active, title, description)
+                        SELECT gen_random_uuid(), true, :prefix || g, 'delete me'
+                        FROM generate_series(1, :rows) AS g
+                        RETURNING id
+                        """
+                    ),
+                    {
+                        "prefix": f"{SEED_PREFIX}delete-{uuid.uuid4().hex[:8]}-",
+                        "rows": delete_rows,
+                    },
+                )
+            )
+    if not state.ids:
+        raise SystemExit("No seeded rows, run with --seed first")
+
+
+def asgi_runner(concurrency: int):
+    # Imported here so the emulator target doesn't pay for loading the app
+    from src.main import app
+
+    async def send_one(request: Request) -> int:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": "http",
+            "path": request.path,
+            "raw_path": request.path.encode(),
+            "root_path": "",
+            "query_string": request.query.encode(),
+            "headers": [(b"host", b"bench")]
+            + [(k.encode(), v.encode()) for k, v in request.headers.items()],
+            "client": ("127.0.0.1", 1234),
+            "server": ("bench", 80),
+        }
+        body_sent = False
+        status = 0
+
+        async def receive():
+            nonlocal body_sent
+            if body_sent:
+                # Streaming responses listen for a disconnect that never comes
+                await asyncio.sleep(3600)
+            body_sent = True
+            return {"type": "http.request", "body": request.body or b""}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(scope, receive, send)
+        return status
+
+    async def run_all(requests: list[Request]) -> list[tuple[float, int]]:
+        pending = iter(requests)
+        results = []
+
+        async def worker():
+            for request in pending:
+                start = time.perf_counter()
+                status = await send_one(request)
+                results.append(((time.perf_counter() - start) * 1000, status))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+
+    # One loop for the whole run, asyncpg connections are tied to the loop
+    # they were opened on
+    loop = asyncio.new_event_loop()
+    return lambda requests: loop.run_until_complete(run_all(requests))
+
+
+def function_url_event(request: Request) -> dict:
+    event = copy.deepcopy(cf_request_event)
+    event["rawPath"] = request.path
+    event["rawQueryString"] = request.query
+    event.pop("queryStringParameters", None)
+    event["headers"].update(request.headers)
+    event["requestContext"]["http"]["method"] = request.method
+    event["requestContext"]["http"]["path"] = request.path
+    event["requestContext"]["requestId"] = str(uuid.uuid4())
+    if request.body is not None:
+        event["body"] = request.body.decode()
+    return event
+
+
+def invoke_emulator(event: dict, url: str = EMULATOR_URL) -> dict:
+    http_request = urllib.request.Request(
+        url,
+        data=json.dumps(event).encode(),
+        headers={"content-type": "application/json"},
+    )
+    with urllib.request.urlopen(http_request) as response:
+        return json.load(response)
+
+
+def emulator_runner(concurrency: int):
+    def send_one(request: Request) -> tuple[float, int]:
+        event = function_url_event(request)
+        start = time.perf_counter()
+        response = invoke_emulator(event)
+        return (time.perf_counter() - start) * 1000, response.get("statusCode", 0)
+
+    def run_all(requests: list[Request]) -> list[tuple[float, int]]:
+        with ThreadPoolExecutor(concurrency) as pool:
+            return list(pool.map(send_one, requests))
+
+    return run_all
+
+
+def percentile(sorted_ms: list[float], pct: float) -> float:
+    index = round(pct / 100 * (len(sorted_ms) - 1))
+    return sorted_ms[index]
+
+
+def summarize(results: list[tuple[float, int]], elapsed: float) -> dict:
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, status in results if status >= 400 or status == 0),
+        "throughput": round(len(results) / elapsed, 2),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, route in results["routes"].items():
+        base = baseline["routes"].get(name)
+        if base is None:
+            continue
+        if route["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']}ms -> {route['p95_ms']}ms"
+            )
+        if route["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {base['throughput']} -> "
+                f"{route['throughput']} req/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=["asgi", "emulator"], default="asgi")
+    parser.add_argument("--routes", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="Rows to seed first")
+    parser.add_argument("--cleanup", action="store_true")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup(SEED_PREFIX)
+        return
+    if args.seed:
+        seed(args.seed, SEED_PREFIX)
+
+    names = args.routes.split(",")
+    counts = {
+        name: min(args.requests, SCENARIOS[name].max_requests or args.requests)
+        for name in names
+    }
+    state = State()
+    prepare(state, sum(SCENARIOS[n].deletes * counts[n] for n in names))
+    runner = (asgi_runner if args.target == "asgi" else emulator_runner)(
+        args.concurrency
+    )
+
+    routes = {}
+    print(f"{'route':<12} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} errors")
+    for name in names:
+        requests = [SCENARIOS[name].build(state) for _ in range(counts[name])]
+        start = time.perf_counter()
+        results = runner(requests)
+        routes[name] = summarize(results, time.perf_counter() - start)
+        r = routes[name]
+        print(
+            f"{name:<12} {r['throughput']:>9.1f} {r['p50_ms']:>7.1f}ms "
+            f"{r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {r['errors']:>6}"
+        )
+
+    results = {
+        "meta": {
+            "target": args.target,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "routes": routes,
+    }
+    output = args.output or RESULTS_DIR / (
+        f"{datetime.now():%Y%m%dT%H%M%S}-{args.target}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
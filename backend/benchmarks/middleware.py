@@ -0,0 +1,120 @@
+"""
+Requests/sec through the middleware stack as it was (CORS plus an
+@app.middleware("http") access log) and as it is now (CORS plus the pure
+ASGI RequestContextMiddleware). Requests are sent straight to the ASGI app
+from asyncio tasks, so the numbers exclude any server and network cost.
+Log output goes to /dev/null. No database is needed.
+
+    cd backend; python -m benchmarks.middleware --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+
+from src.utils import service_logging
+from src.utils.middleware import RequestContextMiddleware
+
+PATHS = ("/api/hello", "/api/stream")
+
+
+async def http_middleware(request: Request, call_next):
+    # The access log middleware before it was rewritten as plain ASGI
+    sampled = service_logging.sample_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    duration_ms = (time.perf_counter() - start) * 1000
+    if service_logging.keep_request(sampled, response.status_code, duration_ms):
+        service_logging.log_access(
+            request.scope, response.status_code, duration_ms, "benchmark"
+        )
+    return response
+
+
+def build_app(pure_asgi: bool) -> FastAPI:
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+    @app.get("/api/hello")
+    async def read_hello():
+        return {"Hello": "World"}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(10):
+                yield b"x" * 1024
+
+        return StreamingResponse(chunks())
+
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], max_age=7200)
+    if pure_asgi:
+        app.add_middleware(RequestContextMiddleware)
+    else:
+        app.middleware("http")(http_middleware)
+    return app
+
+
+async def request(app: FastAPI, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"origin", b"http://localhost")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def requests_per_second(app, path: str, total: int, concurrency: int) -> float:
+    async def worker(count: int):
+        for _ in range(count):
+            await request(app, path)
+
+    await worker(100)  # warm up
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    service_logging.handler.setStream(open(os.devnull, "w"))
+    print(f"{'path':<12} {'http middleware':>16} {'pure asgi':>12}")
+    for path in PATHS:
+        results = [
+            asyncio.run(
+                requests_per_second(
+                    build_app(pure_asgi), path, args.requests, args.concurrency
+                )
+            )
+            for pure_asgi in (False, True)
+        ]
+        print(f"{path:<12} {results[0]:>12,.0f} r/s {results[1]:>8,.0f} r/s")
+        service_logging.flush()
+
+
+if __name__ == "__main__":
+    main()
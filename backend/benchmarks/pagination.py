@@ -0,0 +1,108 @@
+"""
+Seeds the item table and compares page latency at increasing depth for
+offset pagination (CRUDBase.get_multi) and keyset pagination
+(CRUDBase.get_page). Run against the docker-compose Postgres, never a
+shared database.
+
+    cd backend; python -m benchmarks.pagination --rows 1000000 --seed
+    cd backend; python -m benchmarks.pagination --cleanup
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from src import crud
+from src.models.session import engine
+
+SEED_PREFIX = "bench-page-"
+DEPTHS = (0, 1_000, 10_000, 100_000, 500_000, 999_000)
+
+
+def seed(rows: int, prefix: str = SEED_PREFIX) -> None:
+    # Set based so seeding a million rows takes seconds, not an afternoon
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO item (id, created, updated, is_active, title, description)
+                SELECT gen_random_uuid(),
+                       now() - make_interval(secs => g),
+                       now(),
+                       true,
+                       :prefix || g,
+                       'benchmark item'
+                FROM generate_series(1, :rows) AS g
+                """
+            ),
+            {"prefix": prefix, "rows": rows},
+        )
+        conn.execute(text("ANALYZE item"))
+
+
+def cleanup(prefix: str = SEED_PREFIX) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM item WHERE title LIKE :prefix"),
+            {"prefix": prefix + "%"},
+        )
+
+
+def cursor_at(db: Session, depth: int) -> str | None:
+    if depth == 0:
+        return None
+    row = db.exec(
+        crud.item._get_page_statement(
+            limit=0, cursor=None, order_by="created", descending=False
+        ).offset(depth - 1)
+    ).first()
+    return crud.item._encode_cursor(row, order_by="created", descending=False)
+
+
+def time_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--cleanup", action="store_true")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if args.seed:
+        seed(args.rows)
+
+    print(f"{'depth':>10} {'offset ms':>10} {'keyset ms':>10}")
+    with Session(engine) as db:
+        for depth in DEPTHS:
+            if depth >= args.rows:
+                break
+            cursor = cursor_at(db, depth)
+            offset_ms = time_ms(
+                lambda: crud.item.get_multi(db=db, skip=depth, limit=args.limit),
+                args.repeat,
+            )
+            keyset_ms = time_ms(
+                lambda: crud.item.get_page(db=db, cursor=cursor, limit=args.limit),
+                args.repeat,
+            )
+            # Keep the identity map from growing across iterations
+            db.expunge_all()
+            print(f"{depth:>10} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Local power tuning. Lambda gives a function CPU in proportion to its memory,
+one full vCPU at 1769MB, so the memory setting trades cost for latency. For
+each memory size this limits the runtime interface emulator container to
+that much memory and CPU share, restarts it, sends one cold invocation and
+then --invocations warm ones, and prices them the way Lambda bills them.
+The memory size picked by --strategy is printed at the end, ready for the
+lambda-memory-size stack config.
+
+Events are GET /api/items and GET /api/hello function URL events, or the
+events in an NDJSON file (see benchmarks.replay). Docker's CPU quota is
+only an approximation of Lambda's, so compare tiers with each other rather
+than with production timings. Prices default to arm64, what the image in
+backend/Dockerfile is built for.
+
+The emulator is the docker-compose lambda service:
+
+    docker compose up -d lambda
+    cd backend; python -m benchmarks.power_tuning
+    cd backend; python -m benchmarks.power_tuning --memory 512 1024 1769 \\
+        --events events.ndjson --strategy balanced
+"""
+import argparse
+import json
+import math
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from benchmarks.load import (
+    EMULATOR_URL,
+    Request,
+    function_url_event,
+    invoke_emulator,
+    percentile,
+)
+from benchmarks.replay import EMULATOR_CONTAINER, read_events, restart_emulator
+
+# Memory at which a function gets one full vCPU
+FULL_VCPU_MB = 1769
+DEFAULT_MEMORY_SIZES = [128, 256, 512, 1024, 1769, 3008]
+# USD, us-east-2. Duration is billed per GB-second in 1ms increments.
+PRICE_PER_GB_SECOND = {"x86_64": 0.0000166667, "arm64": 0.0000133334}
+PRICE_PER_REQUEST = 0.20 / 1_000_000
+
+
+def default_events() -> list[dict]:
+    return [
+        function_url_event(Request("GET", "/api/items", "limit=50")),
+        function_url_event(Request("GET", "/api/hello")),
+    ]
+
+
+def limit_container(container: str, memory_mb: int) -> None:
+    cpus = max(round(memory_mb / FULL_VCPU_MB, 2), 0.01)
+    subprocess.run(
+        [
+            "docker",
+            "update",
+            f"--cpus={cpus}",
+            f"--memory={memory_mb}m",
+            # No swap, like Lambda, so a tier that is too small fails
+            f"--memory-swap={memory_mb}m",
+            container,
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def invoke(event: dict, url: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    status = invoke_emulator(event, url=url).get("statusCode", 0)
+    return (time.perf_counter() - start) * 1000, status
+
+
+def invocation_cost(memory_mb: int, duration_ms: float, arch: str) -> float:
+    gb_seconds = memory_mb / 1024 * math.ceil(duration_ms) / 1000
+    return gb_seconds * PRICE_PER_GB_SECOND[arch] + PRICE_PER_REQUEST
+
+
+def run_tier(
+    memory_mb: int, events: list[dict], invocations: int, args: argparse.Namespace
+) -> dict:
+    limit_container(args.container, memory_mb)
+    restart_emulator(args.container, args.url)
+    cold_ms, _ = invoke(events[0], args.url)
+    warm, errors = [], 0
+    for i in range(invocations):
+        duration_ms, status = invoke(events[i % len(events)], args.url)
+        warm.append(duration_ms)
+        errors += status >= 500
+    warm.sort()
+    costs = [invocation_cost(memory_mb, ms, args.arch) for ms in warm]
+    return {
+        "memory_mb": memory_mb,
+        "cold_ms": round(cold_ms, 3),
+        "mean_ms": round(statistics.mean(warm), 3),
+        "p50_ms": round(percentile(warm, 50), 3),
+        "p95_ms": round(percentile(warm, 95), 3),
+        "errors": errors,
+        # Per million warm invocations, easier to read than per invocation
+        "cost_per_million": round(statistics.mean(costs) * 1_000_000, 4),
+    }
+
+
+def recommend(tiers: list[dict], strategy: str, weight: float) -> dict:
+    candidates = [tier for tier in tiers if not tier["errors"]] or tiers
+    if strategy == "cost":
+        return min(candidates, key=lambda tier: tier["cost_per_million"])
+    if strategy == "speed":
+        return min(candidates, key=lambda tier: tier["p95_ms"])
+    # Balanced, both normalized to the cheapest and fastest tier
+    min_cost = min(tier["cost_per_million"] for tier in candidates)
+    min_p95 = min(tier["p95_ms"] for tier in candidates)
+    return min(
+        candidates,
+        key=lambda tier: weight * tier["cost_per_million"] / min_cost
+        + (1 - weight) * tier["p95_ms"] / min_p95,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--container", default=EMULATOR_CONTAINER, help="Emulator container"
+    )
+    parser.add_argument("--url", default=EMULATOR_URL)
+    parser.add_argument(
+        "--memory", type=int, nargs="+", default=DEFAULT_MEMORY_SIZES, help="MB"
+    )
+    parser.add_argument("--invocations", type=int, default=100)
+    parser.add_argument("--events", type=Path)
+    parser.add_argument("--arch", choices=list(PRICE_PER_GB_SECOND), default="arm64")
+    parser.add_argument(
+        "--strategy", choices=["cost", "speed", "balanced"], default="balanced"
+    )
+    parser.add_argument(
+        "--weight", type=float, default=0.5, help="Share of cost in balanced"
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    events = list(read_events(args.events)) if args.events else default_events()
+    tiers = []
+    for memory_mb in sorted(args.memory):
+        tier = run_tier(memory_mb, events, args.invocations, args)
+        print(json.dumps(tier))
+        tiers.append(tier)
+    best = recommend(tiers, args.strategy, args.weight)
+    results = {
+        "arch": args.arch,
+        "strategy": args.strategy,
+        "tiers": tiers,
+        "recommended_memory_mb": best["memory_mb"],
+    }
+    print(f"recommended: {best['memory_mb']}MB ({args.strategy})")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
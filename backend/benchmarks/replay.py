@@ -0,0 +1,204 @@
+"""
+Replays recorded Lambda events (API Gateway / function URL / CloudFront)
+against lambda_handler.handle_event and reports cold and warm latency.
+
+The events file is NDJSON, one event per line. Lines may also be log
+records with the event under "aws_event", which the function writes with
+CAPTURE_EVENTS on (sanitized, see service_logging.sanitize_event). To pull
+them out of CloudWatch:
+
+    aws logs filter-log-events --log-group-name /aws/lambda/<function> \\
+        --filter-pattern '{ $.log_type = "aws_event" }' \\
+        | jq -c '.events[].message | fromjson' > events.ndjson
+
+Events are sent one at a time, like Lambda sends them to an execution
+environment, paced to --rate events/sec (0 replays as fast as possible and
+reports throughput). With --cold-every N, every Nth event is sent to a cold
+environment instead:
+  in-process  a fresh interpreter imports lambda_handler and handles just
+              that event, timing init and the invocation
+  emulator    the runtime interface emulator container is restarted first,
+              so the invocation pays for init
+
+The emulator is the docker-compose lambda service:
+
+    docker compose up -d lambda
+    cd backend; python -m benchmarks.replay events.ndjson --rate 20
+    cd backend; python -m benchmarks.replay events.ndjson --cold-every 50
+    cd backend; python -m benchmarks.replay events.ndjson --target emulator \\
+        --cold-every 20
+"""
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from benchmarks.load import EMULATOR_URL, invoke_emulator, percentile
+
+# container_name of the docker-compose lambda service
+EMULATOR_CONTAINER = "exampulumi_lambda"
+
+
+class Context:
+    function_name = "replay"
+
+    def __init__(self):
+        self.aws_request_id = str(uuid.uuid4())
+
+
+def read_events(path: Path) -> Iterator[dict]:
+    with path.open() as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield record.get("aws_event") or record
+
+
+def in_process_target():
+    # Imported only when used, the cold child measures this import itself
+    import lambda_handler
+
+    def invoke(event: dict) -> dict:
+        return lambda_handler.handle_event(event, Context())
+
+    return invoke
+
+
+def cold_in_process(event: dict) -> tuple[float, float, int]:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.replay", "--cold-child"],
+        input=json.dumps(event),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(result.stdout.splitlines()[-1])
+    return timings["init_ms"], timings["invoke_ms"], timings["status"]
+
+
+def cold_child() -> None:
+    event = json.loads(sys.stdin.read())
+    start = time.perf_counter()
+    invoke = in_process_target()
+    init_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    response = invoke(event)
+    invoke_ms = (time.perf_counter() - start) * 1000
+    status = response.get("statusCode", 0)
+    print(json.dumps({"init_ms": init_ms, "invoke_ms": invoke_ms, "status": status}))
+
+
+def restart_emulator(container: str, url: str) -> None:
+    subprocess.run(["docker", "restart", container], check=True, capture_output=True)
+    # The emulator starts the function on the first invocation, so waiting
+    # for the port leaves init to be paid for by the next event
+    parts = urlsplit(url)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((parts.hostname, parts.port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{container} did not come back up")
+
+
+def distribution(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"count": 0}
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("events", type=Path, nargs="?")
+    parser.add_argument(
+        "--target", choices=["in-process", "emulator"], default="in-process"
+    )
+    parser.add_argument("--rate", type=float, default=0, help="Events/sec")
+    parser.add_argument("--cold-every", type=int, default=0)
+    parser.add_argument("--loops", type=int, default=1)
+    parser.add_argument("--url", default=EMULATOR_URL)
+    parser.add_argument(
+        "--container", default=EMULATOR_CONTAINER, help="Emulator container"
+    )
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--cold-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_child:
+        cold_child()
+        return
+    if args.events is None:
+        parser.error("an events file is required")
+    target = args.target
+
+    events = list(read_events(args.events)) * args.loops
+    if target == "in-process":
+        invoke = in_process_target()
+    else:
+
+        def invoke(event: dict) -> dict:
+            return invoke_emulator(event, url=args.url)
+
+    warm, cold, init, statuses = [], [], [], {}
+    lag_ms = 0.0
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        if args.rate:
+            # Open loop, events are due on a fixed schedule whether or not
+            # the previous one was slow
+            due = start + i / args.rate
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+            else:
+                lag_ms = max(lag_ms, (now - due) * 1000)
+        is_cold = args.cold_every and i % args.cold_every == 0
+        if is_cold and target == "in-process":
+            init_ms, invoke_ms, status = cold_in_process(event)
+            init.append(init_ms)
+            cold.append(init_ms + invoke_ms)
+        else:
+            if is_cold:
+                restart_emulator(args.container, args.url)
+            invoke_start = time.perf_counter()
+            status = invoke(event).get("statusCode", 0)
+            (cold if is_cold else warm).append(
+                (time.perf_counter() - invoke_start) * 1000
+            )
+        statuses[status] = statuses.get(status, 0) + 1
+    elapsed = time.perf_counter() - start
+
+    results = {
+        "target": target,
+        "events": len(events),
+        "throughput": round(len(events) / elapsed, 2),
+        "max_schedule_lag_ms": round(lag_ms, 3),
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "warm": distribution(warm),
+        "cold": distribution(cold),
+        "cold_init": distribution(init),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measures per-request overhead of the access log middleware by replaying the
+CloudFront event from local_request.py through Mangum against a bare app.
+Compares no logging, the old log-everything-up-front middleware, and the
+sampled post-response access log at a few sample rates. Log output goes to
+/dev/null. No database is needed.
+
+    cd backend; python -m benchmarks.request_logging --iterations 5000
+"""
+import argparse
+import logging
+import os
+import statistics
+
+from fastapi import FastAPI
+from mangum import Mangum
+from starlette.requests import Request
+
+from benchmarks._common import report, time_calls
+from local_request import cf_request_event
+from src.utils import service_logging
+from src.utils.config import settings
+from src.utils.middleware import RequestContextMiddleware
+
+
+def build_app(add_middleware) -> FastAPI:
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+    @app.get("/api/items/{item_id}")
+    def read_item(item_id: str):
+        return {"id": item_id}
+
+    if add_middleware is not None:
+        add_middleware(app)
+    return app
+
+
+def legacy_logger() -> logging.Logger:
+    # The old setup: a JSON formatted StreamHandler called on the request path
+    legacy = logging.getLogger("benchmark.legacy")
+    legacy.propagate = False
+    legacy_handler = logging.StreamHandler(open(os.devnull, "w"))
+    legacy_handler.setFormatter(service_logging.formatter)
+    legacy.addHandler(legacy_handler)
+    legacy.setLevel(logging.INFO)
+    return legacy
+
+
+legacy = legacy_logger()
+
+
+async def legacy_middleware(request: Request, call_next):
+    legacy.info(
+        {
+            "log_type": "incoming_http_request",
+            "path_params": request.path_params,
+            "query_params": request.query_params,
+            "path": request.url.path,
+            "method": request.method,
+            "headers": request.headers,
+            "aws_event": request.scope.get("aws.event"),
+        }
+    )
+    return await call_next(request)
+
+
+def add_legacy(app: FastAPI) -> None:
+    app.middleware("http")(legacy_middleware)
+
+
+def add_access_log(app: FastAPI) -> None:
+    app.add_middleware(RequestContextMiddleware)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    service_logging.handler.setStream(open(os.devnull, "w"))
+    variants = [
+        ("no logging", None, None),
+        ("legacy", add_legacy, None),
+        ("access log 100%", add_access_log, 1.0),
+        ("access log 10%", add_access_log, 0.1),
+        ("access log 1%", add_access_log, 0.01),
+    ]
+    baseline = None
+    for name, add_middleware, sample_rate in variants:
+        if sample_rate is not None:
+            settings.LOG_SAMPLE_RATE = sample_rate
+        handler = Mangum(app=build_app(add_middleware), lifespan="off")
+        time_calls([handler], cf_request_event, 100)  # warm up
+        [timings] = time_calls([handler], cf_request_event, args.iterations)
+        if baseline is None:
+            baseline = statistics.median(timings)
+        report(name, timings, "us", baseline)
+        service_logging.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Replays a successful GET /api/items/{id} through the Lambda handler and
+reports:
+
+- the first request a new container serves, with and without the app's
+  lifespan startup (which opens the first pooled connection) having run
+  during init
+- warm invocations, building a Mangum adapter on every call versus reusing
+  the module-scope one
+
+It creates the item it reads and deletes it afterwards, so it needs the
+database the app is configured for.
+
+    cd backend; python -m benchmarks.warm_invocation --iterations 2000
+"""
+import argparse
+import asyncio
+import statistics
+
+from mangum import Mangum
+from sqlalchemy import text
+from sqlmodel import Session
+
+import lambda_handler
+from benchmarks._common import call, report, time_calls
+from benchmarks.load import Request, function_url_event
+from src import crud
+from src.models.item import ItemCreate
+from src.models.session import async_engine, engine
+
+TITLE = "benchmark-warm-invocation"
+
+
+def new_container() -> None:
+    # What a cold start has, no pooled connections
+    engine.dispose()
+    if async_engine is not None:
+        asyncio.run(async_engine.dispose())
+
+
+def time_first_requests(event: dict, repeat: int, startup: bool) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        new_container()
+        if startup:
+            # Untimed, Lambda's init phase
+            lifespan_cycle = lambda_handler.start_app()
+        timings.append(call(per_invocation_adapter, event))
+        if startup:
+            lifespan_cycle.__exit__(None, None, None)
+    return timings
+
+
+def per_invocation_adapter(event, context):
+    # What handle_event used to do, with the same log flush handle_event
+    # now does so only the adapter differs between the two
+    try:
+        return Mangum(app=lambda_handler.app, lifespan="off")(event, context)
+    finally:
+        lambda_handler.flush_logs()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--cold-starts", type=int, default=50)
+    args = parser.parse_args()
+
+    with Session(engine) as db:
+        item = crud.item.create(
+            db, obj_in=ItemCreate(title=TITLE, description="warm invocation")
+        )
+        item_id = item.id
+    event = function_url_event(Request("GET", f"/api/items/{item_id}"))
+    handlers = [per_invocation_adapter, lambda_handler.handle_event]
+    try:
+        cold = time_first_requests(event, args.cold_starts, startup=False)
+        started = time_first_requests(event, args.cold_starts, startup=True)
+        # Warm both paths before measuring
+        time_calls(handlers, event, 50)
+        before, after = time_calls(handlers, event, args.iterations)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM item WHERE id = :id"), {"id": item_id})
+
+    report("first request", cold, "us")
+    report("first request, started", started, "us")
+    saved = statistics.median(cold) - statistics.median(started)
+    print(f"saved on the first request (p50): {saved * 1_000_000:.1f}us")
+    report("adapter per invocation", before, "us")
+    report("module-scope adapter", after, "us")
+    saved = statistics.median(before) - statistics.median(after)
+    print(f"saved per invocation (p50): {saved * 1_000_000:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
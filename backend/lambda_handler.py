@@ -1,20 +1,74 @@
+import time
+
 from mangum import Mangum
+from mangum.protocols.lifespan import LifespanCycle
+
+from src.main import app, log_metrics
+from src.models.session import engine
+from src.utils import edge_cache, migrations
+from src.utils.config import settings
+from src.utils.service_logging import flush as flush_logs, log_event, logger
+
+MIGRATE_ACTION = "migrate"
+
+# When this container last logged its pool and cache counters
+_metrics_state = {"logged_at": None}
+
+
+def check_schema() -> None:
+    # Runs during Lambda's init phase rather than on every invocation. A
+    # failure here should not take the container down, handle_event runs
+    # it again until it succeeds, at most every MIGRATION_RECHECK_SECONDS.
+    try:
+        migrations.ensure_migrated(
+            engine,
+            allow_upgrade=settings.MIGRATE_ON_INIT,
+            recheck_after=settings.MIGRATION_RECHECK_SECONDS,
+        )
+    except Exception:
+        logger.exception({"log_type": "migration_check_failed"})
 
-from src.main import app
+
+def start_app() -> LifespanCycle:
+    # Mangum runs a full lifespan startup/shutdown around every invocation
+    # when lifespan is enabled on the adapter. Run startup once here instead
+    # and keep the adapter itself lifespan="off".
+    lifespan_cycle = LifespanCycle(app, "auto")
+    lifespan_cycle.__enter__()
+    return lifespan_cycle
+
+
+check_schema()
+lifespan_cycle = start_app()
+asgi_handler = Mangum(app=app, lifespan="off")
+
+
+def log_metrics_periodically() -> None:
+    now = time.monotonic()
+    logged_at = _metrics_state["logged_at"]
+    if logged_at is None or now - logged_at >= settings.METRICS_LOG_INTERVAL_SECONDS:
+        _metrics_state["logged_at"] = now
+        log_metrics()
 
 
 def handle_event(event, context):
-    # Do not leave this in! 😱😱😱😱😱
-    # This will run the migration every time the function is invoked
-    # Migrations are no-ops if the database is already on the head migration
-    # But its still a dumb way to have this configured and slow to attempt
-    # a migration before handling every API request
-    from alembic import command
-    from alembic.config import Config
-    alembic_cfg = Config("alembic.ini")
-    command.upgrade(alembic_cfg, "head")
-    # Do not leave this in! 😱😱😱😱😱
-
-    asgi_handler = Mangum(app=app, lifespan="off")
-    resp = asgi_handler(event, context)
-    return resp
+    if event.get("action") == MIGRATE_ACTION:
+        migrations.ensure_migrated(engine)
+        return {"action": MIGRATE_ACTION, "revision": migrations.packaged_head()}
+    if event.get("action") == edge_cache.INVALIDATE_ACTION:
+        # Queued by edge_cache.flush in a request container
+        edge_cache.invalidate(event["paths"])
+        return {"action": edge_cache.INVALIDATE_ACTION, "paths": len(event["paths"])}
+    if not migrations.is_up_to_date():
+        # The init check failed, or found migrations still pending
+        check_schema()
+    if settings.CAPTURE_EVENTS:
+        log_event(event)
+
+    try:
+        return asgi_handler(event, context)
+    finally:
+        log_metrics_periodically()
+        edge_cache.flush()
+        # Write out queued log records before Lambda freezes the process
+        flush_logs()
@@ -1,5 +1,3 @@
-import requests
-
 cf_request_event = {
     "version": "2.0",
     "routeKey": "$default",
@@ -74,6 +72,10 @@ cf_request_event = {
 
 
 def main():
+    # Only needed to post to the emulator, importing cf_request_event
+    # shouldn't need it
+    import requests
+
     resp = requests.post(
         "http://localhost:9000/2015-03-31/functions/function/invocations",
         json=cf_request_event,
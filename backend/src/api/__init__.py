@@ -1,11 +1,19 @@
 from fastapi import APIRouter
 
-from src.api import items
+from src.utils.config import settings
+from src.utils.http_cache import cache_control
+
+# Only the selected routes are imported, cold starts don't pay for the other
+if settings.DB_ASYNC:
+    from src.api.items_async import router as items_router
+else:
+    from src.api.items import router as items_router
 
 api_router = APIRouter()
-api_router.include_router(items.router, prefix="/items", tags=["items"])
+api_router.include_router(items_router, prefix="/items", tags=["items"])
 
 
 @api_router.get("/hello")
+@cache_control(max_age=60, s_maxage=3600)
 def read_hello():
     return {"Hello": "World"}
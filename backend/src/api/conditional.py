@@ -0,0 +1,52 @@
+import hashlib
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _micros(updated: Optional[datetime]) -> int:
+    if updated is None:
+        return 0
+    return (updated - EPOCH) // timedelta(microseconds=1)
+
+
+def item_etag(id: uuid.UUID, updated: Optional[datetime]) -> str:
+    # Reversible on purpose, If-Match turns it back into `updated` to make
+    # writes conditional in the UPDATE / DELETE itself
+    return f'"{id.hex}-{_micros(updated)}"'
+
+
+def list_etag(
+    versions: Sequence[tuple[uuid.UUID, Optional[datetime]]],
+    has_more: bool,
+    *params: Any,
+) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((has_more, *params)).encode())
+    for id, updated in versions:
+        digest.update(f"{id.hex}-{_micros(updated)},".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixed tags count
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def expected_updated(if_match: Optional[str], id: uuid.UUID) -> Optional[datetime]:
+    """
+    The `updated` value an If-Match header requires the item to still have.
+    None means the write is unconditional.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    for tag in if_match.split(","):
+        tag_id, _, micros = tag.strip().strip('"').partition("-")
+        if tag_id == id.hex and micros.isdigit():
+            return EPOCH + timedelta(microseconds=int(micros))
+    raise HTTPException(status_code=412, detail="Precondition Failed")
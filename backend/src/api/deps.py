@@ -1,9 +1,12 @@
-from typing import Generator
+from tempfile import SpooledTemporaryFile
+from typing import AsyncGenerator, Generator
 
+from fastapi import Request
 from fastapi.security import HTTPBearer
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.models.session import sqlmodel_engine
+from src.models.session import async_engine, engine
 
 # This just enables auth on the interactive api docs
 oauth2_scheme = HTTPBearer(
@@ -12,5 +15,28 @@ oauth2_scheme = HTTPBearer(
 
 
 def get_session() -> Generator:  # pragma: no cover - tested implicitly
-    with Session(sqlmodel_engine) as session:
+    # Writes fetch server defaults with RETURNING, so there is nothing to
+    # gain from expiring (and then reloading) objects after a commit
+    with Session(engine, expire_on_commit=False) as session:
         yield session
+
+
+async def get_async_session() -> AsyncGenerator:  # pragma: no cover
+    # Attributes can't be lazy loaded after a commit in async code, so keep
+    # them around rather than expiring them
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+# Request bodies bigger than this are spooled to disk
+MAX_BODY_IN_MEMORY = 16 * 1024 * 1024
+
+
+async def get_spooled_body(request: Request) -> AsyncGenerator:
+    # Reads the raw body on the event loop so sync routes can then read it
+    # as a file in the threadpool without holding it all in memory
+    with SpooledTemporaryFile(max_size=MAX_BODY_IN_MEMORY) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        yield body
@@ -0,0 +1,61 @@
+import csv
+import io
+from typing import AsyncIterator, Iterator, Literal, Sequence
+
+from pydantic import TypeAdapter
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import crud
+from src.models import Item, ItemRead
+from src.models.session import async_engine, engine
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CSV_COLUMNS = ["id", "title", "description", "isActive", "updated"]
+
+item_adapter = TypeAdapter(ItemRead)
+
+
+def encode_batch(items: Sequence[Item], format: ExportFormat) -> bytes:
+    if format == "ndjson":
+        return b"".join(
+            item_adapter.dump_json(
+                item_adapter.validate_python(item, from_attributes=True), by_alias=True
+            )
+            + b"\n"
+            for item in items
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for item in items:
+        writer.writerow(
+            [item.id, item.title, item.description, item.is_active, item.updated]
+        )
+    return buffer.getvalue().encode()
+
+
+def header(format: ExportFormat) -> bytes:
+    return (",".join(CSV_COLUMNS) + "\r\n").encode() if format == "csv" else b""
+
+
+# Streaming responses outlive the request's dependencies, so the generators
+# below open their own sessions rather than using deps.get_session
+
+
+def stream_items(format: ExportFormat, cursor: str | None) -> Iterator[bytes]:
+    # Sent before the first query so the client sees a byte straight away
+    yield header(format)
+    with Session(engine) as db:
+        for batch in crud.item.stream(db=db, cursor=cursor):
+            yield encode_batch(batch, format)
+
+
+async def stream_items_async(
+    format: ExportFormat, cursor: str | None
+) -> AsyncIterator[bytes]:
+    yield header(format)
+    async with AsyncSession(async_engine) as db:
+        async for batch in crud.item.stream_async(db=db, cursor=cursor):
+            yield encode_batch(batch, format)
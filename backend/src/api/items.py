@@ -1,48 +1,263 @@
 import uuid
+from dataclasses import asdict
+from datetime import datetime
+from typing import IO
 
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from src import crud
-from src.models import ItemCreate, ItemRead, ItemUpdate
+from src.crud.base import InvalidCursorError
+from src.models import (
+    ItemBulkCreateRequest,
+    ItemBulkDeleteRequest,
+    ItemBulkDeleteResult,
+    ItemBulkResult,
+    ItemBulkUpdateRequest,
+    ItemCreate,
+    ItemImportResult,
+    ItemRead,
+    ItemUpdate,
+)
 
-from src.api import deps
+from src.api import conditional, deps, export
+from src.api.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, ItemOrderBy
+from src.api.serialization import item_list_serializer, json_response
+from src.utils import edge_cache, imports
+from src.utils.config import settings
+from src.utils.http_cache import cache_control
 
 router = APIRouter()
 
 
 @router.post("", response_model=ItemRead, status_code=201)
 def create_item(
-    *, db: Session = Depends(deps.get_session), item_in: ItemCreate
+    *,
+    db: Session = Depends(deps.get_session),
+    item_in: ItemCreate,
+    background_tasks: BackgroundTasks,
 ) -> ItemRead:
-    item = crud.item.create(db=db, obj_in=ItemCreate(**item_in.model_dump()))
+    item = crud.item.create(db=db, obj_in=item_in)
+    # The id is new, only list pages can be cached without it
+    background_tasks.add_task(edge_cache.queue_invalidation, edge_cache.item_paths([]))
     return item
 
 
 @router.get("", response_model=list[ItemRead])
-def read_items(*, db: Session = Depends(deps.get_session)) -> list[ItemRead]:
-    items = crud.item.get_multi(db=db)
-    return items
+@cache_control(s_maxage=settings.API_EDGE_CACHE_SECONDS)
+def read_items(
+    *,
+    db: Session = Depends(deps.get_session),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    order_by: ItemOrderBy = "created",
+    descending: bool = False,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    page_params = dict(
+        limit=limit, cursor=cursor, order_by=order_by, descending=descending
+    )
+    try:
+        if if_none_match:
+            # Only (id, updated) is read to decide whether the client is current
+            versions, has_more = crud.item.get_page_version(db=db, **page_params)
+            etag = conditional.list_etag(versions, has_more, *page_params.values())
+            if conditional.etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+        page = crud.item.get_page(db=db, **page_params)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    versions = [(item.id, item.updated) for item in page.items]
+    has_more = page.next_cursor is not None
+    headers = {
+        "ETag": conditional.list_etag(versions, has_more, *page_params.values())
+    }
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return json_response(item_list_serializer, page.items, headers=headers)
+
+
+@router.get("/export")
+def export_items(
+    *,
+    db: Session = Depends(deps.get_session),
+    format: export.ExportFormat = "ndjson",
+    cursor: str | None = None,
+) -> Response:
+    """
+    Every item in (created, id) order as NDJSON or CSV. Streams from a server
+    side cursor under uvicorn. Lambda buffers the whole response, so there
+    it returns up to EXPORT_LAMBDA_MAX_ROWS rows and a Next-Cursor header to
+    continue from.
+    """
+    media_type = export.MEDIA_TYPES[format]
+    if not settings.IS_LAMBDA:
+        return StreamingResponse(
+            export.stream_items(format, cursor), media_type=media_type
+        )
+    try:
+        page = crud.item.get_page(
+            db=db, limit=settings.EXPORT_LAMBDA_MAX_ROWS, cursor=cursor
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    body = export.header(format) + export.encode_batch(page.items, format)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@router.post("/import", response_model=ItemImportResult)
+def import_items(
+    *,
+    db: Session = Depends(deps.get_session),
+    body: IO[bytes] = Depends(deps.get_spooled_body),
+    format: imports.ImportFormat = "csv",
+    background_tasks: BackgroundTasks,
+) -> ItemImportResult:
+    """
+    Bulk load a CSV (with a title,description header) or NDJSON request
+    body. Rows are COPYed into a staging table and merged on title, so
+    active items with an imported title have their description updated.
+    """
+    rows = imports.read_rows(body, format)
+    try:
+        result = crud.item.import_rows(db=db, rows=rows)
+    except imports.ImportFileError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if result.inserted or result.updated:
+        background_tasks.add_task(
+            edge_cache.queue_invalidation, [edge_cache.ALL_ITEM_PATHS]
+        )
+    return asdict(result)
+
+
+# Bulk routes are registered before the /{item_id} routes so "bulk" is never
+# parsed as an item id
+@router.post("/bulk", response_model=ItemBulkResult)
+def create_items(
+    *,
+    db: Session = Depends(deps.get_session),
+    items_in: ItemBulkCreateRequest,
+    background_tasks: BackgroundTasks,
+) -> ItemBulkResult:
+    result = crud.item.create_many(db=db, objs_in=items_in.items)
+    if result.items:
+        background_tasks.add_task(
+            edge_cache.queue_invalidation, edge_cache.item_paths([])
+        )
+    return {"items": result.items, "errors": [asdict(e) for e in result.errors]}
+
+
+@router.patch("/bulk", response_model=ItemBulkResult)
+def update_items(
+    *,
+    db: Session = Depends(deps.get_session),
+    items_in: ItemBulkUpdateRequest,
+    background_tasks: BackgroundTasks,
+) -> ItemBulkResult:
+    result = crud.item.update_many(db=db, objs_in=items_in.items)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation,
+        edge_cache.item_paths(item.id for item in result.items),
+    )
+    return {"items": result.items, "errors": [asdict(e) for e in result.errors]}
+
+
+@router.delete("/bulk", response_model=ItemBulkDeleteResult)
+def delete_items(
+    *,
+    db: Session = Depends(deps.get_session),
+    items_in: ItemBulkDeleteRequest,
+    background_tasks: BackgroundTasks,
+) -> ItemBulkDeleteResult:
+    result = crud.item.delete_many(db=db, ids=items_in.ids)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation, edge_cache.item_paths(result.items)
+    )
+    return {"ids": result.items, "errors": [asdict(e) for e in result.errors]}
 
 
 @router.get("/{item_id}", response_model=ItemRead)
+@cache_control(s_maxage=settings.API_EDGE_CACHE_SECONDS)
 def read_item(
-    *, db: Session = Depends(deps.get_session), item_id: uuid.UUID
+    *,
+    db: Session = Depends(deps.get_session),
+    item_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(None),
 ) -> ItemRead:
-    item = crud.item.get(db=db, id=item_id)
+    updated = None
+    if if_none_match:
+        updated = crud.item.get_version(db=db, id=item_id)
+        etag = conditional.item_etag(item_id, updated)
+        if updated is not None and conditional.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    # Saves the cache looking up `updated` again
+    item = crud.item.get(db=db, id=item_id, updated=updated)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    response.headers["ETag"] = conditional.item_etag(item.id, item.updated)
     return item
 
 
 @router.patch("/{item_id}", response_model=ItemRead)
 def update_item(
-    *, db: Session = Depends(deps.get_session), item_id: uuid.UUID, item_in: ItemUpdate
+    *,
+    db: Session = Depends(deps.get_session),
+    item_id: uuid.UUID,
+    item_in: ItemUpdate,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(None),
 ) -> ItemRead:
-    item = crud.item.get(db=db, id=item_id)
-    item = crud.item.update(db=db, db_obj=item, obj_in=item_in)
+    expected_updated = conditional.expected_updated(if_match, item_id)
+    item = crud.item.update_by_id(
+        db=db, id=item_id, obj_in=item_in, expected_updated=expected_updated
+    )
+    if item is None:
+        raise_missing_or_modified(db, item_id, expected_updated)
+    response.headers["ETag"] = conditional.item_etag(item.id, item.updated)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation, edge_cache.item_paths([item.id])
+    )
     return item
 
 
 @router.delete("/{item_id}", status_code=204)
-def delete_item(*, db: Session = Depends(deps.get_session), item_id: uuid.UUID) -> None:
-    crud.item.delete(db=db, id=item_id)
+def delete_item(
+    *,
+    db: Session = Depends(deps.get_session),
+    item_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(None),
+) -> None:
+    expected_updated = conditional.expected_updated(if_match, item_id)
+    deleted_id = crud.item.delete_by_id(
+        db=db, id=item_id, expected_updated=expected_updated
+    )
+    if deleted_id is None:
+        raise_missing_or_modified(db, item_id, expected_updated)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation, edge_cache.item_paths([item_id])
+    )
     return None
+
+
+def raise_missing_or_modified(
+    db: Session, item_id: uuid.UUID, expected_updated: datetime | None
+) -> None:
+    # A conditional write that matched nothing either lost the race to
+    # another writer or targeted an item that does not exist
+    if expected_updated is not None:
+        if crud.item.get_version(db=db, id=item_id) is not None:
+            raise HTTPException(status_code=412, detail="Item has been modified")
+    raise HTTPException(status_code=404, detail="Item not found")
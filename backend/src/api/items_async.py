@@ -0,0 +1,262 @@
+import uuid
+from dataclasses import asdict
+from datetime import datetime
+from typing import IO
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import crud
+from src.crud.base import InvalidCursorError
+from src.models import (
+    ItemBulkCreateRequest,
+    ItemBulkDeleteRequest,
+    ItemBulkDeleteResult,
+    ItemBulkResult,
+    ItemBulkUpdateRequest,
+    ItemCreate,
+    ItemImportResult,
+    ItemRead,
+    ItemUpdate,
+)
+
+from src.api import conditional, deps, export
+from src.api.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, ItemOrderBy
+from src.api.serialization import item_list_serializer, json_response
+from src.utils import edge_cache, imports
+from src.utils.config import settings
+from src.utils.http_cache import cache_control
+
+# Same routes as src.api.items, served on the event loop over asyncpg.
+# Enabled with the DB_ASYNC setting.
+router = APIRouter()
+
+
+@router.post("", response_model=ItemRead, status_code=201)
+async def create_item(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    item_in: ItemCreate,
+    background_tasks: BackgroundTasks,
+) -> ItemRead:
+    item = await crud.item.create_async(db=db, obj_in=item_in)
+    # The id is new, only list pages can be cached without it
+    background_tasks.add_task(edge_cache.queue_invalidation, edge_cache.item_paths([]))
+    return item
+
+
+@router.get("", response_model=list[ItemRead])
+@cache_control(s_maxage=settings.API_EDGE_CACHE_SECONDS)
+async def read_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    order_by: ItemOrderBy = "created",
+    descending: bool = False,
+    if_none_match: str | None = Header(None),
+) -> Response:
+    page_params = dict(
+        limit=limit, cursor=cursor, order_by=order_by, descending=descending
+    )
+    try:
+        if if_none_match:
+            # Only (id, updated) is read to decide whether the client is current
+            versions, has_more = await crud.item.get_page_version_async(
+                db=db, **page_params
+            )
+            etag = conditional.list_etag(versions, has_more, *page_params.values())
+            if conditional.etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+        page = await crud.item.get_page_async(db=db, **page_params)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    versions = [(item.id, item.updated) for item in page.items]
+    has_more = page.next_cursor is not None
+    headers = {
+        "ETag": conditional.list_etag(versions, has_more, *page_params.values())
+    }
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return json_response(item_list_serializer, page.items, headers=headers)
+
+
+@router.get("/export")
+async def export_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    format: export.ExportFormat = "ndjson",
+    cursor: str | None = None,
+) -> Response:
+    """
+    Every item in (created, id) order as NDJSON or CSV. Streams from a server
+    side cursor under uvicorn. Lambda buffers the whole response, so there
+    it returns up to EXPORT_LAMBDA_MAX_ROWS rows and a Next-Cursor header to
+    continue from.
+    """
+    media_type = export.MEDIA_TYPES[format]
+    if not settings.IS_LAMBDA:
+        return StreamingResponse(
+            export.stream_items_async(format, cursor), media_type=media_type
+        )
+    try:
+        page = await crud.item.get_page_async(
+            db=db, limit=settings.EXPORT_LAMBDA_MAX_ROWS, cursor=cursor
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    body = export.header(format) + export.encode_batch(page.items, format)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@router.post("/import", response_model=ItemImportResult)
+async def import_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    body: IO[bytes] = Depends(deps.get_spooled_body),
+    format: imports.ImportFormat = "csv",
+    background_tasks: BackgroundTasks,
+) -> ItemImportResult:
+    rows = imports.read_rows(body, format)
+    try:
+        result = await crud.item.import_rows_async(db=db, rows=rows)
+    except imports.ImportFileError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if result.inserted or result.updated:
+        background_tasks.add_task(
+            edge_cache.queue_invalidation, [edge_cache.ALL_ITEM_PATHS]
+        )
+    return asdict(result)
+
+
+# Bulk routes are registered before the /{item_id} routes so "bulk" is never
+# parsed as an item id
+@router.post("/bulk", response_model=ItemBulkResult)
+async def create_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    items_in: ItemBulkCreateRequest,
+    background_tasks: BackgroundTasks,
+) -> ItemBulkResult:
+    result = await crud.item.create_many_async(db=db, objs_in=items_in.items)
+    if result.items:
+        background_tasks.add_task(
+            edge_cache.queue_invalidation, edge_cache.item_paths([])
+        )
+    return {"items": result.items, "errors": [asdict(e) for e in result.errors]}
+
+
+@router.patch("/bulk", response_model=ItemBulkResult)
+async def update_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    items_in: ItemBulkUpdateRequest,
+    background_tasks: BackgroundTasks,
+) -> ItemBulkResult:
+    result = await crud.item.update_many_async(db=db, objs_in=items_in.items)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation,
+        edge_cache.item_paths(item.id for item in result.items),
+    )
+    return {"items": result.items, "errors": [asdict(e) for e in result.errors]}
+
+
+@router.delete("/bulk", response_model=ItemBulkDeleteResult)
+async def delete_items(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    items_in: ItemBulkDeleteRequest,
+    background_tasks: BackgroundTasks,
+) -> ItemBulkDeleteResult:
+    result = await crud.item.delete_many_async(db=db, ids=items_in.ids)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation, edge_cache.item_paths(result.items)
+    )
+    return {"ids": result.items, "errors": [asdict(e) for e in result.errors]}
+
+
+@router.get("/{item_id}", response_model=ItemRead)
+@cache_control(s_maxage=settings.API_EDGE_CACHE_SECONDS)
+async def read_item(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    item_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(None),
+) -> ItemRead:
+    updated = None
+    if if_none_match:
+        updated = await crud.item.get_version_async(db=db, id=item_id)
+        etag = conditional.item_etag(item_id, updated)
+        if updated is not None and conditional.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    # Saves the cache looking up `updated` again
+    item = await crud.item.get_async(db=db, id=item_id, updated=updated)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    response.headers["ETag"] = conditional.item_etag(item.id, item.updated)
+    return item
+
+
+@router.patch("/{item_id}", response_model=ItemRead)
+async def update_item(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    item_id: uuid.UUID,
+    item_in: ItemUpdate,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(None),
+) -> ItemRead:
+    expected_updated = conditional.expected_updated(if_match, item_id)
+    item = await crud.item.update_by_id_async(
+        db=db, id=item_id, obj_in=item_in, expected_updated=expected_updated
+    )
+    if item is None:
+        await raise_missing_or_modified(db, item_id, expected_updated)
+    response.headers["ETag"] = conditional.item_etag(item.id, item.updated)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation, edge_cache.item_paths([item.id])
+    )
+    return item
+
+
+@router.delete("/{item_id}", status_code=204)
+async def delete_item(
+    *,
+    db: AsyncSession = Depends(deps.get_async_session),
+    item_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(None),
+) -> None:
+    expected_updated = conditional.expected_updated(if_match, item_id)
+    deleted_id = await crud.item.delete_by_id_async(
+        db=db, id=item_id, expected_updated=expected_updated
+    )
+    if deleted_id is None:
+        await raise_missing_or_modified(db, item_id, expected_updated)
+    background_tasks.add_task(
+        edge_cache.queue_invalidation, edge_cache.item_paths([item_id])
+    )
+    return None
+
+
+async def raise_missing_or_modified(
+    db: AsyncSession, item_id: uuid.UUID, expected_updated: datetime | None
+) -> None:
+    # A conditional write that matched nothing either lost the race to
+    # another writer or targeted an item that does not exist
+    if expected_updated is not None:
+        if await crud.item.get_version_async(db=db, id=item_id) is not None:
+            raise HTTPException(status_code=412, detail="Item has been modified")
+    raise HTTPException(status_code=404, detail="Item not found")
@@ -0,0 +1,9 @@
+from typing import Literal
+
+# Clients pass this back as ?cursor= to fetch the next page
+NEXT_CURSOR_HEADER = "Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+# Only orderings backed by an index (ix_item_created_id and
+# ix_item_title_id) so every page is an index seek
+ItemOrderBy = Literal["created", "title"]
@@ -1,29 +1,513 @@
+import base64
+import json
 import uuid
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from datetime import datetime
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
-from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import any_, bindparam, cast, column, delete, tuple_, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import select, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from src.utils.cache import Cache
+from src.utils.exception_handling import integrity_error_detail
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=SQLModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=SQLModel)
 
 
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass
+class Page(Generic[ModelType]):
+    items: List[ModelType]
+    # Opaque token for the page after this one, None on the last page
+    next_cursor: Optional[str]
+
+
+@dataclass
+class BulkError:
+    # Position of the failed row in the request
+    index: int
+    detail: str
+
+
+@dataclass
+class BulkResult(Generic[ModelType]):
+    items: List[Any] = field(default_factory=list)
+    errors: List[BulkError] = field(default_factory=list)
+
+
+# Keeps each multi-row statement well under postgres' 65535 bind parameter
+# limit
+BULK_CHUNK_SIZE = 1000
+
+NOT_FOUND = "Not found"
+
+
+def _chunks(rows: Sequence[Any]) -> Iterator[tuple[int, Sequence[Any]]]:
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        yield start, rows[start : start + BULK_CHUNK_SIZE]
+
+
+@lru_cache
+def _type_adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        *,
+        soft_delete: bool = False,
+        cache: Optional[Cache] = None,
+    ):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
 
+        Each method has an `_async` twin taking an AsyncSession. Both share
+        the statement and object building below so they can't drift apart.
+
         **Parameters**
 
         * `model`: A SQLAlchemy model class
         * `schema`: A Pydantic model (schema) class
+        * `soft_delete`: deletes set `is_active` to False instead of removing
+          the row, and every read and update leaves inactive rows out
+        * `cache`: optional read-through cache for get, get_multi and
+          get_page. Rows are cached under their `updated` timestamp, so a
+          write from anywhere makes the old entry unreachable. List pages
+          are invalidated by writes through this object only.
         """
         self.model = model
+        self.soft_delete = soft_delete
+        self.cache = cache
+
+    def _visible(self, statement):
+        """Soft deleted rows are left out, as if they had been deleted"""
+        if self.soft_delete:
+            return statement.where(self.model.is_active.is_(True))
+        return statement
+
+    def _get_statement(
+        self, id: uuid.UUID, expected_updated: Optional[datetime] = None
+    ) -> SelectOfScalar[ModelType]:
+        statement = self._visible(select(self.model).where(self.model.id == id))
+        if expected_updated is not None:
+            statement = statement.where(self.model.updated == expected_updated)
+        return statement
+
+    def _version_statement(self, id: uuid.UUID):
+        return self._visible(select(self.model.updated).where(self.model.id == id))
+
+    def _page_version_statement(
+        self,
+        *,
+        limit: int,
+        cursor: Optional[str],
+        order_by: str,
+        descending: bool,
+    ):
+        """(id, updated) for exactly the rows get_page would return"""
+        statement = self._get_page_statement(
+            limit=limit, cursor=cursor, order_by=order_by, descending=descending
+        )
+        return statement.with_only_columns(self.model.id, self.model.updated)
+
+    def _stream_statement(
+        self, *, cursor: Optional[str], batch_size: int
+    ) -> SelectOfScalar[ModelType]:
+        statement = self._get_page_statement(
+            limit=0, cursor=cursor, order_by="created", descending=False
+        ).limit(None)
+        # yield_per makes the driver use a server side cursor and hand rows
+        # over batch_size at a time instead of buffering the whole result
+        return statement.execution_options(yield_per=batch_size)
+
+    def _get_multi_statement(
+        self, *, skip: int, limit: int, order_by: str
+    ) -> SelectOfScalar[ModelType]:
+        statement = self._visible(select(self.model))
+        if order_by in self.model.model_fields:
+            statement = statement.order_by(getattr(self.model, order_by))
+        return statement.offset(skip).limit(limit)
+
+    def _encode_cursor(
+        self, db_obj: ModelType, *, order_by: str, descending: bool
+    ) -> str:
+        annotation = self.model.model_fields[order_by].annotation
+        value = _type_adapter(annotation).dump_python(
+            getattr(db_obj, order_by), mode="json"
+        )
+        payload = json.dumps([order_by, descending, value, str(db_obj.id)])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def _decode_cursor(
+        self, cursor: str, *, order_by: str, descending: bool
+    ) -> tuple[Any, uuid.UUID]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            cursor_order_by, cursor_descending, value, last_id = payload
+            annotation = self.model.model_fields[order_by].annotation
+            value = _type_adapter(annotation).validate_python(value)
+            last_id = uuid.UUID(last_id)
+        except (ValueError, TypeError) as exc:
+            raise InvalidCursorError("Invalid cursor") from exc
+        if (cursor_order_by, cursor_descending) != (order_by, descending):
+            raise InvalidCursorError("Cursor was issued for a different ordering")
+        return value, last_id
+
+    def _get_page_statement(
+        self,
+        *,
+        limit: int,
+        cursor: Optional[str],
+        order_by: str,
+        descending: bool,
+    ) -> SelectOfScalar[ModelType]:
+        if order_by not in self.model.model_fields:
+            raise ValueError(f"Can not order {self.model.__name__} by {order_by}")
+        # id breaks ties so rows sharing an order_by value are never skipped
+        key = (getattr(self.model, order_by), self.model.id)
+        statement = self._visible(select(self.model))
+        if cursor is not None:
+            bound = tuple_(
+                *self._decode_cursor(cursor, order_by=order_by, descending=descending)
+            )
+            # Row comparison lets postgres seek straight to the cursor in the
+            # composite index rather than walking past every earlier row
+            statement = statement.where(
+                tuple_(*key) < bound if descending else tuple_(*key) > bound
+            )
+        order = [column.desc() if descending else column.asc() for column in key]
+        # One extra row tells us whether there is a next page
+        return statement.order_by(*order).limit(limit + 1)
+
+    def _build_page(
+        self, rows: List[ModelType], *, limit: int, order_by: str, descending: bool
+    ) -> Page[ModelType]:
+        if len(rows) <= limit:
+            return Page(items=rows, next_cursor=None)
+        items = rows[:limit]
+        next_cursor = self._encode_cursor(
+            items[-1], order_by=order_by, descending=descending
+        )
+        return Page(items=items, next_cursor=next_cursor)
+
+    def _build_db_obj(self, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = obj_in.model_dump(exclude_unset=False)
+        return self.model(**obj_in_data)  # type: ignore
+
+    @staticmethod
+    def _apply_update(
+        db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        obj_data = db_obj.model_dump(exclude_unset=False)
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump()
+        for field in obj_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+        return db_obj
+
+    def _update_by_id_statement(
+        self,
+        id: uuid.UUID,
+        update_data: Dict[str, Any],
+        expected_updated: Optional[datetime] = None,
+    ):
+        statement = self._visible(update(self.model).where(self.model.id == id))
+        if expected_updated is not None:
+            statement = statement.where(self.model.updated == expected_updated)
+        return (
+            statement.values(update_data)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _delete_by_id_statement(
+        self, id: uuid.UUID, expected_updated: Optional[datetime] = None
+    ):
+        statement = self._delete_statement().where(self.model.id == id)
+        if expected_updated is not None:
+            statement = statement.where(self.model.updated == expected_updated)
+        return statement.returning(self.model.id).execution_options(
+            synchronize_session=False
+        )
+
+    def _delete_statement(self):
+        if self.soft_delete:
+            # Already inactive rows count as not found, same as a hard delete
+            return self._visible(update(self.model)).values(is_active=False)
+        return delete(self.model)
+
+    def _update_data(
+        self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+        table = self.model.__table__
+        return {key: value for key, value in data.items() if key in table.c}
+
+    def _insert_rows(self, objs_in: Sequence[CreateSchemaType]) -> List[dict]:
+        table = self.model.__table__
+        rows = []
+        for obj_in in objs_in:
+            data = self._build_db_obj(obj_in).model_dump(exclude_unset=False)
+            # Leave server defaults (created, updated) to the db
+            rows.append(
+                {
+                    key: value
+                    for key, value in data.items()
+                    if value is not None or table.c[key].server_default is None
+                }
+            )
+        return rows
+
+    def _create_many_statement(self, rows: Sequence[dict]):
+        # Rows that hit a unique constraint are skipped rather than failing
+        # the whole statement, and are reported back as errors
+        return (
+            insert(self.model)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(self.model)
+        )
+
+    def _collect_created(
+        self,
+        result: BulkResult,
+        start: int,
+        rows: Sequence[dict],
+        created: Sequence[ModelType],
+    ) -> None:
+        created_by_id = {db_obj.id: db_obj for db_obj in created}
+        table = self.model.__table__
+        unique_columns = [c.name for c in table.columns if c.unique] + [
+            c.name for index in table.indexes if index.unique for c in index.columns
+        ]
+        conflict = (
+            f"Conflicts with an existing {self.model.__tablename__} on "
+            f"{', '.join(unique_columns or ['id'])}"
+        )
+        for offset, row in enumerate(rows):
+            db_obj = created_by_id.get(row["id"])
+            if db_obj is None:
+                result.errors.append(BulkError(index=start + offset, detail=conflict))
+            else:
+                result.items.append(db_obj)
+
+    def _update_groups(
+        self, objs_in: Sequence[Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> tuple[Dict[tuple[str, ...], List[tuple[int, dict]]], List[BulkError]]:
+        """
+        Group rows by the set of columns they change so each group can be
+        applied with a single UPDATE ... FROM (VALUES ...)
+        """
+        table = self.model.__table__
+        groups: Dict[tuple[str, ...], List[tuple[int, dict]]] = {}
+        errors = []
+        for index, obj_in in enumerate(objs_in):
+            data = dict(obj_in) if isinstance(obj_in, dict) else obj_in.model_dump()
+            id = data.pop("id")
+            fields = tuple(sorted(key for key in data if key in table.c))
+            if not fields:
+                errors.append(BulkError(index=index, detail="No fields to update"))
+                continue
+            row = {"id": id, **{key: data[key] for key in fields}}
+            groups.setdefault(fields, []).append((index, row))
+        return groups, errors
+
+    def _update_many_statement(self, fields: tuple[str, ...], rows: Sequence[dict]):
+        table = self.model.__table__
+        names = ("id",) + fields
+        data = values(
+            *[column(name, table.c[name].type) for name in names], name="data"
+        ).data([tuple(row[name] for name in names) for row in rows])
+        return (
+            self._visible(update(self.model))
+            .where(self.model.id == cast(data.c.id, table.c.id.type))
+            .values({name: cast(data.c[name], table.c[name].type) for name in fields})
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _collect_updated(
+        result: BulkResult,
+        group: Sequence[tuple[int, dict]],
+        updated: Sequence[ModelType],
+    ) -> None:
+        updated_by_id = {db_obj.id: db_obj for db_obj in updated}
+        for index, row in group:
+            db_obj = updated_by_id.get(row["id"])
+            if db_obj is None:
+                result.errors.append(BulkError(index=index, detail=NOT_FOUND))
+            else:
+                result.items.append(db_obj)
+
+    def _delete_many_statement(self, ids: Sequence[uuid.UUID]):
+        ids_param = bindparam("ids", list(ids), ARRAY(self.model.__table__.c.id.type))
+        return (
+            self._delete_statement()
+            .where(self.model.id == any_(ids_param))
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _collect_deleted(
+        ids: Sequence[uuid.UUID], deleted: Sequence[uuid.UUID]
+    ) -> BulkResult:
+        deleted_ids = set(deleted)
+        result = BulkResult()
+        for index, id in enumerate(ids):
+            if id in deleted_ids:
+                result.items.append(id)
+            else:
+                result.errors.append(BulkError(index=index, detail=NOT_FOUND))
+        return result
+
+    def _item_key(self, id: uuid.UUID, updated: datetime) -> str:
+        return f"{self.model.__tablename__}:{id}:{updated.isoformat()}"
+
+    def _version_key(self) -> str:
+        return f"{self.model.__tablename__}:version"
+
+    def _list_key(self, *params: Any) -> str:
+        """
+        List entries live under a version that every write replaces, so one
+        write invalidates every cached page at once
+        """
+        # Not counted, every list read would otherwise add a hit or miss
+        version = self.cache.peek(self._version_key())
+        if version is None:
+            # A missing version always starts a fresh namespace, so pages
+            # cached before the version was evicted can never be served
+            version = uuid.uuid4().hex.encode()
+            self.cache.set(self._version_key(), version, ttl=0)
+        params_key = ":".join(str(param) for param in params)
+        return f"{self.model.__tablename__}:list:{version.decode()}:{params_key}"
+
+    @staticmethod
+    def _dump(db_obj: ModelType) -> dict:
+        return db_obj.model_dump(mode="json", exclude_unset=False)
+
+    def _load(self, data: dict) -> ModelType:
+        db_obj = self.model.model_validate(data)
+        # Give it an identity so sessions treat it as an existing row
+        make_transient_to_detached(db_obj)
+        return db_obj
 
-    def get(self, db: Session, id: uuid.UUID) -> Optional[ModelType]:
-        statement = select(self.model).where(self.model.id == id)
-        return db.exec(statement).one()
+    def _cached_obj(self, id: uuid.UUID, updated: datetime) -> Optional[ModelType]:
+        cached = self.cache.get(self._item_key(id, updated))
+        return None if cached is None else self._load(json.loads(cached))
+
+    def _cache_obj(self, db_obj: ModelType) -> None:
+        if self.cache is not None:
+            value = json.dumps(self._dump(db_obj)).encode()
+            self.cache.set(self._item_key(db_obj.id, db_obj.updated), value)
+
+    def _cached_page(self, key: Optional[str]) -> Optional[Page[ModelType]]:
+        cached = None if key is None else self.cache.get(key)
+        if cached is None:
+            return None
+        data = json.loads(cached)
+        items = [self._load(item) for item in data["items"]]
+        return Page(items=items, next_cursor=data["next_cursor"])
+
+    def _cache_page(self, key: Optional[str], page: Page[ModelType]) -> None:
+        if key is not None:
+            data = {
+                "items": [self._dump(db_obj) for db_obj in page.items],
+                "next_cursor": page.next_cursor,
+            }
+            self.cache.set(key, json.dumps(data).encode())
+
+    def _invalidate(self, *, written: Sequence[ModelType] = ()) -> None:
+        if self.cache is None:
+            return
+        # Written rows go straight back in under their new `updated`, so the
+        # next read is still a hit. Entries for the old versions, and for
+        # deleted rows, are never looked up again and age out.
+        for db_obj in written:
+            if not (self.soft_delete and not db_obj.is_active):
+                self._cache_obj(db_obj)
+        # The new list version is the latest `updated` among the written
+        # rows, plus a random suffix as two writes can share a timestamp
+        updated = [
+            db_obj.updated.isoformat()
+            for db_obj in written
+            if getattr(db_obj, "updated", None) is not None
+        ]
+        version = f"{max(updated, default='')}-{uuid.uuid4().hex[:8]}"
+        self.cache.set(self._version_key(), version.encode(), ttl=0)
+
+    def get(
+        self, db: Session, id: uuid.UUID, updated: Optional[datetime] = None
+    ) -> Optional[ModelType]:
+        """
+        With a cache, the row's `updated` is read first to find its entry.
+        Pass `updated` if it was just read, to skip that query.
+        """
+        if self.cache is not None:
+            updated = updated or self.get_version(db, id=id)
+            if updated is None:
+                return None
+            cached = self._cached_obj(id, updated)
+            if cached is not None:
+                return db.merge(cached, load=False)
+        db_obj = db.exec(self._get_statement(id)).one_or_none()
+        if db_obj is not None:
+            self._cache_obj(db_obj)
+        return db_obj
+
+    def get_version(self, db: Session, *, id: uuid.UUID) -> Optional[datetime]:
+        """The row's `updated` without loading the row, None if it is missing"""
+        return db.exec(self._version_statement(id)).first()
+
+    def get_page_version(
+        self,
+        db: Session,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: str = "created",
+        descending: bool = False,
+    ) -> tuple[List[tuple[uuid.UUID, Optional[datetime]]], bool]:
+        """
+        (id, updated) of the rows on a page and whether there is a next page,
+        enough to tell if the page changed without loading it
+        """
+        statement = self._page_version_statement(
+            limit=limit, cursor=cursor, order_by=order_by, descending=descending
+        )
+        # execute rather than exec, which would only return the first column
+        rows = db.execute(statement).all()
+        return [tuple(row) for row in rows[:limit]], len(rows) > limit
 
     def get_multi(
         self,
@@ -31,19 +515,69 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         *,
         skip: int = 0,
         limit: int = 100,
+        order_by: str = "created",
     ) -> List[ModelType]:
-        # TODO Update so order_by can be passed in
-        statement = select(self.model).offset(skip).limit(limit)
-        if "created" in self.model.model_fields:
-            statement = statement.order_by(self.model.created)
-        return db.exec(statement).all()
+        key = self._list_key("multi", skip, limit, order_by) if self.cache else None
+        cached = self._cached_page(key)
+        if cached is not None:
+            return cached.items
+        statement = self._get_multi_statement(
+            skip=skip, limit=limit, order_by=order_by
+        )
+        items = db.exec(statement).all()
+        self._cache_page(key, Page(items=items, next_cursor=None))
+        return items
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: str = "created",
+        descending: bool = False,
+    ) -> Page[ModelType]:
+        """
+        Keyset pagination on (order_by, id). Unlike get_multi the cost of a
+        page does not grow with how deep into the table it is.
+        """
+        key = (
+            self._list_key("page", limit, cursor, order_by, descending)
+            if self.cache
+            else None
+        )
+        cached = self._cached_page(key)
+        if cached is not None:
+            return cached
+        statement = self._get_page_statement(
+            limit=limit, cursor=cursor, order_by=order_by, descending=descending
+        )
+        rows = db.exec(statement).all()
+        page = self._build_page(
+            rows, limit=limit, order_by=order_by, descending=descending
+        )
+        self._cache_page(key, page)
+        return page
+
+    def stream(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Sequence[ModelType]]:
+        """
+        Every row in (created, id) order, in batches, in constant memory.
+        Bypasses the cache.
+        """
+        statement = self._stream_statement(cursor=cursor, batch_size=batch_size)
+        yield from db.exec(statement).partitions()
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
+        db_obj = self._build_db_obj(obj_in)
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
+        self._invalidate(written=[db_obj])
         return db_obj
 
     def update(
@@ -53,22 +587,335 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
-        obj_data = db_obj.model_dump(exclude_unset=False)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.model_dump()
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        db_obj = self._apply_update(db_obj, obj_in)
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
+        self._invalidate(written=[db_obj])
         return db_obj
 
     def delete(self, db: Session, *, id: uuid.UUID) -> ModelType:
-        statement = select(self.model).where(self.model.id == id)
-        obj = db.exec(statement).one()
-        db.delete(obj)
+        obj = db.exec(self._get_statement(id)).one()
+        if self.soft_delete:
+            obj.is_active = False
+        else:
+            db.delete(obj)
+        db.commit()
+        self._invalidate()
+        return obj
+
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[CreateSchemaType]
+    ) -> BulkResult[ModelType]:
+        """
+        Insert many rows with multi-row INSERT ... RETURNING in a single
+        transaction. Conflicting rows are reported in `errors` instead of
+        aborting the batch.
+        """
+        result = BulkResult()
+        for start, rows in _chunks(self._insert_rows(objs_in)):
+            created = db.scalars(self._create_many_statement(rows)).all()
+            self._collect_created(result, start, rows, created)
+        db.commit()
+        self._invalidate(written=result.items)
+        return result
+
+    def update_by_id(
+        self,
+        db: Session,
+        *,
+        id: uuid.UUID,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        expected_updated: Optional[datetime] = None,
+    ) -> Optional[ModelType]:
+        """
+        UPDATE ... SET <set fields> WHERE id = :id RETURNING * without loading
+        the row first. Returns None if there is no row with that id, or if
+        `expected_updated` is given and the row has changed since.
+        """
+        update_data = self._update_data(obj_in)
+        if not update_data:
+            statement = self._get_statement(id, expected_updated)
+            return db.exec(statement).one_or_none()
+        statement = self._update_by_id_statement(id, update_data, expected_updated)
+        db_obj = db.scalars(statement).one_or_none()
         db.commit()
+        if db_obj is not None:
+            self._invalidate(written=[db_obj])
+        return db_obj
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[UpdateSchemaType, Dict[str, Any]]],
+    ) -> BulkResult[ModelType]:
+        """
+        Each obj_in must include the `id` of the row to update. Unset fields
+        are left alone.
+        """
+        groups, errors = self._update_groups(objs_in)
+        result = BulkResult(errors=errors)
+        for fields, group in groups.items():
+            for _, chunk in _chunks(group):
+                try:
+                    with db.begin_nested():
+                        rows = [row for _, row in chunk]
+                        updated = db.scalars(
+                            self._update_many_statement(fields, rows)
+                        ).all()
+                    self._collect_updated(result, chunk, updated)
+                except IntegrityError:
+                    # Only pay for row at a time updates when the set based
+                    # one fails, to find out which rows are at fault
+                    for index, row in chunk:
+                        try:
+                            with db.begin_nested():
+                                updated = db.scalars(
+                                    self._update_many_statement(fields, [row])
+                                ).all()
+                            self._collect_updated(result, [(index, row)], updated)
+                        except IntegrityError as exc:
+                            detail = integrity_error_detail(exc)
+                            result.errors.append(BulkError(index=index, detail=detail))
+        db.commit()
+        self._invalidate(written=result.items)
+        result.errors.sort(key=lambda error: error.index)
+        return result
+
+    def delete_by_id(
+        self,
+        db: Session,
+        *,
+        id: uuid.UUID,
+        expected_updated: Optional[datetime] = None,
+    ) -> Optional[uuid.UUID]:
+        """
+        Delete (or soft delete) in a single statement without loading the
+        row. Returns None if there was nothing to delete.
+        """
+        statement = self._delete_by_id_statement(id, expected_updated)
+        deleted_id = db.scalars(statement).one_or_none()
+        db.commit()
+        if deleted_id is not None:
+            self._invalidate()
+        return deleted_id
+
+    def delete_many(
+        self, db: Session, *, ids: Sequence[uuid.UUID]
+    ) -> BulkResult[uuid.UUID]:
+        deleted = db.scalars(self._delete_many_statement(ids)).all()
+        db.commit()
+        self._invalidate()
+        return self._collect_deleted(ids, deleted)
+
+    async def get_async(
+        self, db: AsyncSession, id: uuid.UUID, updated: Optional[datetime] = None
+    ) -> Optional[ModelType]:
+        if self.cache is not None:
+            updated = updated or await self.get_version_async(db, id=id)
+            if updated is None:
+                return None
+            cached = self._cached_obj(id, updated)
+            if cached is not None:
+                return await db.merge(cached, load=False)
+        db_obj = (await db.exec(self._get_statement(id))).one_or_none()
+        if db_obj is not None:
+            self._cache_obj(db_obj)
+        return db_obj
+
+    async def get_version_async(
+        self, db: AsyncSession, *, id: uuid.UUID
+    ) -> Optional[datetime]:
+        return (await db.exec(self._version_statement(id))).first()
+
+    async def get_page_version_async(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: str = "created",
+        descending: bool = False,
+    ) -> tuple[List[tuple[uuid.UUID, Optional[datetime]]], bool]:
+        statement = self._page_version_statement(
+            limit=limit, cursor=cursor, order_by=order_by, descending=descending
+        )
+        rows = (await db.execute(statement)).all()
+        return [tuple(row) for row in rows[:limit]], len(rows) > limit
+
+    async def get_multi_async(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: str = "created",
+    ) -> List[ModelType]:
+        key = self._list_key("multi", skip, limit, order_by) if self.cache else None
+        cached = self._cached_page(key)
+        if cached is not None:
+            return cached.items
+        statement = self._get_multi_statement(
+            skip=skip, limit=limit, order_by=order_by
+        )
+        items = (await db.exec(statement)).all()
+        self._cache_page(key, Page(items=items, next_cursor=None))
+        return items
+
+    async def get_page_async(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order_by: str = "created",
+        descending: bool = False,
+    ) -> Page[ModelType]:
+        key = (
+            self._list_key("page", limit, cursor, order_by, descending)
+            if self.cache
+            else None
+        )
+        cached = self._cached_page(key)
+        if cached is not None:
+            return cached
+        statement = self._get_page_statement(
+            limit=limit, cursor=cursor, order_by=order_by, descending=descending
+        )
+        rows = (await db.exec(statement)).all()
+        page = self._build_page(
+            rows, limit=limit, order_by=order_by, descending=descending
+        )
+        self._cache_page(key, page)
+        return page
+
+    async def stream_async(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[ModelType]]:
+        statement = self._stream_statement(cursor=cursor, batch_size=batch_size)
+        result = await db.stream_scalars(statement)
+        async for partition in result.partitions():
+            yield partition
+
+    async def create_async(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType
+    ) -> ModelType:
+        db_obj = self._build_db_obj(obj_in)
+        db.add(db_obj)
+        await db.commit()
+        self._invalidate(written=[db_obj])
+        return db_obj
+
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> ModelType:
+        db_obj = self._apply_update(db_obj, obj_in)
+        db.add(db_obj)
+        await db.commit()
+        self._invalidate(written=[db_obj])
+        return db_obj
+
+    async def delete_async(self, db: AsyncSession, *, id: uuid.UUID) -> ModelType:
+        obj = (await db.exec(self._get_statement(id))).one()
+        if self.soft_delete:
+            obj.is_active = False
+        else:
+            await db.delete(obj)
+        await db.commit()
+        self._invalidate()
         return obj
+
+    async def create_many_async(
+        self, db: AsyncSession, *, objs_in: Sequence[CreateSchemaType]
+    ) -> BulkResult[ModelType]:
+        result = BulkResult()
+        for start, rows in _chunks(self._insert_rows(objs_in)):
+            created = (await db.scalars(self._create_many_statement(rows))).all()
+            self._collect_created(result, start, rows, created)
+        await db.commit()
+        self._invalidate(written=result.items)
+        return result
+
+    async def update_by_id_async(
+        self,
+        db: AsyncSession,
+        *,
+        id: uuid.UUID,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        expected_updated: Optional[datetime] = None,
+    ) -> Optional[ModelType]:
+        update_data = self._update_data(obj_in)
+        if not update_data:
+            statement = self._get_statement(id, expected_updated)
+            return (await db.exec(statement)).one_or_none()
+        statement = self._update_by_id_statement(id, update_data, expected_updated)
+        db_obj = (await db.scalars(statement)).one_or_none()
+        await db.commit()
+        if db_obj is not None:
+            self._invalidate(written=[db_obj])
+        return db_obj
+
+    async def update_many_async(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[UpdateSchemaType, Dict[str, Any]]],
+    ) -> BulkResult[ModelType]:
+        groups, errors = self._update_groups(objs_in)
+        result = BulkResult(errors=errors)
+        for fields, group in groups.items():
+            for _, chunk in _chunks(group):
+                try:
+                    async with db.begin_nested():
+                        rows = [row for _, row in chunk]
+                        updated = (
+                            await db.scalars(self._update_many_statement(fields, rows))
+                        ).all()
+                    self._collect_updated(result, chunk, updated)
+                except IntegrityError:
+                    for index, row in chunk:
+                        try:
+                            async with db.begin_nested():
+                                updated = (
+                                    await db.scalars(
+                                        self._update_many_statement(fields, [row])
+                                    )
+                                ).all()
+                            self._collect_updated(result, [(index, row)], updated)
+                        except IntegrityError as exc:
+                            detail = integrity_error_detail(exc)
+                            result.errors.append(BulkError(index=index, detail=detail))
+        await db.commit()
+        self._invalidate(written=result.items)
+        result.errors.sort(key=lambda error: error.index)
+        return result
+
+    async def delete_by_id_async(
+        self,
+        db: AsyncSession,
+        *,
+        id: uuid.UUID,
+        expected_updated: Optional[datetime] = None,
+    ) -> Optional[uuid.UUID]:
+        statement = self._delete_by_id_statement(id, expected_updated)
+        deleted_id = (await db.scalars(statement)).one_or_none()
+        await db.commit()
+        if deleted_id is not None:
+            self._invalidate()
+        return deleted_id
+
+    async def delete_many_async(
+        self, db: AsyncSession, *, ids: Sequence[uuid.UUID]
+    ) -> BulkResult[uuid.UUID]:
+        deleted = (await db.scalars(self._delete_many_statement(ids))).all()
+        await db.commit()
+        self._invalidate()
+        return self._collect_deleted(ids, deleted)
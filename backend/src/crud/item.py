@@ -1,9 +1,178 @@
-from src.crud.base import CRUDBase
+import csv
+import io
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.crud.base import BulkError, CRUDBase, _type_adapter
 from src.models import Item, ItemCreate, ItemUpdate
+from src.utils.cache import cache
+from src.utils.config import settings
+
+# Rows validated and copied to the staging table at a time
+IMPORT_BATCH_SIZE = 10_000
+# Only the first errors are reported, an import of a bad file would
+# otherwise return one per row
+MAX_IMPORT_ERRORS = 1000
+
+STAGING_TABLE = "item_import"
+STAGING_COLUMNS = ("line", "title", "description")
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[BulkError] = field(default_factory=list)
+
+    def reject(self, index: int, detail: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append(BulkError(index=index, detail=detail))
+
+
+def _batches(rows: Iterable[Any]) -> Iterator[tuple[int, list[Any]]]:
+    rows = iter(rows)
+    start = 0
+    while batch := list(islice(rows, IMPORT_BATCH_SIZE)):
+        yield start, batch
+        start += len(batch)
 
 
 class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
-    pass
+    def _validate_batch(
+        self, result: ImportResult, start: int, rows: list[Any]
+    ) -> list[tuple[int, str, str]]:
+        """
+        Validate a whole batch against ItemCreate in one pydantic-core call.
+        Rows that fail are rejected and the rest validated again.
+        """
+        adapter = _type_adapter(List[ItemCreate])
+        try:
+            valid = adapter.validate_python(rows)
+            return [
+                (start + i, obj.title, obj.description) for i, obj in enumerate(valid)
+            ]
+        except ValidationError as exc:
+            failed: dict[int, str] = {}
+            for error in exc.errors():
+                index = error["loc"][0]
+                field_name = ".".join(str(loc) for loc in error["loc"][1:])
+                detail = f"{field_name}: {error['msg']}" if field_name else error["msg"]
+                failed.setdefault(index, detail)
+            for index, detail in sorted(failed.items()):
+                result.reject(start + index, detail)
+            indexes = [i for i in range(len(rows)) if i not in failed]
+            valid = adapter.validate_python([rows[i] for i in indexes])
+            return [
+                (start + i, obj.title, obj.description)
+                for i, obj in zip(indexes, valid)
+            ]
+
+    @staticmethod
+    def _staging_statement():
+        return text(
+            f"CREATE TEMP TABLE {STAGING_TABLE} "
+            "(line bigint, title text, description text) ON COMMIT DROP"
+        )
+
+    @staticmethod
+    def _duplicates_statement():
+        # Only the last row for a title is merged
+        return text(
+            f"""
+            SELECT line FROM (
+                SELECT line,
+                       row_number() OVER (
+                           PARTITION BY title ORDER BY line DESC
+                       ) AS position
+                FROM {STAGING_TABLE}
+            ) AS ranked
+            WHERE position > 1
+            ORDER BY line
+            """
+        )
+
+    def _merge_statement(self):
+        # xmax is only set on rows ON CONFLICT updated. Titles are unique
+        # among active items only, so a soft deleted title gets a new item.
+        return text(
+            f"""
+            WITH merged AS (
+                INSERT INTO item (id, title, description, is_active)
+                SELECT DISTINCT ON (title)
+                       gen_random_uuid(), title, description, true
+                FROM {STAGING_TABLE}
+                ORDER BY title, line DESC
+                ON CONFLICT (title) WHERE is_active DO UPDATE
+                SET description = EXCLUDED.description, updated = now()
+                RETURNING id, xmax = 0 AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted),
+                   count(*) FILTER (WHERE NOT inserted)
+            FROM merged
+            """
+        )
+
+    def _merge_result(self, result: ImportResult, duplicates, merged) -> None:
+        for line in duplicates:
+            result.reject(line, "Title repeated later in the upload")
+        result.errors.sort(key=lambda error: error.index)
+        result.inserted, result.updated = merged
+        # Updated rows have a new `updated`, so only list pages are stale
+        self._invalidate()
+
+    def import_rows(self, db: Session, *, rows: Iterable[Any]) -> ImportResult:
+        """
+        Validate rows in batches, COPY them into a temporary staging table
+        and merge that into item in one INSERT ... ON CONFLICT (title). Rows
+        whose title exists update its description. Runs in a single
+        transaction.
+        """
+        result = ImportResult()
+        db.execute(self._staging_statement())
+        cursor = db.connection().connection.driver_connection.cursor()
+        copy_sql = (
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+        for start, batch in _batches(rows):
+            buffer = io.StringIO()
+            # Quoted so empty strings aren't read back as NULL
+            writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+            writer.writerows(self._validate_batch(result, start, batch))
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        duplicates = db.scalars(self._duplicates_statement()).all()
+        merged = db.execute(self._merge_statement()).one()
+        db.commit()
+        self._merge_result(result, duplicates, merged)
+        return result
+
+    async def import_rows_async(
+        self, db: AsyncSession, *, rows: Iterable[Any]
+    ) -> ImportResult:
+        result = ImportResult()
+        await db.execute(self._staging_statement())
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        for start, batch in _batches(rows):
+            await raw.driver_connection.copy_records_to_table(
+                STAGING_TABLE,
+                records=self._validate_batch(result, start, batch),
+                columns=STAGING_COLUMNS,
+            )
+        duplicates = (await db.scalars(self._duplicates_statement())).all()
+        merged = (await db.execute(self._merge_statement())).one()
+        await db.commit()
+        self._merge_result(result, duplicates, merged)
+        return result
 
 
-item = CRUDItem(Item)
+item = CRUDItem(Item, soft_delete=settings.ITEM_SOFT_DELETE, cache=cache)
@@ -1,17 +1,66 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError, ResponseValidationError
 from starlette.middleware.cors import CORSMiddleware
-from starlette.requests import Request
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, OperationalError
 
 from src.api import api_router
-from src.utils import service_logging
+from src.api.pagination import NEXT_CURSOR_HEADER
+from src.models.session import async_engine, engine, pool_metrics
+from src.utils import edge_cache, service_logging
+from src.utils.cache import cache_metrics
+from src.utils.config import settings
 from src.utils.exception_handling import (
     validation_exception_handler,
     integrity_error_handler,
 )
+from src.utils.middleware import REQUEST_ID_HEADER, RequestContextMiddleware
+
+
+def log_metrics() -> None:
+    """Per container counters, logged at shutdown and periodically on Lambda"""
+    service_logging.logger.info(
+        {"log_type": "db_pool_metrics", **pool_metrics.snapshot()}
+    )
+    service_logging.logger.info(
+        {"log_type": "cache_metrics", **cache_metrics.snapshot()}
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the first pooled connection up front so it is paid for during
+    # startup (Lambda's init phase) instead of on the first request
+    try:
+        if async_engine is not None:
+            # The sync engine was only needed for the migration check
+            engine.dispose()
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        else:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+    except (OperationalError, OSError):
+        service_logging.logger.exception({"log_type": "db_warm_up_failed"})
+    yield
+    log_metrics()
+    edge_cache.flush(force=True)
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
-app = FastAPI(docs_url="/api/docs", openapi_url="/api/openapi.json")
+if settings.ENABLE_API_DOCS:
+    docs_urls = {"docs_url": "/api/docs", "openapi_url": "/api/openapi.json"}
+else:
+    # Keeps the schema private in prod. Not a startup saving, FastAPI only
+    # builds the schema on the first docs request, and fastapi.params
+    # imports fastapi.openapi.models either way.
+    docs_urls = {"docs_url": None, "redoc_url": None, "openapi_url": None}
+
+app = FastAPI(**docs_urls, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,20 +68,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Request-ID"],
+    expose_headers=[REQUEST_ID_HEADER, "ETag", NEXT_CURSOR_HEADER],
+    # Lets browsers reuse a preflight response instead of sending an
+    # OPTIONS request ahead of every cross origin call
+    max_age=settings.CORS_MAX_AGE,
 )
+if settings.PROFILING_ENABLED and settings.PROFILING_SECRET:
+    # Inside RequestContextMiddleware so profiles are logged and tagged
+    # like any other response
+    from src.utils.profiling import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
+# Added last so it is outermost, and times and tags preflights too
+app.add_middleware(RequestContextMiddleware)
 
 # Register the custom exception handler
 app.exception_handler(RequestValidationError)(validation_exception_handler)
 app.exception_handler(ResponseValidationError)(validation_exception_handler)
 app.exception_handler(IntegrityError)(integrity_error_handler)
 
-
-@app.middleware("http")
-async def log_aws_request(request: Request, call_next):
-    service_logging.log_request(request)
-    response = await call_next(request)
-    return response
-
-
 app.include_router(router=api_router, prefix="/api")
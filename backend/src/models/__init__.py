@@ -1 +1,14 @@
-from .item import Item, ItemCreate, ItemRead, ItemUpdate
+from .item import (
+    BulkItemError,
+    Item,
+    ItemBulkCreateRequest,
+    ItemBulkDeleteRequest,
+    ItemBulkDeleteResult,
+    ItemBulkResult,
+    ItemBulkUpdate,
+    ItemBulkUpdateRequest,
+    ItemCreate,
+    ItemImportResult,
+    ItemRead,
+    ItemUpdate,
+)
@@ -83,6 +83,10 @@ class BaseDatabaseModel(SQLModel):
     model_config = ConfigDict(
         arbitrary_types_allowed=True, from_attributes=True, extra="ignore"
     )
+    # Fetch server generated values (created, updated) with RETURNING as
+    # part of the INSERT / UPDATE instead of a refresh afterwards
+    __mapper_args__ = {"eager_defaults": True}
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created: datetime | None = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now())
@@ -2,7 +2,7 @@ from datetime import datetime
 import uuid
 
 from src.models.base import BaseDatabaseModel, BaseSQLModel
-from sqlalchemy import Column, Text
+from sqlalchemy import Column, Index, Text, text
 from sqlmodel import Field
 
 
@@ -12,7 +12,20 @@ class ItemBase(BaseSQLModel):
 
 
 class Item(ItemBase, BaseDatabaseModel, table=True):
-    title: str = Field(sa_column=Column(Text, unique=True))
+    __table_args__ = (
+        # Keyset pagination in CRUDBase.get_page seeks on (order_by, id)
+        Index("ix_item_created_id", "created", "id"),
+        Index("ix_item_title_id", "title", "id"),
+        # Inactive (soft deleted) items don't hold on to their title
+        Index(
+            "ix_item_title_active",
+            "title",
+            unique=True,
+            postgresql_where=text("is_active"),
+        ),
+    )
+
+    title: str = Field(sa_column=Column(Text))
 
 
 class ItemCreate(ItemBase):
@@ -29,3 +42,47 @@ class ItemUpdate(ItemBase):
     description: str | None = None
     is_active: bool | None = None
     title: str | None = None
+
+
+# Upper bound on rows per bulk request
+MAX_BULK_ITEMS = 10_000
+
+
+class ItemBulkUpdate(ItemUpdate):
+    id: uuid.UUID
+
+
+class ItemBulkCreateRequest(BaseSQLModel):
+    items: list[ItemCreate] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class ItemBulkUpdateRequest(BaseSQLModel):
+    items: list[ItemBulkUpdate] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class ItemBulkDeleteRequest(BaseSQLModel):
+    ids: list[uuid.UUID] = Field(max_length=MAX_BULK_ITEMS)
+
+
+class BulkItemError(BaseSQLModel):
+    index: int
+    detail: str
+
+
+class ItemBulkResult(BaseSQLModel):
+    items: list[ItemRead]
+    errors: list[BulkItemError]
+
+
+class ItemBulkDeleteResult(BaseSQLModel):
+    ids: list[uuid.UUID]
+    errors: list[BulkItemError]
+
+
+class ItemImportResult(BaseSQLModel):
+    inserted: int
+    updated: int
+    rejected: int
+    # Index is the row's position in the upload, counting from 0 after any
+    # CSV header
+    errors: list[BulkItemError]
@@ -1,12 +1,159 @@
-import sqlmodel
-from sqlalchemy import create_engine
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
+from src.utils import timing
 from src.utils.config import settings
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+
+@dataclass
+class PoolMetrics:
+    """Per container connection pool counters"""
+
+    checkouts: int = 0
+    # Checkouts that waited for another request to check a connection in
+    waits: int = 0
+    wait_seconds: float = 0.0
+    # Checkouts that found the pool empty and opened a connection
+    connects: int = 0
+    connect_seconds: float = 0.0
+    # Every connection opened, including replacements for stale ones
+    connections_created: int = 0
+    stale_connections: int = 0
+
+    def snapshot(self) -> dict:
+        return asdict(self)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPoolMixin:
+    # Taking an idle connection is a few microseconds, so a checkout that
+    # opened no connection and still took longer than this blocked on the
+    # pool until another request checked one in. Well under a round trip
+    # to Postgres, which is what a checkout waits on either way.
+    wait_threshold_seconds = 0.001
+
+    def _do_get(self):
+        start = time.perf_counter()
+        connection = super()._do_get()
+        elapsed = time.perf_counter() - start
+        # Sessions connect on their first query, so this is most of what
+        # deps.get_session costs a request
+        timing.record("connect", elapsed * 1000)
+        # Set by _on_connect when the pool had to open this one
+        if connection.info.pop("opened", False):
+            pool_metrics.connects += 1
+            pool_metrics.connect_seconds += elapsed
+        elif elapsed > self.wait_threshold_seconds:
+            pool_metrics.waits += 1
+            pool_metrics.wait_seconds += elapsed
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _on_connect(dbapi_connection, connection_record) -> None:
+    pool_metrics.connections_created += 1
+    connection_record.info["checked_in_at"] = time.monotonic()
+    connection_record.info["opened"] = True
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    connection_record.info["checked_in_at"] = time.monotonic()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    pool_metrics.checkouts += 1
+    # Reconnects after _do_get (recycled or invalidated connections) aren't
+    # a checkout opening a connection
+    connection_record.info.pop("opened", None)
+    idle = time.monotonic() - connection_record.info.get("checked_in_at", 0)
+    if idle < settings.DB_POOL_MAX_IDLE_SECONDS:
+        return
+    # A frozen Lambda can sit idle long enough for RDS or a NAT to drop the
+    # socket. Only ping connections that have been idle long enough to
+    # plausibly be dead.
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    except Exception as exc:
+        pool_metrics.stale_connections += 1
+        # The pool discards this connection and retries with a new one
+        raise DisconnectionError() from exc
+    finally:
+        cursor.close()
+
+
+def _engine_options() -> dict:
+    default_pool_size, default_max_overflow = (1, 0) if settings.IS_LAMBDA else (5, 10)
+    return {
+        "echo": False,
+        # Explicit zeros are kept, 0 is an unbounded pool
+        "pool_size": (
+            default_pool_size
+            if settings.DB_POOL_SIZE is None
+            else settings.DB_POOL_SIZE
+        ),
+        "max_overflow": (
+            default_max_overflow
+            if settings.DB_MAX_OVERFLOW is None
+            else settings.DB_MAX_OVERFLOW
+        ),
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _listen_pool_events(db_engine: Engine) -> None:
+    event.listen(db_engine, "connect", _on_connect)
+    event.listen(db_engine, "checkin", _on_checkin)
+    event.listen(db_engine, "checkout", _on_checkout)
+
+
+def create_db_engine() -> Engine:
+    db_engine = create_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI),
+        poolclass=InstrumentedQueuePool,
+        **_engine_options(),
+    )
+    _listen_pool_events(db_engine)
+    timing.instrument_engine(db_engine)
+    return db_engine
+
+
+def create_async_db_engine():
+    # Imported here so asyncpg is only loaded when the async path is enabled
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(str(settings.SQLALCHEMY_DATABASE_URI)).set(
+        drivername="postgresql+asyncpg"
+    )
+    db_engine = create_async_engine(
+        url, poolclass=InstrumentedAsyncQueuePool, **_engine_options()
+    )
+    _listen_pool_events(db_engine.sync_engine)
+    timing.instrument_engine(db_engine.sync_engine)
+    return db_engine
+
+
+# The one engine (and connection pool) for the process. Everything that
+# talks to the db should go through this rather than creating its own.
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-sqlmodel_engine = sqlmodel.create_engine(
-    settings.SQLALCHEMY_DATABASE_URI, echo=False, pool_pre_ping=True
-)
+# Only created when DB_ASYNC is on. The sync engine is then just used for
+# the migration check and is disposed once the app has started.
+async_engine = create_async_db_engine() if settings.DB_ASYNC else None
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional, Protocol
+
+from src.utils.config import settings
+
+
+@dataclass
+class CacheMetrics:
+    """Per container cache counters"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def snapshot(self) -> dict:
+        return asdict(self)
+
+
+cache_metrics = CacheMetrics()
+
+
+class Cache(Protocol):
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    # get without counting a hit or miss, for bookkeeping keys that would
+    # skew the hit ratio
+    def peek(self, key: str) -> Optional[bytes]: ...
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None: ...
+
+    def delete(self, *keys: str) -> None: ...
+
+
+class MemoryCache:
+    """
+    LRU cache with a per entry TTL. Lives at module scope so it survives
+    across warm Lambda invocations, but each container has its own copy.
+    Rows are safe anyway, CRUDBase keys them by their `updated` timestamp.
+    List pages are only invalidated by writes in the same container, in
+    the others they are served until the TTL. Use RedisCache, one cache
+    shared by every container, when that is too stale.
+
+    Sync routes run on a threadpool, so every operation holds a lock.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Optional[float], bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                cache_metrics.misses += 1
+            else:
+                cache_metrics.hits += 1
+        return value
+
+    def peek(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._lookup(key)
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            cache_metrics.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                cache_metrics.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCache:
+    """
+    Shared cache over the Redis protocol, so invalidations are seen by every
+    container. Anything that speaks RESP works, including a local redis
+    container. Needs the `redis` package, which is only imported when this
+    backend is configured.
+    """
+
+    def __init__(self, url: str, ttl: int, prefix: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.peek(key)
+        if value is None:
+            cache_metrics.misses += 1
+        else:
+            cache_metrics.hits += 1
+        return value
+
+    def peek(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+
+def create_cache() -> Optional[Cache]:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(
+            max_entries=settings.CACHE_MAX_ENTRIES, ttl=settings.CACHE_TTL_SECONDS
+        )
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(
+            url=settings.CACHE_REDIS_URL,
+            ttl=settings.CACHE_TTL_SECONDS,
+            prefix=f"{settings.PROJECT_NAME}:{settings.ENV_NAME}:",
+        )
+    return None
+
+
+cache = create_cache()
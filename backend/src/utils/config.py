@@ -1,5 +1,5 @@
 import secrets
-from typing import Any, List, Optional
+from typing import Any, List, Literal, Optional
 
 from pydantic import (
     AnyHttpUrl,
@@ -14,7 +14,10 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Exampulumi"
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
+    # Seconds browsers may cache a CORS preflight. Chromium caps this at 7200.
+    CORS_MAX_AGE: int = 7200
     ENV_NAME: str = "local"
+    ENABLE_API_DOCS: bool = True
 
     POSTGRES_SERVER: str
     POSTGRES_USER: str
@@ -37,7 +40,111 @@ class Settings(BaseSettings):
         )
         return postgres_dsn.unicode_string()
 
+    # Serve the items API from async routes on asyncpg instead of sync
+    # routes on psycopg2
+    DB_ASYNC: bool = False
+
+    # DELETE /api/items/{item_id} marks the item inactive instead of
+    # removing the row
+    ITEM_SOFT_DELETE: bool = False
+
+    # Read-through cache for CRUDBase.get / get_multi / get_page. "memory"
+    # is per container, "redis" is shared between containers.
+    CACHE_BACKEND: Literal["none", "memory", "redis"] = "none"
+    CACHE_TTL_SECONDS: int = 30
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # s-maxage on item reads, so CloudFront can serve repeat reads for this
+    # long. Writes are visible at the edge after at most this many seconds.
+    API_EDGE_CACHE_SECONDS: int = 5
+    # When set, item writes invalidate the item's path on this distribution
+    # so the change is visible at the edge right away. Needs the
+    # cloudfront:CreateInvalidation permission, and on Lambda
+    # lambda:InvokeFunction on the function itself (see edge_cache.flush).
+    CLOUDFRONT_DISTRIBUTION_ID: Optional[str] = None
+    # Paths written within this many seconds of the last invalidation are
+    # batched into the next one
+    EDGE_INVALIDATION_INTERVAL_SECONDS: float = 1
+
+    # Lambda buffers the whole response (6MB max), so exports there are
+    # returned this many rows at a time with a Next-Cursor header
+    EXPORT_LAMBDA_MAX_ROWS: int = 5000
+
+    # Connection pool. When unset, size and overflow default to a single
+    # connection on Lambda since each execution environment only ever
+    # handles one request at a time.
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    # Connections idle for longer than this are pinged on checkout. Cheaper
+    # than pre-ping, which pings on every checkout.
+    DB_POOL_MAX_IDLE_SECONDS: int = 60
+
+    # Lambda never runs the app's shutdown, so the pool and cache counters
+    # are logged by the handler at most this often instead. 0 logs them on
+    # every invocation.
+    METRICS_LOG_INTERVAL_SECONDS: float = 60
+
+    # Access log. A LOG_SAMPLE_RATE fraction of requests is logged, plus
+    # every 5xx and every request slower than LOG_SLOW_REQUEST_MS. Only the
+    # LOG_HEADERS request headers are included.
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_MS: float = 1000
+    LOG_HEADERS: List[str] = [
+        "user-agent",
+        "referer",
+        "content-type",
+        "content-length",
+        "x-forwarded-for",
+        "x-amzn-trace-id",
+    ]
+
+    # Replayable Lambda events for benchmarks.replay, logged as "aws_event"
+    # records. Off by default. The CAPTURE_REDACT_HEADERS values, cookies
+    # and the caller's IP are always replaced, and bodies are dropped unless
+    # CAPTURE_EVENT_BODIES is on.
+    CAPTURE_EVENTS: bool = False
+    CAPTURE_EVENT_BODIES: bool = False
+    CAPTURE_REDACT_HEADERS: List[str] = [
+        "authorization",
+        "cookie",
+        "proxy-authorization",
+        "x-api-key",
+        "x-forwarded-for",
+        # CloudFront's origin secret, see infra/config.py
+        "x-origin-verify",
+        "profile-secret",
+    ]
+
+    # Per request phase and SQL timings, returned in a Server-Timing header
+    # and logged as CloudWatch EMF metrics. Off means no hooks are installed.
+    REQUEST_TIMING: bool = False
+
+    # Sampling profiler for single requests, see src.utils.profiling. Never
+    # turn this on in prod. Requests are only profiled with the secret.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SECRET: str = ""
+    PROFILING_INTERVAL_MS: float = 5
+    # Profiles are also written here when set. /tmp is the only writable
+    # path on Lambda.
+    PROFILING_OUTPUT_DIR: Optional[str] = None
+
     AWS_LAMBDA_INITIALIZATION_TYPE: str = "Not a lambda"
+    AWS_LAMBDA_FUNCTION_NAME: Optional[str] = None
+
+    @property
+    def IS_LAMBDA(self) -> bool:
+        return self.AWS_LAMBDA_INITIALIZATION_TYPE != "Not a lambda"
+
+    # When False, request containers only check the schema version and
+    # migrations must be run with a {"action": "migrate"} invocation, which
+    # the Pulumi deploy does once per image
+    MIGRATE_ON_INIT: bool = False
+    # While a migration is pending, containers look at the schema version
+    # again at most this often rather than on every invocation
+    MIGRATION_RECHECK_SECONDS: int = 60
 
 
 settings = Settings()
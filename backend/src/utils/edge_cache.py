@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from src.utils import service_logging
+from src.utils.config import settings
+
+# CloudFront allows 3000 file paths in progress per distribution
+MAX_PATHS_PER_INVALIDATION = 1000
+# The event lambda_handler invalidates queued paths for, see flush
+INVALIDATE_ACTION = "invalidate"
+
+# Invalidating a path invalidates it with every query string, so this
+# covers every list page
+ITEM_LIST_PATH = "/api/items"
+# For writes that touch too many items to list, like an import. Only 15
+# wildcard invalidations can be in progress at once.
+ALL_ITEM_PATHS = "/api/items*"
+
+# Paths written since the last flush, and when that was
+_pending: set[str] = set()
+_pending_lock = threading.Lock()
+_flush_state = {"flushed_at": None}
+
+
+@lru_cache(maxsize=None)
+def _client():
+    # boto3 comes with the Lambda runtime, and is only needed when
+    # CLOUDFRONT_DISTRIBUTION_ID is set
+    import boto3
+
+    return boto3.client("cloudfront")
+
+
+@lru_cache(maxsize=None)
+def _lambda_client():
+    import boto3
+
+    return boto3.client("lambda")
+
+
+def item_paths(ids: Iterable[uuid.UUID]) -> list[str]:
+    # Any write changes list pages too
+    return [ITEM_LIST_PATH, *(f"/api/items/{id}" for id in ids)]
+
+
+def queue_invalidation(paths: list[str]) -> None:
+    """
+    Queues paths for the next flush. Meant to run as a background task after
+    a write. Outside Lambda the response has been sent by then, so the paths
+    are invalidated right away.
+    """
+    if not settings.CLOUDFRONT_DISTRIBUTION_ID or not paths:
+        return
+    with _pending_lock:
+        _pending.update(paths)
+    if not settings.IS_LAMBDA:
+        flush(force=True)
+
+
+def _take_pending(force: bool) -> list[str]:
+    with _pending_lock:
+        now = time.monotonic()
+        flushed_at = _flush_state["flushed_at"]
+        due = (
+            flushed_at is None
+            or now - flushed_at >= settings.EDGE_INVALIDATION_INTERVAL_SECONDS
+        )
+        if not _pending or not (force or due):
+            return []
+        _flush_state["flushed_at"] = now
+        paths = [ALL_ITEM_PATHS] if ALL_ITEM_PATHS in _pending else sorted(_pending)
+        _pending.clear()
+        return paths
+
+
+def flush(force: bool = False) -> None:
+    """
+    Sends the queued paths in one batch, at most once per
+    EDGE_INVALIDATION_INTERVAL_SECONDS unless forced. Paths queued in
+    between wait for the next flush, the cached responses expire within
+    s-maxage either way.
+
+    On Lambda the response is only returned once the handler is done, so
+    lambda_handler calls this after each invocation and the CloudFront call,
+    which goes to us-east-1 and can take hundreds of milliseconds, is handed
+    to an async invocation of this function instead.
+    """
+    paths = _take_pending(force)
+    if not paths:
+        return
+    if not settings.IS_LAMBDA:
+        invalidate(paths)
+        return
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    try:
+        _lambda_client().invoke(
+            FunctionName=settings.AWS_LAMBDA_FUNCTION_NAME,
+            InvocationType="Event",
+            Payload=json.dumps({"action": INVALIDATE_ACTION, "paths": paths}),
+        )
+    except (BotoCoreError, ClientError) as exc:
+        service_logging.logger.warning(
+            {
+                "log_type": "edge_invalidation_failed",
+                "function_name": settings.AWS_LAMBDA_FUNCTION_NAME,
+                "paths": len(paths),
+                "error": str(exc),
+            }
+        )
+
+
+def invalidate(paths: list[str], distribution_id: Optional[str] = None) -> None:
+    """
+    Invalidates paths on the API's CloudFront distribution. Failures are
+    logged rather than raised, the cached response expires on its own
+    within s-maxage.
+    """
+    distribution_id = distribution_id or settings.CLOUDFRONT_DISTRIBUTION_ID
+    if not distribution_id or not paths:
+        return
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    for start in range(0, len(paths), MAX_PATHS_PER_INVALIDATION):
+        batch = paths[start : start + MAX_PATHS_PER_INVALIDATION]
+        try:
+            _client().create_invalidation(
+                DistributionId=distribution_id,
+                InvalidationBatch={
+                    "Paths": {"Quantity": len(batch), "Items": batch},
+                    "CallerReference": str(uuid.uuid4()),
+                },
+            )
+        except (BotoCoreError, ClientError) as exc:
+            service_logging.logger.warning(
+                {
+                    "log_type": "edge_invalidation_failed",
+                    "distribution_id": distribution_id,
+                    "paths": len(batch),
+                    "error": str(exc),
+                }
+            )
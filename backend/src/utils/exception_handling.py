@@ -1,29 +1,45 @@
+import re
+
 from fastapi import Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import IntegrityError
 
+# Postgres' detail for a unique violation, the same for every driver
+DUPLICATE_KEY_RE = re.compile(
+    r"Key \((?P<key>.+?)\)=\((?P<value>.*)\) already exists", re.DOTALL
+)
+
 
 def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(status_code=422, content={"detail": exc.errors()})
 
 
 def integrity_error_handler(reqeust: Request, exc: IntegrityError):
+    return JSONResponse(
+        status_code=400, content={"detail": integrity_error_detail(exc)}
+    )
+
+
+def integrity_error_detail(exc: IntegrityError) -> str:
     key, value = parse_integrity_error(exc)
     if key and value:
-        detail_msg = f"The {key} '{value}' already exists. Please create a unique {key}"
-    else:
-        detail_msg = "Unknown IntegrityError"
-    return JSONResponse(status_code=400, content={"detail": detail_msg})
+        return f"The {key} '{value}' already exists. Please create a unique {key}"
+    return "Unknown IntegrityError"
 
 
-def parse_integrity_error(exc: IntegrityError):
-    message = exc.orig.pgerror
-    key = None
-    value = None
+def _error_detail(orig: Exception) -> str:
+    # psycopg2 puts postgres' DETAIL line on diag. asyncpg's error is the
+    # cause of the exception SQLAlchemy's adapter raises.
+    diag = getattr(orig, "diag", None)
+    detail = getattr(diag, "message_detail", None) or getattr(
+        orig.__cause__, "detail", None
+    )
+    return detail or str(orig)
 
-    if "duplicate key" in message:
-        key = message.split("Key (", 1)[1].split(")=", 1)[0]
-        value = message.split(")=(", 1)[1].split(") ", 1)[0]
 
-    return key, value
+def parse_integrity_error(exc: IntegrityError):
+    match = DUPLICATE_KEY_RE.search(_error_detail(exc.orig))
+    if match is None:
+        return None, None
+    return match.group("key"), match.group("value")
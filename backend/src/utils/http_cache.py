@@ -0,0 +1,51 @@
+from typing import Callable, Optional
+
+from starlette.types import Scope
+
+# Responses that CloudFront and browsers may reuse when a route opts in. A
+# 304 refreshes the cached 200 and its headers, so it has to carry the
+# same Cache-Control or the refreshed copy loses its TTL.
+CACHEABLE_STATUSES = frozenset({200, 304})
+CACHEABLE_METHODS = frozenset({"GET", "HEAD"})
+
+
+def cache_control(
+    *,
+    max_age: int = 0,
+    s_maxage: Optional[int] = None,
+    stale_while_revalidate: Optional[int] = None,
+    private: bool = False,
+) -> Callable:
+    """
+    Declares a route's Cache-Control. Put it under the router decorator:
+
+        @router.get("/{item_id}")
+        @cache_control(s_maxage=5)
+        def read_item(...): ...
+
+    RequestContextMiddleware adds the header to 200 and 304 responses to GET
+    and HEAD, unless the route set one itself. s_maxage is what CloudFront
+    caches for, max_age is for browsers. Routes without it aren't cached at
+    the edge.
+    """
+    directives = ["private" if private else "public", f"max-age={max_age}"]
+    if s_maxage is not None and not private:
+        directives.append(f"s-maxage={s_maxage}")
+    if stale_while_revalidate is not None:
+        directives.append(f"stale-while-revalidate={stale_while_revalidate}")
+    value = ", ".join(directives)
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.cache_control = value
+        return endpoint
+
+    return decorator
+
+
+def route_cache_control(scope: Scope, status_code: int) -> Optional[str]:
+    if scope["method"] not in CACHEABLE_METHODS:
+        return None
+    if status_code not in CACHEABLE_STATUSES:
+        return None
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    return getattr(endpoint, "cache_control", None)
@@ -0,0 +1,59 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from dataclasses import asdict
+from typing import IO, Any, Iterator, Literal
+
+from sqlmodel import Session
+
+from src import crud
+from src.models.session import engine
+
+ImportFormat = Literal["csv", "ndjson"]
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def read_rows(file: IO[bytes], format: ImportFormat) -> Iterator[Any]:
+    """
+    Rows of an upload, one at a time. CSV needs a header naming the columns.
+    NDJSON lines that aren't valid JSON are passed on as they are, so they
+    fail validation against ItemCreate and are reported with their line.
+    """
+    text_file = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    try:
+        if format == "csv":
+            yield from csv.DictReader(text_file)
+            return
+        for line in text_file:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError(f"Unreadable {format} file: {exc}") from exc
+
+
+def main():
+    # Import a file straight into the database configured in the environment
+    # python -m src.utils.imports items.csv
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="CSV or NDJSON file, - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"])
+    args = parser.parse_args()
+
+    format = args.format or ("ndjson" if args.path.endswith("json") else "csv")
+    file = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    with file, Session(engine) as db:
+        result = crud.item.import_rows(db, rows=read_rows(file, format))
+    print(json.dumps(asdict(result), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import re
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils import service_logging, timing
+from src.utils.http_cache import route_cache_control
+
+REQUEST_ID_HEADER = "Request-ID"
+SERVER_TIMING_HEADER = "Server-Timing"
+# Incoming ids are only propagated if they look like one
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def request_id_for(scope: Scope) -> str:
+    for key, value in scope["headers"]:
+        if key == b"request-id":
+            request_id = value.decode("latin-1")
+            if VALID_REQUEST_ID.match(request_id):
+                return request_id
+            break
+    aws_context = scope.get("aws.context")
+    if aws_context is not None:
+        return aws_context.aws_request_id
+    return uuid.uuid4().hex
+
+
+class RequestContextMiddleware:
+    """
+    Request-ID propagation, timing and the access log as plain ASGI, so
+    there is no extra task or response body plumbing per request like with
+    @app.middleware("http").
+
+    The request id is taken from the Request-ID header, then the Lambda
+    request id, else generated. It is available to routes as
+    request.state.request_id and returned in the Request-ID header.
+
+    Routes marked with @cache_control get their Cache-Control header here,
+    unless the response already has one, like a profile's no-store.
+
+    With REQUEST_TIMING on, it also collects per phase timings for the
+    request, sends them in a Server-Timing header and logs them as EMF.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id_for(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        sampled = service_logging.sample_request()
+        start = time.perf_counter()
+        # Stays 500 if the app raises before starting a response
+        status_code = 500
+        timings = None
+        if timing.ENABLED:
+            timings = timing.RequestTimings()
+            token = timing.current.set(timings)
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                if "cache-control" not in headers:
+                    cache_control = route_cache_control(scope, status_code)
+                    if cache_control is not None:
+                        headers["Cache-Control"] = cache_control
+                if timings is not None:
+                    headers[SERVER_TIMING_HEADER] = timings.server_timing()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # Measured to the end of the body, streamed responses included
+            duration_ms = (time.perf_counter() - start) * 1000
+            if service_logging.keep_request(sampled, status_code, duration_ms):
+                service_logging.log_access(
+                    scope, status_code, duration_ms, request_id
+                )
+            if timings is not None:
+                timing.current.reset(token)
+                route = getattr(scope.get("route"), "path", "unmatched")
+                service_logging.logger.info(
+                    timing.emf_record(timings, route, status_code)
+                )
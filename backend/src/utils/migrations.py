@@ -0,0 +1,141 @@
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = BACKEND_ROOT / "alembic.ini"
+VERSIONS_DIR = BACKEND_ROOT / "alembic" / "versions"
+# Written at image build time so the container never has to parse the
+# migration scripts (or import alembic) just to learn the head revision
+HEAD_FILE = BACKEND_ROOT / "alembic" / "HEAD"
+
+_REVISION_RE = re.compile(r"^revision\b[^=]*=\s*[\"']([\w]+)[\"']", re.MULTILINE)
+_DOWN_REVISION_RE = re.compile(r"^down_revision\b[^=]*=\s*(.+)$", re.MULTILINE)
+_QUOTED_RE = re.compile(r"[\"']([\w]+)[\"']")
+
+# Cached per container. Once the db is known to be on head there is no
+# reason to look again until the container is recycled.
+_state = {"head": None, "up_to_date": False, "checked_at": None}
+
+
+def find_head_revision(versions_dir: Path = VERSIONS_DIR) -> str | None:
+    """
+    Work out the head revision by reading the migration scripts as text.
+    This intentionally avoids alembic's ScriptDirectory, which imports
+    every migration module.
+    """
+    revisions = set()
+    down_revisions = set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text()
+        revision = _REVISION_RE.search(source)
+        if not revision:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION_RE.search(source)
+        if down_revision:
+            down_revisions.update(_QUOTED_RE.findall(down_revision.group(1)))
+
+    heads = revisions - down_revisions
+    if len(heads) > 1:
+        raise RuntimeError(f"Multiple alembic heads found: {sorted(heads)}")
+    return heads.pop() if heads else None
+
+
+def write_head_file(path: Path = HEAD_FILE) -> str | None:
+    head = find_head_revision()
+    path.write_text(head or "")
+    return head
+
+
+def packaged_head() -> str | None:
+    if _state["head"] is None:
+        if HEAD_FILE.exists():
+            _state["head"] = HEAD_FILE.read_text().strip() or None
+        else:
+            _state["head"] = find_head_revision()
+    return _state["head"]
+
+
+def is_up_to_date() -> bool:
+    """Whether this container has already seen the db on head"""
+    return _state["up_to_date"]
+
+
+def current_revision(engine: Engine) -> str | None:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                text("SELECT version_num FROM alembic_version")
+            ).scalar()
+    except DBAPIError:
+        # alembic_version does not exist until the first migration runs
+        return None
+
+
+def run_upgrade(revision: str = "head") -> None:
+    # Only the migrate path pays for importing alembic
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(ALEMBIC_INI)), revision)
+
+
+def ensure_migrated(
+    engine: Engine, *, allow_upgrade: bool = True, recheck_after: float = 0
+) -> bool:
+    """
+    Bring the db to the packaged head once per container. Returns True if
+    the db is known to be on head. Until it is, the version is looked up
+    again at most every recheck_after seconds.
+    """
+    if _state["up_to_date"]:
+        return True
+    now = time.monotonic()
+    checked_at = _state["checked_at"]
+    if checked_at is not None and now - checked_at < recheck_after:
+        return False
+    _state["checked_at"] = now
+
+    head = packaged_head()
+    current = current_revision(engine)
+    if current == head:
+        _state["up_to_date"] = True
+        return True
+
+    if not allow_upgrade:
+        logger.warning(
+            {
+                "log_type": "migration_pending",
+                "current_revision": current,
+                "head_revision": head,
+            }
+        )
+        return False
+
+    logger.info(
+        {
+            "log_type": "migration_started",
+            "current_revision": current,
+            "head_revision": head,
+        }
+    )
+    run_upgrade()
+    _state["up_to_date"] = True
+    return True
+
+
+if __name__ == "__main__":
+    # python -m src.utils.migrations write-head
+    if sys.argv[1:] == ["write-head"]:
+        print(write_head_file())
+    else:
+        print(find_head_revision())
@@ -0,0 +1,136 @@
+"""
+Opt-in sampling profiler for single requests. With PROFILING_ENABLED and a
+PROFILING_SECRET set, a request with ?profile=1 and a matching
+Profile-Secret header is profiled and answered with its stacks in collapsed
+format (one "frame;frame;frame count" line per stack) instead of the usual
+body. The original status is returned in a Profiled-Status header, and the
+response is never cached.
+
+    curl -H "Profile-Secret: $SECRET" "localhost:8000/api/items?profile=1" \
+        > items.collapsed
+    flamegraph.pl items.collapsed > items.svg  # or drop it on speedscope.app
+
+Every thread but the sampler and the log writer is sampled, each under its
+own root frame, so the event loop and threadpool workers both show up.
+Concurrent requests show up too. Profile on a quiet instance.
+"""
+import hmac
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils import service_logging
+from src.utils.config import settings
+
+SECRET_HEADER = b"profile-secret"
+PROFILE_QUERY = re.compile(rb"(^|&)profile=1(&|$)")
+
+
+def collapse(thread_name: str, frame: Optional[FrameType]) -> str:
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.finished = threading.Event()
+
+    def run(self) -> None:
+        listener_thread = getattr(service_logging.listener, "_thread", None)
+        skip = {threading.get_ident(), getattr(listener_thread, "ident", None)}
+        while not self.finished.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in skip:
+                    name = names.get(thread_id, str(thread_id))
+                    self.stacks[collapse(name, frame)] += 1
+
+    def stop(self) -> str:
+        self.finished.set()
+        self.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def wants_profile(scope: Scope) -> bool:
+    if not PROFILE_QUERY.search(scope["query_string"]):
+        return False
+    secret = dict(scope["headers"]).get(SECRET_HEADER, b"")
+    return hmac.compare_digest(secret, settings.PROFILING_SECRET.encode())
+
+
+def store(scope: Scope, collapsed: str) -> Optional[str]:
+    if not settings.PROFILING_OUTPUT_DIR:
+        return None
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-")
+    path = Path(settings.PROFILING_OUTPUT_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    path = path / f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}.txt"
+    path.write_text(collapsed)
+    return str(path)
+
+
+class ProfilingMiddleware:
+    """Only added to the app when PROFILING_ENABLED is on"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def discard_response(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        sampler = Sampler(settings.PROFILING_INTERVAL_MS / 1000)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            collapsed = sampler.stop()
+        stored_at = store(scope, collapsed)
+        service_logging.logger.info(
+            {
+                "log_type": "request_profile",
+                "path": scope["path"],
+                "duration_ms": round(duration_ms, 2),
+                "samples": sum(sampler.stacks.values()),
+                "stored_at": stored_at,
+            }
+        )
+        body = collapsed.encode()
+        headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"profiled-status", str(status_code).encode()),
+            (b"profiled-duration-ms", f"{duration_ms:.2f}".encode()),
+            # The edge cache keys on the query string but not the secret, so
+            # a cached profile would be served to anyone adding ?profile=1.
+            # Also keeps RequestContextMiddleware from adding the route's
+            # Cache-Control.
+            (b"cache-control", b"no-store"),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
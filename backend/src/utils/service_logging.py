@@ -1,12 +1,21 @@
+import atexit
+import copy
 import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
 
 from pythonjsonlogger import jsonlogger
-from starlette.requests import Request
 
-# from app.utils.config import settings
-#
-# ENV_NAME = settings.ENV_NAME
-# LAMBDA_INIT_TYPE = settings.AWS_LAMBDA_INITIALIZATION_TYPE
+from src.utils.config import settings
+
+
+class DeferredQueueHandler(QueueHandler):
+    # QueueHandler.prepare formats the record to a string before queueing
+    # it, which is the expensive part we want off the request path and would
+    # hand the JSON formatter a string instead of the log dict
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 logger = logging.getLogger()
@@ -16,17 +25,121 @@ formatter = jsonlogger.JsonFormatter("%(asctime) %(levelname) %(message)")
 handler = logging.StreamHandler()
 handler.setFormatter(formatter)
 handler.setLevel(logging.DEBUG)
-logger.addHandler(handler)
-
-
-def log_request(request: Request):
-    log = {
-        "log_type": "incoming_http_request",
-        "path_params": request.path_params,
-        "query_params": request.query_params,
-        "path": request.url.path,
-        "method": request.method,
-        "headers": request.headers,
-        "aws_event": request.scope.get("aws.event"),
-    }
-    logger.info(log)
+
+# Records are queued by the caller and formatted and written by a
+# background thread
+log_queue: queue.Queue = queue.Queue()
+logger.addHandler(DeferredQueueHandler(log_queue))
+listener = QueueListener(log_queue, handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+# Mangum logs every request at INFO ("GET /api/items 200"), unsampled. The
+# sampled access log below replaces it, its warnings and errors still go out.
+logging.getLogger("mangum.http").setLevel(logging.WARNING)
+
+
+def flush() -> None:
+    """
+    Block until every queued record has been written. Lambda freezes the
+    process as soon as the handler returns, so call this before returning.
+    """
+    log_queue.join()
+
+
+LOG_HEADERS = frozenset(header.lower() for header in settings.LOG_HEADERS)
+
+
+def sample_request() -> bool:
+    """Head sampling, decided before the request is handled"""
+    return random.random() < settings.LOG_SAMPLE_RATE
+
+
+def keep_request(sampled: bool, status_code: int, duration_ms: float) -> bool:
+    """Tail sampling, errors and slow requests are always logged"""
+    return sampled or status_code >= 500 or duration_ms >= settings.LOG_SLOW_REQUEST_MS
+
+
+def log_access(
+    scope: dict, status_code: int, duration_ms: float, request_id: str
+) -> None:
+    """
+    One line per request, written once the response has been sent. Only
+    the allow-listed headers are included.
+    """
+    headers = {}
+    for key, value in scope["headers"]:
+        name = key.decode("latin-1")
+        if name in LOG_HEADERS:
+            headers[name] = value.decode("latin-1")
+    aws_context = scope.get("aws.context")
+    logger.info(
+        {
+            "log_type": "http_access",
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope["query_string"].decode("latin-1"),
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "request_id": request_id,
+            "aws_request_id": getattr(aws_context, "aws_request_id", None),
+            "headers": headers,
+        }
+    )
+
+
+REDACTED = "[redacted]"
+REDACT_HEADERS = frozenset(header.lower() for header in settings.CAPTURE_REDACT_HEADERS)
+
+
+def _redact_headers(headers: dict) -> None:
+    for name, value in headers.items():
+        if name.lower() not in REDACT_HEADERS:
+            continue
+        if isinstance(value, list):
+            # multiValueHeaders, or CloudFront's [{"key": ..., "value": ...}]
+            headers[name] = [
+                {**item, "value": REDACTED} if isinstance(item, dict) else REDACTED
+                for item in value
+            ]
+        else:
+            headers[name] = REDACTED
+
+
+def sanitize_event(event: dict) -> dict:
+    """
+    A copy of an API Gateway, function URL or CloudFront event that is safe
+    to log. Secrets are replaced rather than removed, so replays still take
+    the same code paths.
+    """
+    event = copy.deepcopy(event)
+    requests = [event]
+    if "Records" in event:
+        requests = [record["cf"]["request"] for record in event["Records"]]
+    for request in requests:
+        for key in ("headers", "multiValueHeaders"):
+            if isinstance(request.get(key), dict):
+                _redact_headers(request[key])
+        request.pop("cookies", None)
+        context = request.get("requestContext") or {}
+        context.pop("authorizer", None)
+        for source in (context.get("http"), context.get("identity")):
+            if isinstance(source, dict) and "sourceIp" in source:
+                source["sourceIp"] = REDACTED
+        if "clientIp" in request:
+            request["clientIp"] = REDACTED
+        body = request.get("body")
+        if body is None or settings.CAPTURE_EVENT_BODIES:
+            continue
+        if isinstance(body, dict):
+            # CloudFront keeps the body under "data"
+            request["body"] = {**body, "data": ""}
+        else:
+            request["body"] = None
+            request["isBase64Encoded"] = False
+    return event
+
+
+def log_event(event: dict) -> None:
+    """An "aws_event" record for benchmarks.replay, see CAPTURE_EVENTS"""
+    logger.info({"log_type": "aws_event", "aws_event": sanitize_event(event)})
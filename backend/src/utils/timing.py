@@ -0,0 +1,128 @@
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.utils.config import settings
+
+# Read once so every hook below is a single global lookup when disabled
+ENABLED = settings.REQUEST_TIMING
+
+
+@dataclass
+class RequestTimings:
+    """Per request durations in ms, keyed by phase"""
+
+    start: float = field(default_factory=time.perf_counter)
+    phases: dict[str, float] = field(default_factory=dict)
+    sql_count: int = 0
+
+    def add(self, name: str, ms: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + ms
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self) -> str:
+        entries = [
+            f'sql;dur={self.phases.get("sql", 0.0):.2f};desc="{self.sql_count} queries"'
+        ]
+        entries += [
+            f"{name};dur={ms:.2f}" for name, ms in self.phases.items() if name != "sql"
+        ]
+        entries.append(f"total;dur={self.total_ms():.2f}")
+        return ", ".join(entries)
+
+
+# Set by RequestContextMiddleware. Sync routes and dependencies see the same
+# object since the threadpool runs them in a copy of the request's context.
+current: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class _Phase:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: RequestTimings, name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.timings.add(self.name, (time.perf_counter() - self.start) * 1000)
+
+
+_null_phase = nullcontext()
+
+
+def phase(name: str):
+    """Time a block of code as part of the current request"""
+    timings = current.get() if ENABLED else None
+    return _null_phase if timings is None else _Phase(timings, name)
+
+
+def record(name: str, ms: float) -> None:
+    if ENABLED:
+        timings = current.get()
+        if timings is not None:
+            timings.add(name, ms)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    context._timing_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    timings = current.get()
+    if timings is not None:
+        timings.sql_count += 1
+        timings.add("sql", (time.perf_counter() - context._timing_start) * 1000)
+
+
+def instrument_engine(db_engine: Engine) -> None:
+    """Count and time every statement. Only hooked up when enabled."""
+    if ENABLED:
+        event.listen(db_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def emf_record(timings: RequestTimings, route: str, status_code: int) -> dict:
+    """
+    CloudWatch Embedded Metric Format. CloudWatch turns the log line into
+    metrics per route, so N+1 queries and slow SQL show up on a dashboard
+    without a metrics client.
+    """
+    metrics = {
+        "Duration": round(timings.total_ms(), 2),
+        "SqlCount": timings.sql_count,
+    }
+    for name, ms in timings.phases.items():
+        metrics[f"{name.capitalize()}Time"] = round(ms, 2)
+    units = {"SqlCount": "Count"}
+    return {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": settings.PROJECT_NAME,
+                    "Dimensions": [["Environment", "Route"]],
+                    "Metrics": [
+                        {"Name": name, "Unit": units.get(name, "Milliseconds")}
+                        for name in metrics
+                    ],
+                }
+            ],
+        },
+        "log_type": "request_timing",
+        "Environment": settings.ENV_NAME,
+        "Route": route,
+        "status": status_code,
+        **metrics,
+    }
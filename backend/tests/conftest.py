@@ -0,0 +1,134 @@
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+# Settings are read when src is first imported. Point them at the
+# docker-compose test_db unless the environment says otherwise, never at
+# the dev db.
+os.environ.setdefault("POSTGRES_SERVER", "localhost:2346")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "password")
+os.environ.setdefault("POSTGRES_DB", "app")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+ENGINES = ["sync", "async"]
+
+# Past anything else the suite creates, so seeded_items are the first rows
+# of a descending walk and the last of an ascending one. Two values, so
+# rows share them.
+SEED_CREATED = [
+    datetime(2990, 1, 1, tzinfo=timezone.utc),
+    datetime(2990, 1, 2, tzinfo=timezone.utc),
+]
+SEED_ROWS = 7
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from src.models.session import engine
+    from src.utils import migrations
+
+    migrations.ensure_migrated(engine)
+    return engine
+
+
+@pytest.fixture(scope="session")
+def async_engine(engine):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # asyncpg connections belong to the event loop that opened them, and
+    # every TestClient and asyncio.run has its own
+    url = engine.url.set(drivername="postgresql+asyncpg")
+    return create_async_engine(url, poolclass=NullPool)
+
+
+@pytest.fixture
+def title_prefix(engine):
+    """Tests only create items titled with this prefix, removed afterwards"""
+    prefix = f"test-{uuid.uuid4().hex[:8]}-"
+    yield prefix
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM item WHERE title LIKE :prefix"),
+            {"prefix": f"{prefix}%"},
+        )
+
+
+@pytest.fixture
+def seeded_items(engine, title_prefix) -> list[str]:
+    """Ids of SEED_ROWS items created at SEED_CREATED, in (created, id) order"""
+    with engine.begin() as conn:
+        for i in range(SEED_ROWS):
+            conn.execute(
+                text(
+                    "INSERT INTO item (id, created, updated, is_active, title, "
+                    "description) VALUES (:id, :created, now(), true, :title, "
+                    ":description)"
+                ),
+                {
+                    "id": uuid.uuid4(),
+                    "created": SEED_CREATED[i % 2],
+                    "title": f"{title_prefix}{i}",
+                    # Needs quoting in CSV
+                    "description": f'"item", {i}',
+                },
+            )
+        return [
+            str(id)
+            for id in conn.scalars(
+                text(
+                    "SELECT id FROM item WHERE title LIKE :prefix "
+                    "ORDER BY created, id"
+                ),
+                {"prefix": f"{title_prefix}%"},
+            )
+        ]
+
+
+def cursor_before_seeded_items() -> str:
+    """An ascending created cursor that continues from the seeded items"""
+    from src import crud
+    from src.models import Item
+
+    row = Item(
+        id=uuid.UUID(int=0),
+        created=SEED_CREATED[0].replace(year=2989),
+        title="",
+        description="",
+    )
+    return crud.item._encode_cursor(row, order_by="created", descending=False)
+
+
+def build_app(router) -> FastAPI:
+    from src.utils.exception_handling import integrity_error_handler
+
+    app = FastAPI()
+    app.exception_handler(IntegrityError)(integrity_error_handler)
+    app.include_router(router, prefix="/api/items")
+    return app
+
+
+@pytest.fixture(params=ENGINES)
+def client(request, engine, async_engine):
+    """The items routes on psycopg2, then the async routes on asyncpg"""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from src.api import deps, items, items_async
+
+    if request.param == "sync":
+        return TestClient(build_app(items.router))
+
+    async def get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app = build_app(items_async.router)
+    app.dependency_overrides[deps.get_async_session] = get_async_session
+    return TestClient(app)
@@ -0,0 +1,63 @@
+import sys
+import threading
+
+from sqlmodel import Session
+
+from src import crud
+from src.crud.item import CRUDItem
+from src.models import Item, ItemCreate, ItemUpdate
+from src.utils.cache import CacheMetrics, MemoryCache
+
+
+def test_list_reads_count_one_lookup(engine, monkeypatch):
+    metrics = CacheMetrics()
+    monkeypatch.setattr("src.utils.cache.cache_metrics", metrics)
+    monkeypatch.setattr(crud.item, "cache", MemoryCache(max_entries=100, ttl=60))
+    with Session(engine) as db:
+        crud.item.get_page(db=db, limit=10)
+        crud.item.get_page(db=db, limit=10)
+    # The list version key is looked up on every read but isn't counted
+    assert (metrics.misses, metrics.hits) == (1, 1)
+
+
+def test_rows_are_keyed_by_updated(engine, title_prefix):
+    """A write in one container is never hidden by another's cached copy"""
+    writer = CRUDItem(Item, cache=MemoryCache(max_entries=100, ttl=60))
+    reader = CRUDItem(Item, cache=MemoryCache(max_entries=100, ttl=60))
+    with Session(engine) as db:
+        item = writer.create(
+            db=db, obj_in=ItemCreate(title=f"{title_prefix}item", description="old")
+        )
+        id = item.id
+    with Session(engine) as db:
+        assert reader.get(db=db, id=id).description == "old"
+    with Session(engine) as db:
+        writer.update_by_id(db=db, id=id, obj_in=ItemUpdate(description="new"))
+    with Session(engine) as db:
+        assert reader.get(db=db, id=id).description == "new"
+
+
+def test_memory_cache_is_thread_safe():
+    cache = MemoryCache(max_entries=8, ttl=0)
+    # Switch threads as often as possible so they interleave mid operation
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    errors = []
+
+    def churn(worker: int) -> None:
+        try:
+            for i in range(20_000):
+                key = str(i % 16)
+                cache.set(key, b"value", ttl=worker % 2)
+                cache.get(key)
+                cache.delete(str((i + worker) % 16))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=churn, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sys.setswitchinterval(switch_interval)
+    assert errors == []
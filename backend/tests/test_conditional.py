@@ -0,0 +1,19 @@
+def test_list_if_none_match(client, title_prefix):
+    params = {"limit": 1000}
+    etag = client.get("/api/items", params=params).headers["ETag"]
+    response = client.get("/api/items", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post("/api/items", json={"title": f"{title_prefix}new", "description": ""})
+    response = client.get("/api/items", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_item_if_none_match(client, title_prefix):
+    item = client.post(
+        "/api/items", json={"title": f"{title_prefix}item", "description": ""}
+    ).json()
+    etag = client.get(f"/api/items/{item['id']}").headers["ETag"]
+    response = client.get(f"/api/items/{item['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
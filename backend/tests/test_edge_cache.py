@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from src.utils import edge_cache
+from src.utils.config import settings
+
+DISTRIBUTION = "E2TESTDISTRIBUTION"
+
+
+class Recorder:
+    """Stands in for the boto3 cloudfront and lambda clients"""
+
+    def __init__(self):
+        self.invalidated = []
+        self.invoked = []
+
+    def create_invalidation(self, DistributionId, InvalidationBatch):
+        self.invalidated.append(InvalidationBatch["Paths"]["Items"])
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        assert InvocationType == "Event"
+        self.invoked.append(json.loads(Payload))
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(settings, "CLOUDFRONT_DISTRIBUTION_ID", DISTRIBUTION)
+    monkeypatch.setattr(edge_cache, "_client", lambda: recorder)
+    monkeypatch.setattr(edge_cache, "_lambda_client", lambda: recorder)
+    monkeypatch.setattr(edge_cache, "_pending", set())
+    monkeypatch.setattr(edge_cache, "_flush_state", {"flushed_at": None})
+    return recorder
+
+
+@pytest.fixture
+def on_lambda(monkeypatch, aws):
+    monkeypatch.setattr(settings, "AWS_LAMBDA_INITIALIZATION_TYPE", "on-demand")
+    monkeypatch.setattr(settings, "AWS_LAMBDA_FUNCTION_NAME", "api")
+    monkeypatch.setattr(settings, "EDGE_INVALIDATION_INTERVAL_SECONDS", 60)
+    return aws
+
+
+def test_lambda_hands_batches_to_an_async_invocation(on_lambda):
+    edge_cache.queue_invalidation(["/api/items/1"])
+    # Nothing is sent while the request is being handled
+    assert on_lambda.invoked == []
+
+    edge_cache.flush()
+    edge_cache.queue_invalidation(["/api/items", "/api/items/2"])
+    edge_cache.queue_invalidation(["/api/items", "/api/items/3"])
+    # Within the interval of the last flush
+    edge_cache.flush()
+    assert on_lambda.invoked == [{"action": "invalidate", "paths": ["/api/items/1"]}]
+
+    edge_cache.flush(force=True)
+    assert on_lambda.invoked[1]["paths"] == [
+        "/api/items",
+        "/api/items/2",
+        "/api/items/3",
+    ]
+    assert on_lambda.invalidated == []
+
+
+def test_wildcard_covers_the_batch(on_lambda):
+    edge_cache.queue_invalidation(edge_cache.item_paths(["1"]))
+    edge_cache.queue_invalidation([edge_cache.ALL_ITEM_PATHS])
+    edge_cache.flush()
+    assert on_lambda.invoked[0]["paths"] == ["/api/items*"]
+
+
+def test_nothing_is_queued_without_a_distribution(on_lambda, monkeypatch):
+    monkeypatch.setattr(settings, "CLOUDFRONT_DISTRIBUTION_ID", None)
+    edge_cache.queue_invalidation(["/api/items"])
+    edge_cache.flush(force=True)
+    assert on_lambda.invoked == []
+
+
+def test_writes_invalidate_lists(client, aws, title_prefix):
+    """Outside Lambda the paths are invalidated once the response is sent"""
+    created = client.post(
+        "/api/items", json={"title": f"{title_prefix}item", "description": "d"}
+    ).json()
+    client.patch(f"/api/items/{created['id']}", json={"description": "new"})
+    client.post(
+        "/api/items/import",
+        content=f"title,description\n{title_prefix}item,imported\n".encode(),
+    )
+
+    assert aws.invalidated == [
+        ["/api/items"],
+        ["/api/items", f"/api/items/{created['id']}"],
+        ["/api/items*"],
+    ]
@@ -0,0 +1,86 @@
+import json
+import logging
+
+from benchmarks.load import Request, function_url_event
+from benchmarks.replay import read_events
+from src.utils import service_logging
+from src.utils.service_logging import REDACTED, log_event, sanitize_event
+
+SECRETS = {
+    "authorization": "Bearer secret",
+    "x-origin-verify": "origin-secret",
+    "cookie": "session=secret",
+}
+
+
+def url_event() -> dict:
+    request = Request(
+        "POST",
+        "/api/items",
+        headers={**SECRETS, "content-type": "application/json"},
+        body=b'{"title": "private"}',
+    )
+    event = function_url_event(request)
+    event["cookies"] = ["session=secret"]
+    event["requestContext"]["http"]["sourceIp"] = "203.0.113.7"
+    return event
+
+
+def cloudfront_event() -> dict:
+    request = {
+        "clientIp": "203.0.113.7",
+        "method": "POST",
+        "uri": "/api/items",
+        "headers": {
+            "authorization": [{"key": "Authorization", "value": "Bearer secret"}],
+            "host": [{"key": "Host", "value": "example.com"}],
+        },
+        "body": {"action": "read-only", "encoding": "base64", "data": "c2VjcmV0"},
+    }
+    return {"Records": [{"cf": {"config": {}, "request": request}}]}
+
+
+def test_sanitize_function_url_event():
+    event = url_event()
+    sanitized = sanitize_event(event)
+
+    assert "secret" not in json.dumps(sanitized)
+    assert "203.0.113.7" not in json.dumps(sanitized)
+    assert {name: sanitized["headers"][name] for name in SECRETS} == dict.fromkeys(
+        SECRETS, REDACTED
+    )
+    assert sanitized["headers"]["content-type"] == "application/json"
+    assert sanitized["body"] is None
+    assert sanitized["rawPath"] == "/api/items"
+    # The original is untouched
+    assert event["headers"]["authorization"] == "Bearer secret"
+
+
+def test_sanitize_cloudfront_event():
+    sanitized = sanitize_event(cloudfront_event())
+    request = sanitized["Records"][0]["cf"]["request"]
+    assert "secret" not in json.dumps(sanitized)
+    assert request["headers"]["authorization"] == [
+        {"key": "Authorization", "value": REDACTED}
+    ]
+    assert request["headers"]["host"][0]["value"] == "example.com"
+    assert request["body"]["data"] == ""
+
+
+def test_bodies_are_kept_when_enabled(monkeypatch):
+    monkeypatch.setattr(service_logging.settings, "CAPTURE_EVENT_BODIES", True)
+    assert sanitize_event(url_event())["body"] == '{"title": "private"}'
+
+
+def test_captured_events_replay(caplog, tmp_path):
+    with caplog.at_level(logging.INFO):
+        log_event(url_event())
+    [record] = [
+        r
+        for r in caplog.records
+        if isinstance(r.msg, dict) and r.msg.get("log_type") == "aws_event"
+    ]
+    # What the JSON formatter writes, the log dict is merged into the line
+    path = tmp_path / "events.ndjson"
+    path.write_text(json.dumps({"levelname": "INFO", **record.msg}) + "\n")
+    assert list(read_events(path)) == [record.msg["aws_event"]]
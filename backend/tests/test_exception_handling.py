@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from src.utils.exception_handling import integrity_error_detail, parse_integrity_error
+
+INSERT = text(
+    "INSERT INTO item (id, title, description, is_active) "
+    "VALUES (gen_random_uuid(), :title, '', true)"
+)
+
+
+def duplicate_title_error(engine, title: str) -> IntegrityError:
+    with engine.connect() as conn:
+        conn.execute(INSERT, {"title": title})
+        conn.commit()
+        with pytest.raises(IntegrityError) as exc_info:
+            conn.execute(INSERT, {"title": title})
+    return exc_info.value
+
+
+async def duplicate_title_error_async(async_engine, title: str) -> IntegrityError:
+    async with async_engine.connect() as conn:
+        await conn.execute(INSERT, {"title": title})
+        await conn.commit()
+        with pytest.raises(IntegrityError) as exc_info:
+            await conn.execute(INSERT, {"title": title})
+    return exc_info.value
+
+
+@pytest.mark.parametrize("engine_name", ["sync", "async"])
+def test_parse_integrity_error(engine, async_engine, title_prefix, engine_name):
+    title = f"{title_prefix}a (b) c"
+    if engine_name == "sync":
+        exc = duplicate_title_error(engine, title)
+    else:
+        exc = asyncio.run(duplicate_title_error_async(async_engine, title))
+    assert parse_integrity_error(exc) == ("title", title)
+    assert integrity_error_detail(exc) == (
+        f"The title '{title}' already exists. Please create a unique title"
+    )
+
+
+def test_create_duplicate_title(client, title_prefix):
+    item = {"title": f"{title_prefix}duplicate", "description": "first"}
+    assert client.post("/api/items", json=item).status_code == 201
+    response = client.post("/api/items", json=item)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith(f"The title '{item['title']}'")
+
+
+def test_bulk_update_duplicate_title(client, title_prefix):
+    titles = [f"{title_prefix}one", f"{title_prefix}two"]
+    created = client.post(
+        "/api/items/bulk",
+        json={"items": [{"title": title, "description": ""} for title in titles]},
+    ).json()["items"]
+    # The second row takes the first row's title, so the set based update
+    # fails and rows are retried one at a time
+    response = client.patch(
+        "/api/items/bulk",
+        json={
+            "items": [
+                {"id": created[0]["id"], "description": "changed"},
+                {"id": created[1]["id"], "title": titles[0]},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    errors = response.json()["errors"]
+    assert [error["index"] for error in errors] == [1]
+    assert errors[0]["detail"].startswith(f"The title '{titles[0]}'")
@@ -0,0 +1,56 @@
+import pytest
+
+from src.api import items, items_async
+from src.utils.config import settings
+from src.utils.http_cache import cache_control, route_cache_control
+
+
+def scope(route, method: str = "GET") -> dict:
+    return {"type": "http", "method": method, "route": route}
+
+
+def routes(router) -> dict:
+    return {
+        (method, route.path): route
+        for route in router.routes
+        for method in route.methods
+    }
+
+
+def test_cache_control_directives():
+    def endpoint():
+        pass
+
+    assert cache_control(s_maxage=5)(endpoint) is endpoint
+    assert endpoint.cache_control == "public, max-age=0, s-maxage=5"
+    revalidated = cache_control(max_age=60, stale_while_revalidate=30)(endpoint)
+    assert revalidated.cache_control == "public, max-age=60, stale-while-revalidate=30"
+    # Shared caches never store private responses
+    assert cache_control(s_maxage=5, private=True)(endpoint).cache_control == (
+        "private, max-age=0"
+    )
+
+
+@pytest.mark.parametrize("router", [items.router, items_async.router])
+def test_route_cache_control_resolves_endpoints(router):
+    by_path = routes(router)
+    read_item = by_path[("GET", "/{item_id}")]
+    expected = f"public, max-age=0, s-maxage={settings.API_EDGE_CACHE_SECONDS}"
+
+    assert route_cache_control(scope(read_item), 200) == expected
+    assert route_cache_control(scope(read_item, "HEAD"), 304) == expected
+    assert route_cache_control(scope(by_path[("GET", "")]), 200) == expected
+    # Only routes that opt in
+    assert route_cache_control(scope(by_path[("GET", "/export")]), 200) is None
+
+
+@pytest.mark.parametrize("status_code", [201, 204, 400, 404, 412, 500])
+def test_only_200_and_304_are_cacheable(status_code):
+    read_item = routes(items.router)[("GET", "/{item_id}")]
+    assert route_cache_control(scope(read_item), status_code) is None
+
+
+def test_writes_and_unmatched_requests_are_not_cacheable():
+    read_item = routes(items.router)[("GET", "/{item_id}")]
+    assert route_cache_control(scope(read_item, "POST"), 200) is None
+    assert route_cache_control({"method": "GET"}, 200) is None
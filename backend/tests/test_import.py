@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import text
+
+from src import crud
+
+
+def encode(rows: list[dict], format: str) -> bytes:
+    if format == "ndjson":
+        return "".join(json.dumps(row) + "\n" for row in rows).encode()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["title", "description"])
+    for row in rows:
+        # A row without a description is written short, not as ""
+        writer.writerow([row[key] for key in ("title", "description") if key in row])
+    return buffer.getvalue().encode()
+
+
+def import_rows(client, rows: list[dict], format: str):
+    return client.post(
+        "/api/items/import", params={"format": format}, content=encode(rows, format)
+    )
+
+
+def stored_items(engine, title_prefix: str) -> dict[str, tuple[str, bool]]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT title, description, is_active FROM item "
+                "WHERE title LIKE :prefix"
+            ),
+            {"prefix": f"{title_prefix}%"},
+        )
+        return {title: (description, active) for title, description, active in rows}
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson"])
+def test_import_upserts_on_title(client, engine, title_prefix, format):
+    existing = f"{title_prefix}existing"
+    new = f"{title_prefix}new"
+    client.post("/api/items", json={"title": existing, "description": "old"})
+
+    response = import_rows(
+        client,
+        [
+            {"title": new, "description": "first"},
+            {"title": existing, "description": "updated"},
+            # No description
+            {"title": f"{title_prefix}invalid"},
+            {"title": new, "description": "last"},
+        ],
+        format,
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["updated"], result["rejected"]) == (1, 1, 2)
+    assert [error["index"] for error in result["errors"]] == [0, 2]
+    assert result["errors"][0]["detail"] == "Title repeated later in the upload"
+    assert stored_items(engine, title_prefix) == {
+        existing: ("updated", True),
+        new: ("last", True),
+    }
+
+
+def test_import_recreates_soft_deleted(client, engine, title_prefix, monkeypatch):
+    monkeypatch.setattr(crud.item, "soft_delete", True)
+    title = f"{title_prefix}deleted"
+    item = client.post("/api/items", json={"title": title, "description": "old"})
+    client.delete(f"/api/items/{item.json()['id']}")
+
+    response = import_rows(client, [{"title": title, "description": "new"}], "csv")
+
+    # A deleted item stays deleted, the title now belongs to a new one
+    assert (response.json()["inserted"], response.json()["updated"]) == (1, 0)
+    assert client.get(f"/api/items/{item.json()['id']}").status_code == 404
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT description, is_active FROM item WHERE title = :title"),
+            {"title": title},
+        )
+        assert sorted(rows) == [("new", True), ("old", False)]
@@ -0,0 +1,11 @@
+from benchmarks.import_time import APP_MODULE, load_budget, median_import_ms
+
+
+def test_cold_import_within_budget():
+    # Every cold start pays for this import, see benchmarks/import_time.py
+    # for the slowest modules when it fails
+    limit = load_budget(APP_MODULE)
+    median = median_import_ms(APP_MODULE, runs=3)
+    assert median <= limit, (
+        f"Cold import of {APP_MODULE} took {median:.1f}ms, budget {limit}ms"
+    )
@@ -0,0 +1,141 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from src.utils import timing
+from src.utils.config import settings
+from src.utils.http_cache import cache_control
+from src.utils.middleware import (
+    REQUEST_ID_HEADER,
+    RequestContextMiddleware,
+    request_id_for,
+)
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/items/{item_id}")
+    @cache_control(s_maxage=5)
+    def read_item(item_id: int, request: Request):
+        if item_id == 0:
+            return Response(status_code=404)
+        return {"request_id": request.state.request_id}
+
+    @app.post("/items/{item_id}")
+    @cache_control(s_maxage=5)
+    def update_item(item_id: int):
+        return {}
+
+    @app.get("/private")
+    @cache_control(s_maxage=5)
+    def private():
+        return Response(headers={"Cache-Control": "no-store"})
+
+    @app.get("/error")
+    def error():
+        raise RuntimeError("boom")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def logged(caplog, log_type: str) -> list[dict]:
+    return [
+        record.msg
+        for record in caplog.records
+        if isinstance(record.msg, dict) and record.msg.get("log_type") == log_type
+    ]
+
+
+def test_request_id_is_propagated(client):
+    response = client.get("/items/1", headers={REQUEST_ID_HEADER: "upstream-1.2:3"})
+    assert response.headers[REQUEST_ID_HEADER] == "upstream-1.2:3"
+    assert response.json()["request_id"] == "upstream-1.2:3"
+
+    # Ids that don't look like one are replaced
+    response = client.get("/items/1", headers={REQUEST_ID_HEADER: "a b\tc"})
+    generated = response.headers[REQUEST_ID_HEADER]
+    assert len(generated) == 32
+    assert response.json()["request_id"] == generated
+
+
+def test_request_id_falls_back_to_the_lambda_request_id():
+    scope = {
+        "headers": [],
+        "aws.context": SimpleNamespace(aws_request_id="lambda-request"),
+    }
+    assert request_id_for(scope) == "lambda-request"
+
+
+def test_cache_control_from_the_route(client):
+    assert client.get("/items/1").headers["Cache-Control"] == (
+        "public, max-age=0, s-maxage=5"
+    )
+    # Errors and writes are never cached
+    assert "Cache-Control" not in client.get("/items/0").headers
+    assert "Cache-Control" not in client.post("/items/1").headers
+    # A header the route set wins
+    assert client.get("/private").headers["Cache-Control"] == "no-store"
+
+
+def test_access_log_is_sampled(client, caplog, monkeypatch):
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 0.0)
+    client.get("/items/1")
+    client.get("/error")
+
+    # Only the error is kept when nothing is sampled
+    [record] = logged(caplog, "http_access")
+    assert (record["path"], record["status"]) == ("/error", 500)
+
+    caplog.clear()
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 1.0)
+    response = client.get(
+        "/items/1",
+        params={"q": "x"},
+        headers={"user-agent": "test", "authorization": "Bearer secret"},
+    )
+    [record] = logged(caplog, "http_access")
+    assert record["request_id"] == response.headers[REQUEST_ID_HEADER]
+    assert (record["method"], record["query"], record["status"]) == ("GET", "q=x", 200)
+    # Only allow-listed headers
+    assert record["headers"]["user-agent"] == "test"
+    assert "authorization" not in record["headers"]
+
+
+def test_slow_requests_are_always_logged(client, caplog, monkeypatch):
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "LOG_SLOW_REQUEST_MS", 0)
+    client.get("/items/1")
+    assert len(logged(caplog, "http_access")) == 1
+
+
+def test_emf_record(client, caplog, monkeypatch):
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr(timing, "ENABLED", True)
+    client.get("/items/1")
+    client.get("/missing")
+
+    first, unmatched = logged(caplog, "request_timing")
+    assert (first["Route"], first["status"]) == ("/items/{item_id}", 200)
+    assert first["SqlCount"] == 0
+    [metrics] = first["_aws"]["CloudWatchMetrics"]
+    assert metrics["Dimensions"] == [["Environment", "Route"]]
+    assert {metric["Name"] for metric in metrics["Metrics"]} == {
+        "Duration",
+        "SqlCount",
+    }
+    assert (unmatched["Route"], unmatched["status"]) == ("unmatched", 404)
+
+
+def test_no_emf_record_when_timing_is_off(client, caplog, monkeypatch):
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr(timing, "ENABLED", False)
+    client.get("/items/1")
+    assert logged(caplog, "request_timing") == []
@@ -0,0 +1,114 @@
+import logging
+
+import pytest
+
+from src.utils import migrations
+
+SCRIPT = '''"""{message}
+
+Revision ID: {revision}
+Revises: {down}
+"""
+revision = "{revision}"
+down_revision = {down_revision}
+'''
+
+
+def write_script(versions, revision: str, down_revision) -> None:
+    (versions / f"{revision}_migration.py").write_text(
+        SCRIPT.format(
+            message=f"migration {revision}",
+            revision=revision,
+            down=down_revision,
+            down_revision=repr(down_revision),
+        )
+    )
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = {"head": "b2", "up_to_date": False, "checked_at": None}
+    monkeypatch.setattr(migrations, "_state", state)
+    return state
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """The db's revision and the upgrades run, without a db"""
+    db = {"revision": "a1", "lookups": 0, "upgrades": 0}
+
+    def current_revision(engine):
+        db["lookups"] += 1
+        return db["revision"]
+
+    def run_upgrade():
+        db["upgrades"] += 1
+        db["revision"] = migrations.packaged_head()
+
+    monkeypatch.setattr(migrations, "current_revision", current_revision)
+    monkeypatch.setattr(migrations, "run_upgrade", run_upgrade)
+    return db
+
+
+def test_find_head_revision(tmp_path):
+    assert migrations.find_head_revision(tmp_path) is None
+    write_script(tmp_path, "a1", None)
+    write_script(tmp_path, "b2", "a1")
+    write_script(tmp_path, "c3", "a1")
+    (tmp_path / "__init__.py").write_text("")
+
+    with pytest.raises(RuntimeError, match="Multiple alembic heads"):
+        migrations.find_head_revision(tmp_path)
+    write_script(tmp_path, "d4", ("b2", "c3"))
+    assert migrations.find_head_revision(tmp_path) == "d4"
+
+
+def test_find_head_revision_agrees_with_alembic():
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory.from_config(Config(str(migrations.ALEMBIC_INI)))
+    assert migrations.find_head_revision() == script.get_current_head()
+
+
+def test_packaged_head_reads_the_head_file(tmp_path, monkeypatch, state):
+    head_file = tmp_path / "HEAD"
+    assert migrations.write_head_file(head_file) == migrations.find_head_revision()
+    assert head_file.read_text() == migrations.find_head_revision()
+
+    head_file.write_text("f00d\n")
+    monkeypatch.setattr(migrations, "HEAD_FILE", head_file)
+    monkeypatch.setattr(migrations, "find_head_revision", pytest.fail)
+    state["head"] = None
+    assert migrations.packaged_head() == "f00d"
+
+
+def test_ensure_migrated_upgrades_once(state, db):
+    assert migrations.ensure_migrated(None)
+    assert migrations.ensure_migrated(None)
+    assert (db["lookups"], db["upgrades"]) == (1, 1)
+    assert migrations.is_up_to_date()
+
+
+def test_ensure_migrated_backs_off_while_pending(state, db, caplog):
+    caplog.set_level(logging.WARNING, logger=migrations.__name__)
+    for _ in range(3):
+        assert not migrations.ensure_migrated(
+            None, allow_upgrade=False, recheck_after=60
+        )
+    assert (db["lookups"], db["upgrades"]) == (1, 0)
+    assert [record.msg["log_type"] for record in caplog.records] == [
+        "migration_pending"
+    ]
+
+    # Once the recheck is due, the migrate invocation has run
+    state["checked_at"] -= 60
+    db["revision"] = "b2"
+    assert migrations.ensure_migrated(None, allow_upgrade=False, recheck_after=60)
+    assert db["lookups"] == 2
+
+
+def test_migrate_action_ignores_the_back_off(state, db):
+    assert not migrations.ensure_migrated(None, allow_upgrade=False, recheck_after=60)
+    assert migrations.ensure_migrated(None)
+    assert db["upgrades"] == 1
@@ -0,0 +1,78 @@
+import base64
+import json
+
+import pytest
+
+from src.api.pagination import NEXT_CURSOR_HEADER
+from tests.conftest import SEED_ROWS, cursor_before_seeded_items
+
+
+def walk(client, title_prefix: str, **params) -> list[list[dict]]:
+    """Pages until the one that leaves the seeded rows behind"""
+    pages = []
+    while True:
+        response = client.get("/api/items", params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        params["cursor"] = response.headers.get(NEXT_CURSOR_HEADER)
+        last = pages[-1][-1]["title"] if pages[-1] else ""
+        if params["cursor"] is None or not last.startswith(title_prefix):
+            return pages
+
+
+def ids(pages: list[list[dict]], title_prefix: str) -> list[str]:
+    return [
+        item["id"]
+        for page in pages
+        for item in page
+        if item["title"].startswith(title_prefix)
+    ]
+
+
+def test_walk_with_tied_created(client, seeded_items, title_prefix):
+    cursor = cursor_before_seeded_items()
+    pages = walk(client, title_prefix, limit=2, cursor=cursor)
+
+    # Every row once, in order, across pages that split the ties
+    assert ids(pages, title_prefix) == seeded_items
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+
+def test_walk_descending(client, seeded_items, title_prefix):
+    pages = walk(client, title_prefix, limit=3, descending=True)
+
+    assert ids(pages, title_prefix) == seeded_items[::-1]
+
+
+def test_last_page_has_no_cursor(client, seeded_items):
+    # Exactly the rows that are left, so only the extra row tells there
+    # is no next page
+    response = client.get(
+        "/api/items",
+        params={"limit": SEED_ROWS, "cursor": cursor_before_seeded_items()},
+    )
+
+    assert [item["id"] for item in response.json()] == seeded_items
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def tampered(cursor: str) -> str:
+    order_by, descending, value, id = json.loads(base64.urlsafe_b64decode(cursor))
+    payload = json.dumps([order_by, descending, "not a date", id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor, params",
+    [
+        ("not-a-cursor", {}),
+        (base64.urlsafe_b64encode(b'["created"]').decode(), {}),
+        (tampered(cursor_before_seeded_items()), {}),
+        # Issued for ascending created
+        (cursor_before_seeded_items(), {"descending": True}),
+        (cursor_before_seeded_items(), {"order_by": "title"}),
+    ],
+)
+def test_invalid_cursor(client, cursor, params):
+    response = client.get("/api/items", params={"cursor": cursor, **params})
+    assert response.status_code == 400
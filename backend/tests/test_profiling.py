@@ -0,0 +1,45 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.utils.config import settings
+from src.utils.http_cache import cache_control
+from src.utils.middleware import RequestContextMiddleware
+from src.utils.profiling import ProfilingMiddleware
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SECRET", SECRET)
+    monkeypatch.setattr(settings, "PROFILING_OUTPUT_DIR", None)
+    app = FastAPI()
+
+    @app.get("/hello")
+    @cache_control(max_age=60, s_maxage=3600)
+    def read_hello():
+        return {"Hello": "World"}
+
+    # Same order as src.main
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+    return TestClient(app)
+
+
+def test_profile_is_never_cached(client):
+    response = client.get(
+        "/hello", params={"profile": 1}, headers={"Profile-Secret": SECRET}
+    )
+    assert response.status_code == 200
+    assert response.headers["profiled-status"] == "200"
+    assert response.headers["cache-control"] == "no-store"
+
+
+@pytest.mark.parametrize("secret", [None, "wrong"])
+def test_unprofiled_response_keeps_route_cache_control(client, secret):
+    headers = {"Profile-Secret": secret} if secret else {}
+    response = client.get("/hello", params={"profile": 1}, headers=headers)
+    assert response.json() == {"Hello": "World"}
+    assert "profiled-status" not in response.headers
+    assert response.headers["cache-control"] == "public, max-age=60, s-maxage=3600"
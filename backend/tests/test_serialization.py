@@ -0,0 +1,30 @@
+import json
+
+from pydantic import TypeAdapter
+from sqlmodel import Session
+
+from src import crud
+from src.api.serialization import item_list_serializer
+from src.models import ItemRead
+
+
+def test_rows_dump_like_the_response_model(client, engine, title_prefix):
+    client.post(
+        "/api/items/bulk",
+        json={
+            "items": [
+                {"title": f"{title_prefix}{i}", "description": 'a "quoted" \\ value'}
+                for i in range(3)
+            ]
+        },
+    )
+    with Session(engine) as db:
+        rows = crud.item.get_page(db=db, limit=1000).items
+        expected = TypeAdapter(list[ItemRead]).dump_json(
+            TypeAdapter(list[ItemRead]).validate_python(rows, from_attributes=True),
+            by_alias=True,
+        )
+        assert json.loads(item_list_serializer.dump_json(rows)) == json.loads(expected)
+
+    listed = client.get("/api/items", params={"limit": 1000}).json()
+    assert set(listed[0]) == {"id", "title", "description", "isActive", "updated"}
@@ -0,0 +1,36 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from mangum import Mangum
+
+from benchmarks.load import Request, function_url_event
+from src.utils import service_logging  # noqa: F401, sets the log levels
+
+
+@pytest.fixture
+def current_loop():
+    # Mangum runs on the current loop, which earlier asyncio.run calls unset
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+def test_mangum_request_lines_are_off(caplog, current_loop):
+    # Only the sampled access log writes a line per request
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    def read_item(item_id: int):
+        return {"id": item_id}
+
+    handler = Mangum(app, lifespan="off")
+    context = SimpleNamespace(aws_request_id="test-request")
+    with caplog.at_level(logging.INFO):
+        response = handler(function_url_event(Request("GET", "/api/items/x")), context)
+    assert response["statusCode"] == 422
+    assert [r for r in caplog.records if r.name.startswith("mangum")] == []
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.models import session
+from src.models.session import InstrumentedQueuePool, PoolMetrics
+
+
+@pytest.fixture
+def metrics(monkeypatch) -> PoolMetrics:
+    metrics = PoolMetrics()
+    monkeypatch.setattr(session, "pool_metrics", metrics)
+    return metrics
+
+
+@pytest.fixture
+def one_connection_engine(engine):
+    db_engine = create_engine(
+        engine.url, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+    )
+    session._listen_pool_events(db_engine)
+    yield db_engine
+    db_engine.dispose()
+
+
+def test_opening_a_connection_is_not_a_wait(one_connection_engine, metrics):
+    with one_connection_engine.connect():
+        pass
+    assert (metrics.connects, metrics.waits) == (1, 0)
+    assert metrics.connect_seconds > 0
+
+    # The idle connection is taken straight from the pool
+    with one_connection_engine.connect():
+        pass
+    assert (metrics.checkouts, metrics.connects, metrics.waits) == (2, 1, 0)
+    assert metrics.connections_created == 1
+
+
+def test_waiting_for_a_checked_out_connection(one_connection_engine, metrics):
+    held = threading.Event()
+
+    def hold():
+        with one_connection_engine.connect():
+            held.set()
+            time.sleep(0.05)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    with one_connection_engine.connect():
+        pass
+    holder.join()
+
+    assert (metrics.connects, metrics.waits) == (1, 1)
+    assert metrics.wait_seconds >= 0.02
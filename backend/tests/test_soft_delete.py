@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import text
+
+from src import crud
+from src.utils.cache import MemoryCache
+
+
+@pytest.fixture(params=["no cache", "memory cache"])
+def soft_delete(request, monkeypatch):
+    monkeypatch.setattr(crud.item, "soft_delete", True)
+    if request.param == "memory cache":
+        monkeypatch.setattr(crud.item, "cache", MemoryCache(max_entries=100, ttl=60))
+
+
+def create_items(client, title_prefix: str, count: int) -> list[dict]:
+    items = [{"title": f"{title_prefix}{i}", "description": ""} for i in range(count)]
+    response = client.post("/api/items/bulk", json={"items": items})
+    return response.json()["items"]
+
+
+def bulk_delete(client, ids: list[str]):
+    return client.request("DELETE", "/api/items/bulk", json={"ids": ids})
+
+
+def listed_ids(client, **headers) -> set[str]:
+    response = client.get("/api/items", params={"limit": 1000}, headers=headers)
+    return {item["id"] for item in response.json()}
+
+
+def active_flags(engine, title_prefix: str) -> dict[str, bool]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT id, is_active FROM item WHERE title LIKE :prefix"),
+            {"prefix": f"{title_prefix}%"},
+        )
+        return {str(id): is_active for id, is_active in rows}
+
+
+def test_deleted_items_are_hidden(client, engine, title_prefix, soft_delete):
+    kept, deleted, bulk_deleted, patched = [
+        item["id"] for item in create_items(client, title_prefix, 4)
+    ]
+    for id in (kept, deleted, bulk_deleted, patched):
+        # Cached when a cache is configured
+        assert client.get(f"/api/items/{id}").status_code == 200
+    etag = client.get("/api/items", params={"limit": 1000}).headers["ETag"]
+
+    assert client.delete(f"/api/items/{deleted}").status_code == 204
+    response = bulk_delete(client, [bulk_deleted])
+    assert response.json() == {"ids": [bulk_deleted], "errors": []}
+    response = client.patch(f"/api/items/{patched}", json={"isActive": False})
+    assert response.status_code == 200
+
+    # The rows are still there, only marked inactive
+    assert active_flags(engine, title_prefix) == {
+        kept: True,
+        deleted: False,
+        bulk_deleted: False,
+        patched: False,
+    }
+    assert client.get(f"/api/items/{kept}").status_code == 200
+    for id in (deleted, bulk_deleted, patched):
+        assert client.get(f"/api/items/{id}").status_code == 404
+        assert client.patch(f"/api/items/{id}", json={}).status_code == 404
+        assert client.delete(f"/api/items/{id}").status_code == 404
+    ids = listed_ids(client)
+    assert kept in ids
+    assert not {deleted, bulk_deleted, patched} & ids
+    # The list changed, so the old ETag no longer matches
+    assert listed_ids(client, **{"If-None-Match": etag}) == ids
+
+    response = bulk_delete(client, [deleted, bulk_deleted, kept])
+    assert response.json()["ids"] == [kept]
+    assert [error["index"] for error in response.json()["errors"]] == [0, 1]
+    assert active_flags(engine, title_prefix)[kept] is False
+
+
+def test_hard_delete(client, engine, title_prefix):
+    first, second = [item["id"] for item in create_items(client, title_prefix, 2)]
+    assert client.delete(f"/api/items/{first}").status_code == 204
+    assert bulk_delete(client, [second]).json()["ids"] == [second]
+    assert active_flags(engine, title_prefix) == {}
+    for id in (first, second):
+        assert client.get(f"/api/items/{id}").status_code == 404
+
+
+def test_deleted_title_can_be_reused(client, engine, title_prefix, soft_delete):
+    title = f"{title_prefix}reused"
+    item = {"title": title, "description": "first"}
+    deleted = client.post("/api/items", json=item).json()["id"]
+    assert client.delete(f"/api/items/{deleted}").status_code == 204
+
+    response = client.post("/api/items", json={**item, "description": "second"})
+    assert response.status_code == 201
+    recreated = response.json()["id"]
+    assert recreated != deleted
+    assert client.get(f"/api/items/{deleted}").status_code == 404
+    assert client.get(f"/api/items/{recreated}").json()["description"] == "second"
+
+    # Still unique among active items, in bulk too
+    assert client.post("/api/items", json=item).status_code == 400
+    assert bulk_delete(client, [recreated]).json()["ids"] == [recreated]
+    response = client.post("/api/items/bulk", json={"items": [item, item]})
+    assert [error["index"] for error in response.json()["errors"]] == [1]
+    assert active_flags(engine, title_prefix) == {
+        deleted: False,
+        recreated: False,
+        response.json()["items"][0]["id"]: True,
+    }
@@ -0,0 +1,71 @@
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool
+
+from src.utils import timing
+from src.utils.middleware import SERVER_TIMING_HEADER, RequestContextMiddleware
+
+
+def hooked(db_engine) -> bool:
+    return event.contains(
+        db_engine, "before_cursor_execute", timing._before_cursor_execute
+    ) or event.contains(db_engine, "after_cursor_execute", timing._after_cursor_execute)
+
+
+@pytest.fixture
+def timed_client(engine, monkeypatch):
+    """
+    An app making two queries and timing a phase, on an engine instrumented
+    with whatever timing.ENABLED is when it is called
+    """
+
+    def build(enabled: bool) -> tuple[TestClient, object]:
+        monkeypatch.setattr(timing, "ENABLED", enabled)
+        db_engine = create_engine(engine.url, poolclass=NullPool)
+        timing.instrument_engine(db_engine)
+        app = FastAPI()
+        app.add_middleware(RequestContextMiddleware)
+
+        @app.get("/items")
+        def read_items():
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+            with timing.phase("serialize"):
+                return []
+
+        return TestClient(app), db_engine
+
+    return build
+
+
+def test_server_timing_phases(timed_client):
+    client, db_engine = timed_client(enabled=True)
+    assert hooked(db_engine)
+
+    header = client.get("/items").headers[SERVER_TIMING_HEADER]
+
+    names = [entry.split(";")[0] for entry in header.split(", ")]
+    assert names == ["sql", "serialize", "total"]
+    assert 'desc="2 queries"' in header
+    durations = [float(ms) for ms in re.findall(r"dur=([\d.]+)", header)]
+    # The total covers the phases within it
+    assert durations[-1] >= sum(durations[:-1])
+
+
+def test_disabled_adds_no_header_or_hooks(timed_client):
+    client, db_engine = timed_client(enabled=False)
+    assert not hooked(db_engine)
+    assert timing.phase("serialize") is timing._null_phase
+
+    assert SERVER_TIMING_HEADER not in client.get("/items").headers
+
+
+def test_app_engine_is_not_hooked_when_disabled(engine):
+    if timing.ENABLED:
+        pytest.skip("REQUEST_TIMING is on")
+    assert not hooked(engine)
@@ -22,6 +22,37 @@ DB_PASSWORD = config.require_secret("db_password")
 # us-east-1 regardless of your default AWS region
 us_east_1 = aws.Provider("us-east-1", region="us-east-1")
 
+# API reads cached at the edge. Routes opt in with Cache-Control s-maxage,
+# which CloudFront caps at the max TTL.
+api_cache_max_ttl = config.get_int("api-cache-max-ttl") or 60
+# Paths whose GETs may be cached. Everything else under api/ never is.
+api_cacheable_paths = ["api/items*", "api/hello"]
+
+# Lambda. Memory also sets the CPU share, one full vCPU at 1769MB, see
+# backend/benchmarks/power_tuning.py for picking it.
+lambda_memory_size = config.get_int("lambda-memory-size") or 256
+# Caps concurrent executions and sets them aside from the account's pool.
+# Unset is unreserved, 0 stops all invocations.
+lambda_reserved_concurrency = config.get_int("lambda-reserved-concurrency")
+# Execution environments kept initialized on the alias, so requests up to
+# this concurrency never see a cold start. 0 is none.
+lambda_provisioned_concurrency = config.get_int("lambda-provisioned-concurrency") or 0
+# Auto scaling of provisioned concurrency between the value above and this
+# maximum, tracking utilization. 0 turns it off.
+lambda_provisioned_concurrency_max = (
+    config.get_int("lambda-provisioned-concurrency-max") or 0
+)
+lambda_provisioned_utilization = (
+    config.get_float("lambda-provisioned-utilization") or 0.7
+)
+# Scheduled changes to the auto scaling range, e.g.
+# [{"name": "business-hours", "schedule": "cron(0 13 ? * MON-FRI *)",
+#   "min": 5, "max": 20}, ...]
+lambda_provisioned_schedules = config.get_object("lambda-provisioned-schedules") or []
+# Logs sanitized events for backend/benchmarks/replay.py. Turn it on for as
+# long as it takes to record a sample, it adds a log line per invocation.
+lambda_capture_events = config.get_bool("lambda-capture-events") or False
+
 # UI
 static_site_path = "../ui/build"
 # TODO - ADD WAF with CORE RULES TO CLOUDFRONT DISTRO
@@ -0,0 +1,98 @@
+"""
+Moves a stack from the one aws.s3.BucketObject per UI file that s3.py used
+to create onto StaticSiteSync. Run it once per stack, before the first
+`pulumi up` that has StaticSiteSync in it:
+
+    cd infra; python migrate_static_site.py --stack dev
+
+Just dropping the BucketObjects from the program makes that `pulumi up`
+delete their objects at the end of the update, after StaticSiteSync has
+uploaded the same keys, which empties the site. This removes them from the
+stack's state instead, like `pulumi state delete` on each one, so Pulumi
+forgets them and leaves the objects in the bucket. StaticSiteSync then
+takes them over by uploading every file on its first deploy.
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+
+BUCKET = "aws:s3/bucket:Bucket"
+BUCKET_OBJECT = "aws:s3/bucketObject:BucketObject"
+STATIC_BUCKET_SUFFIX = "-static-bucket"
+
+
+def legacy_bucket_objects(deployment: dict) -> list[str]:
+    """URNs of the BucketObjects parented to the static site bucket"""
+    buckets = {
+        resource["urn"]
+        for resource in deployment["resources"]
+        if resource["type"] == BUCKET
+        and resource["urn"].endswith(STATIC_BUCKET_SUFFIX)
+    }
+    return [
+        resource["urn"]
+        for resource in deployment["resources"]
+        if resource["type"] == BUCKET_OBJECT and resource.get("parent") in buckets
+    ]
+
+
+def forget(deployment: dict, urns: list[str]) -> dict:
+    """The deployment without the given resources"""
+    forgotten = set(urns)
+    for resource in deployment["resources"]:
+        if forgotten & set(resource.get("dependencies") or []):
+            raise ValueError(f"{resource['urn']} depends on a static site object")
+    return {
+        **deployment,
+        "resources": [
+            resource
+            for resource in deployment["resources"]
+            if resource["urn"] not in forgotten
+        ],
+    }
+
+
+def pulumi(*args: str) -> str:
+    return subprocess.run(
+        ["pulumi", *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Forget the per file static site BucketObjects"
+    )
+    parser.add_argument("--stack", required=True)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only list the objects to forget"
+    )
+    args = parser.parse_args()
+
+    state = json.loads(pulumi("stack", "export", "--stack", args.stack))
+    urns = legacy_bucket_objects(state["deployment"])
+    for urn in urns:
+        print(urn)
+    if not urns:
+        print("Nothing to migrate")
+        return
+    if args.dry_run:
+        return
+
+    directory = tempfile.mkdtemp(prefix=f"{args.stack}-state-")
+    backup = os.path.join(directory, "backup.json")
+    migrated = os.path.join(directory, "migrated.json")
+    with open(backup, "w") as file:
+        json.dump(state, file)
+    with open(migrated, "w") as file:
+        json.dump({**state, "deployment": forget(state["deployment"], urns)}, file)
+    pulumi("stack", "import", "--stack", args.stack, "--file", migrated)
+    print(
+        f"Forgot {len(urns)} objects, they are still in the bucket. To undo: "
+        f"pulumi stack import --stack {args.stack} --file {backup}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,24 @@
+import json
 import platform
 
+import pulumi
 import pulumi_aws as aws
 
-from config import env, prefix, DB_USER, DB_PASSWORD, DB_NAME
+from config import (
+    env,
+    prefix,
+    DB_USER,
+    DB_PASSWORD,
+    DB_NAME,
+    PROD,
+    lambda_capture_events,
+    lambda_memory_size,
+    lambda_provisioned_concurrency,
+    lambda_provisioned_concurrency_max,
+    lambda_provisioned_schedules,
+    lambda_provisioned_utilization,
+    lambda_reserved_concurrency,
+)
 from resources.ecr import image
 from resources.iam import lambda_role
 from resources.rds import db
@@ -24,18 +40,26 @@ fastapi_lambda = aws.lambda_.Function(
         variables={
             "FUNCTION_NAME": f"{prefix}-lambda",
             "ENV_NAME": env,
+            "ENABLE_API_DOCS": str(env != PROD).lower(),
             "POSTGRES_SERVER": db.endpoint.apply(
                 lambda endpoint: endpoint.replace(":5432", "")
             ),
             "POSTGRES_USER": DB_USER,
             "POSTGRES_PASSWORD": DB_PASSWORD,
             "POSTGRES_DB": DB_NAME,
+            "CAPTURE_EVENTS": str(lambda_capture_events).lower(),
+            # Migrations run from migrate_invocation below, not from
+            # containers starting up to serve requests
+            "MIGRATE_ON_INIT": "false",
         }
     ),
     image_uri=image.image_uri,
-    memory_size=256,
+    memory_size=lambda_memory_size,
     package_type="Image",
     publish=True,
+    reserved_concurrent_executions=(
+        -1 if lambda_reserved_concurrency is None else lambda_reserved_concurrency
+    ),
     role=lambda_role.arn,
     timeout=600,
     vpc_config=aws.lambda_.FunctionVpcConfigArgs(
@@ -44,10 +68,82 @@ fastapi_lambda = aws.lambda_.Function(
     ),
 )
 
+# Brings the db to the new image's head once per deploy, through the
+# {"action": "migrate"} event lambda_handler handles. Fails the update if
+# the migration fails. The alias only moves to the new version once this
+# has run, the previous release serves against the migrated db until then
+# so migrations have to stay compatible with it.
+migrate_invocation = aws.lambda_.Invocation(
+    f"{prefix}-lambda-migrate",
+    function_name=fastapi_lambda.name,
+    qualifier=fastapi_lambda.version,
+    input=json.dumps({"action": "migrate"}),
+    triggers={"image_uri": image.image_uri},
+)
+
 lambda_alias = aws.lambda_.Alias(
     f"{prefix}-lambda-alias",
     name=f"{prefix}-lambda-alias",
     description="Alias for fastapi lambda",
     function_name=fastapi_lambda.name,
     function_version=fastapi_lambda.version,
+    opts=pulumi.ResourceOptions(depends_on=[migrate_invocation]),
 )
+
+# SnapStart isn't available for container image functions, provisioned
+# concurrency is how cold starts are avoided here
+if lambda_provisioned_concurrency:
+    autoscaled = bool(lambda_provisioned_concurrency_max)
+    lambda_provisioned_concurrency_config = aws.lambda_.ProvisionedConcurrencyConfig(
+        f"{prefix}-lambda-provisioned-concurrency",
+        function_name=fastapi_lambda.name,
+        qualifier=lambda_alias.name,
+        provisioned_concurrent_executions=lambda_provisioned_concurrency,
+        # Auto scaling owns the value once it is on
+        opts=pulumi.ResourceOptions(
+            ignore_changes=["provisionedConcurrentExecutions"] if autoscaled else []
+        ),
+    )
+
+    if autoscaled:
+        lambda_scaling_target = aws.appautoscaling.Target(
+            f"{prefix}-lambda-scaling-target",
+            service_namespace="lambda",
+            scalable_dimension="lambda:function:ProvisionedConcurrency",
+            resource_id=pulumi.Output.concat(
+                "function:", fastapi_lambda.name, ":", lambda_alias.name
+            ),
+            min_capacity=lambda_provisioned_concurrency,
+            max_capacity=lambda_provisioned_concurrency_max,
+            opts=pulumi.ResourceOptions(
+                depends_on=[lambda_provisioned_concurrency_config]
+            ),
+        )
+
+        lambda_scaling_policy = aws.appautoscaling.Policy(
+            f"{prefix}-lambda-scaling-policy",
+            policy_type="TargetTrackingScaling",
+            service_namespace=lambda_scaling_target.service_namespace,
+            scalable_dimension=lambda_scaling_target.scalable_dimension,
+            resource_id=lambda_scaling_target.resource_id,
+            target_tracking_scaling_policy_configuration=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationArgs(
+                target_value=lambda_provisioned_utilization,
+                predefined_metric_specification=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationPredefinedMetricSpecificationArgs(
+                    predefined_metric_type="LambdaProvisionedConcurrencyUtilization",
+                ),
+            ),
+        )
+
+        for schedule in lambda_provisioned_schedules:
+            aws.appautoscaling.ScheduledAction(
+                f"{prefix}-lambda-scaling-{schedule['name']}",
+                service_namespace=lambda_scaling_target.service_namespace,
+                scalable_dimension=lambda_scaling_target.scalable_dimension,
+                resource_id=lambda_scaling_target.resource_id,
+                schedule=schedule["schedule"],
+                timezone=schedule.get("timezone"),
+                scalable_target_action=aws.appautoscaling.ScheduledActionScalableTargetActionArgs(
+                    min_capacity=schedule["min"],
+                    max_capacity=schedule["max"],
+                ),
+            )
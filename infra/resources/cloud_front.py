@@ -7,16 +7,142 @@ from config import (
     PROD,
     origin_header_value,
     origin_header_name,
+    api_cache_max_ttl,
+    api_cacheable_paths,
 )
 from resources.acm import cert
 from resources.api_gateway import api_gw_stage
 from resources.route_53 import hosted_zone
-from resources.s3 import cf_log_bucket, static_bucket
+from resources.invalidation import CloudFrontInvalidation
+from resources.s3 import cf_log_bucket, static_bucket, static_site_sync
+from resources.static_site import (
+    ENCODING_SUFFIXES,
+    HASHED_PREFIX,
+    PRECOMPRESSED_EXTENSIONS,
+)
 
 # from resources.waf_v2 import aws_managed_rules_acl
 
 alias = domain_name if env == PROD else f"{env}.{domain_name}"
 
+ONE_YEAR = 31536000
+
+
+def create_static_cache_policy() -> aws.cloudfront.CachePolicy:
+    # TTLs come from the Cache-Control headers set on upload (immutable for
+    # hashed assets, no-cache for html). Objects without one aren't cached.
+    return aws.cloudfront.CachePolicy(
+        f"{prefix}-static-cache-policy",
+        name=f"{prefix}-static-cache-policy",
+        min_ttl=0,
+        default_ttl=0,
+        max_ttl=ONE_YEAR,
+        parameters_in_cache_key_and_forwarded_to_origin=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginArgs(
+            cookies_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginCookiesConfigArgs(
+                cookie_behavior="none",
+            ),
+            headers_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginHeadersConfigArgs(
+                header_behavior="none",
+            ),
+            query_strings_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginQueryStringsConfigArgs(
+                query_string_behavior="none",
+            ),
+            # Also puts the normalized Accept-Encoding in the cache key, so
+            # the precompressed variants are cached separately
+            enable_accept_encoding_brotli=True,
+            enable_accept_encoding_gzip=True,
+        ),
+    )
+
+
+def create_api_read_cache_policy() -> aws.cloudfront.CachePolicy:
+    # No default TTL, so only responses with a Cache-Control from the route
+    # (see src.utils.http_cache in the backend) are cached. Writes never
+    # are, CloudFront only caches GET and HEAD.
+    return aws.cloudfront.CachePolicy(
+        f"{prefix}-api-read-cache-policy",
+        name=f"{prefix}-api-read-cache-policy",
+        min_ttl=0,
+        default_ttl=0,
+        max_ttl=api_cache_max_ttl,
+        parameters_in_cache_key_and_forwarded_to_origin=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginArgs(
+            cookies_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginCookiesConfigArgs(
+                cookie_behavior="none",
+            ),
+            # Keyed on Authorization so one caller never gets another's
+            # response
+            headers_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginHeadersConfigArgs(
+                header_behavior="whitelist",
+                headers=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginHeadersConfigHeadersArgs(
+                    items=["Authorization"],
+                ),
+            ),
+            query_strings_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginQueryStringsConfigArgs(
+                query_string_behavior="all",
+            ),
+            enable_accept_encoding_brotli=True,
+            enable_accept_encoding_gzip=True,
+        ),
+    )
+
+
+def precompressed_function_code() -> str:
+    # cloudfront-js-1.0 is ES5.1, so no let, arrow functions or includes
+    extensions = "|".join(ext.lstrip(".") for ext in PRECOMPRESSED_EXTENSIONS)
+    return f"""
+function accepts(header, coding) {{
+    // Accept-Encoding is a comma separated list like "gzip, br;q=0". A
+    // coding with q=0 is refused, a missing one falls back to "*".
+    var tokens = header.toLowerCase().split(",");
+    var wildcard = false;
+    for (var i = 0; i < tokens.length; i++) {{
+        var params = tokens[i].split(";");
+        var name = params[0].trim();
+        var accepted = true;
+        for (var j = 1; j < params.length; j++) {{
+            var param = params[j].trim();
+            if (param.indexOf("q=") === 0 && !(parseFloat(param.slice(2)) > 0)) {{
+                accepted = false;
+            }}
+        }}
+        if (name === coding) {{
+            return accepted;
+        }}
+        if (name === "*") {{
+            wildcard = accepted;
+        }}
+    }}
+    return wildcard;
+}}
+
+function handler(event) {{
+    var request = event.request;
+    if (request.uri.indexOf("/{HASHED_PREFIX}") !== 0
+        || !/\\.({extensions})$/.test(request.uri)) {{
+        return request;
+    }}
+    var header = request.headers["accept-encoding"];
+    var accepted = header ? header.value : "";
+    if (accepts(accepted, "br")) {{
+        request.uri += "{ENCODING_SUFFIXES["br"]}";
+    }} else if (accepts(accepted, "gzip")) {{
+        request.uri += "{ENCODING_SUFFIXES["gzip"]}";
+    }}
+    return request;
+}}
+"""
+
+
+def create_precompressed_function() -> aws.cloudfront.Function:
+    return aws.cloudfront.Function(
+        f"{prefix}-precompressed-assets",
+        name=f"{prefix}-precompressed-assets",
+        comment="Serve precompressed variants of static assets",
+        runtime="cloudfront-js-1.0",
+        code=precompressed_function_code(),
+        publish=True,
+    )
+
 
 def create_cloudfront_distribution(
     certificate: aws.acm.Certificate,
@@ -31,6 +157,8 @@ def create_cloudfront_distribution(
         signing_behavior="always",
         signing_protocol="sigv4",
     )
+    static_cache_policy = create_static_cache_policy()
+    precompressed_function = create_precompressed_function()
     api_gateway_origin_id = f"{prefix}-fastapi_gateway-origin-id"
     api_gateway_cache_policy = aws.cloudfront.get_cache_policy(
         name="Managed-CachingDisabled"
@@ -38,6 +166,27 @@ def create_cloudfront_distribution(
     api_gateway_origin_request_policy = aws.cloudfront.get_origin_request_policy(
         name="Managed-AllViewerExceptHostHeader"
     )
+    api_read_cache_policy = create_api_read_cache_policy()
+
+    def api_behavior(path_pattern, cache_policy_id):
+        return aws.cloudfront.DistributionOrderedCacheBehaviorArgs(
+            path_pattern=path_pattern,
+            target_origin_id=api_gateway_origin_id,
+            viewer_protocol_policy="redirect-to-https",
+            cached_methods=["GET", "HEAD"],
+            allowed_methods=[
+                "GET",
+                "HEAD",
+                "OPTIONS",
+                "PUT",
+                "POST",
+                "PATCH",
+                "DELETE",
+            ],
+            compress=True,
+            cache_policy_id=cache_policy_id,
+            origin_request_policy_id=api_gateway_origin_request_policy.id,
+        )
 
     return aws.cloudfront.Distribution(
         f"{prefix}-distribution",
@@ -66,36 +215,26 @@ def create_cloudfront_distribution(
                 "HEAD",
             ],
             target_origin_id=s3_origin_id,
-            forwarded_values=aws.cloudfront.DistributionDefaultCacheBehaviorForwardedValuesArgs(
-                query_string=False,
-                cookies=aws.cloudfront.DistributionDefaultCacheBehaviorForwardedValuesCookiesArgs(
-                    forward="none",
-                ),
-            ),
+            cache_policy_id=static_cache_policy.id,
+            # Compresses anything that wasn't uploaded precompressed
+            compress=True,
+            function_associations=[
+                aws.cloudfront.DistributionDefaultCacheBehaviorFunctionAssociationArgs(
+                    event_type="viewer-request",
+                    function_arn=precompressed_function.arn,
+                )
+            ],
             viewer_protocol_policy="redirect-to-https",
-            min_ttl=0,
-            default_ttl=0,
-            max_ttl=0,
         ),
         default_root_object="index.html",
+        # First match wins, so the cacheable read paths go before the
+        # catch-all that never caches
         ordered_cache_behaviors=[
-            aws.cloudfront.DistributionOrderedCacheBehaviorArgs(
-                path_pattern="api/*",
-                target_origin_id=api_gateway_origin_id,
-                viewer_protocol_policy="redirect-to-https",
-                cached_methods=["GET", "HEAD"],
-                allowed_methods=[
-                    "GET",
-                    "HEAD",
-                    "OPTIONS",
-                    "PUT",
-                    "POST",
-                    "PATCH",
-                    "DELETE",
-                ],
-                cache_policy_id=api_gateway_cache_policy.id,
-                origin_request_policy_id=api_gateway_origin_request_policy.id,
-            )
+            *[
+                api_behavior(path_pattern, api_read_cache_policy.id)
+                for path_pattern in api_cacheable_paths
+            ],
+            api_behavior("api/*", api_gateway_cache_policy.id),
         ],
         enabled=True,
         is_ipv6_enabled=True,
@@ -156,6 +295,15 @@ cf_distro = create_cloudfront_distribution(
     certificate=cert, bucket=static_bucket, api_gateway_stage=api_gw_stage
 )
 
+# Hashed assets are immutable, so a deploy only needs to invalidate the
+# few non-hashed files it actually changed (index.html and friends)
+static_invalidation = CloudFrontInvalidation(
+    f"{prefix}-static-invalidation",
+    distribution_id=cf_distro.id,
+    paths=static_site_sync.invalidation_paths,
+    version=static_site_sync.manifest_hash,
+)
+
 
 def create_dns_records(
     distribution: aws.cloudfront.Distribution,
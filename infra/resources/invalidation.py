@@ -0,0 +1,91 @@
+import uuid
+from typing import Optional
+
+import pulumi
+from pulumi.dynamic import (
+    CreateResult,
+    DiffResult,
+    ResourceProvider,
+    Resource,
+    UpdateResult,
+)
+
+# CloudFront allows 3000 file paths in progress per distribution
+MAX_PATHS_PER_INVALIDATION = 1000
+
+
+class CloudFrontInvalidationProvider(ResourceProvider):
+    """Creates invalidations for exactly the given paths, never /*"""
+
+    def _client(self):
+        # Imported here, the provider is serialized into the Pulumi state
+        import boto3
+
+        return boto3.client("cloudfront")
+
+    def _invalidate(self, props: dict) -> list[str]:
+        paths = props["paths"] or []
+        if not paths:
+            return []
+        client = self._client()
+        invalidation_ids = []
+        for start in range(0, len(paths), MAX_PATHS_PER_INVALIDATION):
+            batch = paths[start : start + MAX_PATHS_PER_INVALIDATION]
+            response = client.create_invalidation(
+                DistributionId=props["distribution_id"],
+                InvalidationBatch={
+                    "Paths": {"Quantity": len(batch), "Items": batch},
+                    "CallerReference": str(uuid.uuid4()),
+                },
+            )
+            invalidation_ids.append(response["Invalidation"]["Id"])
+        return invalidation_ids
+
+    def create(self, props: dict) -> CreateResult:
+        invalidation_ids = self._invalidate(props)
+        return CreateResult(
+            id_=str(uuid.uuid4()),
+            outs={**props, "invalidation_ids": invalidation_ids},
+        )
+
+    def diff(self, id: str, olds: dict, news: dict) -> DiffResult:
+        # version rather than paths, the same paths change again on the
+        # next deploy that touches index.html
+        changes = (
+            olds["version"] != news["version"]
+            or olds["distribution_id"] != news["distribution_id"]
+        )
+        return DiffResult(changes=changes)
+
+    def update(self, id: str, olds: dict, news: dict) -> UpdateResult:
+        invalidation_ids = self._invalidate(news)
+        return UpdateResult(outs={**news, "invalidation_ids": invalidation_ids})
+
+
+class CloudFrontInvalidation(Resource):
+    """
+    Invalidates `paths` on the distribution whenever `version` changes.
+    Deleting it does nothing, invalidations can't be undone.
+    """
+
+    invalidation_ids: pulumi.Output[list]
+
+    def __init__(
+        self,
+        name: str,
+        distribution_id: pulumi.Input[str],
+        paths: pulumi.Input[list],
+        version: pulumi.Input[str],
+        opts: Optional[pulumi.ResourceOptions] = None,
+    ):
+        super().__init__(
+            CloudFrontInvalidationProvider(),
+            name,
+            {
+                "distribution_id": distribution_id,
+                "paths": paths,
+                "version": version,
+                "invalidation_ids": None,
+            },
+            opts,
+        )
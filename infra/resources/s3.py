@@ -1,10 +1,10 @@
-import mimetypes
 import os
 
-from pulumi import FileAsset, ResourceOptions
+from pulumi import ResourceOptions
 import pulumi_aws as aws
 
-from config import prefix, static_site_path
+from config import prefix, region, static_site_path
+from resources.static_site import StaticSiteSync
 
 # Much of this file was taken from pulumi's static site example:
 # https://github.com/pulumi/examples/tree/master/aws-py-static-website
@@ -112,34 +112,13 @@ def get_web_contents_root_path() -> str:
     return os.path.join(os.getcwd(), static_site_path)
 
 
-def crawl_static_dir(static_dir, converter_function, bucket) -> None:
-    for file in os.listdir(static_dir):
-        filepath = os.path.join(static_dir, file)
-
-        if os.path.isdir(filepath):
-            crawl_static_dir(filepath, converter_function, bucket)
-        elif os.path.isfile(filepath):
-            converter_function(filepath, bucket=bucket)
-
-
-def bucket_object_converter(filepath, bucket) -> None:
-    """
-    Takes a file path and returns a bucket object managed by Pulumi
-    """
-    web_contents_root_path = get_web_contents_root_path()
-    relative_path = filepath.replace(web_contents_root_path + "/", "")
-    # Determine the mimetype using the `mimetypes` module.
-    mime_type, _ = mimetypes.guess_type(filepath)
-    aws.s3.BucketObject(
-        relative_path,
-        key=relative_path,
-        acl="public-read",
-        bucket=bucket.id,
-        content_type=mime_type,
-        source=FileAsset(filepath),
-        opts=ResourceOptions(parent=bucket),
-    )
-
-
-static_web_contents_root_path = get_web_contents_root_path()
-crawl_static_dir(static_web_contents_root_path, bucket_object_converter, static_bucket)
+# One resource for the whole build. It diffs a content hash manifest against
+# the one from the last deploy and only uploads what changed. Stacks that
+# still have a BucketObject per file must run migrate_static_site.py first.
+static_site_sync = StaticSiteSync(
+    f"{prefix}-static-site-sync",
+    bucket=static_bucket.id,
+    source_dir=get_web_contents_root_path(),
+    region=region,
+    opts=ResourceOptions(parent=static_bucket),
+)
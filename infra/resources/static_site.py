@@ -0,0 +1,288 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+import pulumi
+from pulumi.dynamic import (
+    CreateResult,
+    DiffResult,
+    ResourceProvider,
+    Resource,
+    UpdateResult,
+)
+
+UPLOAD_WORKERS = 16
+# S3 DeleteObjects limit
+DELETE_BATCH_SIZE = 1000
+
+# The UI build puts content hashed file names under static/, so those can
+# be cached forever. HTML must be revalidated so new deploys are picked up.
+HASHED_PREFIX = "static/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+NO_CACHE = "no-cache"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+# Text assets under static/ are also uploaded brotli and gzip compressed
+# next to the original, as <key>.br and <key>.gz. A CloudFront function
+# picks the variant from Accept-Encoding, so every file with one of these
+# extensions must have both.
+PRECOMPRESSED_EXTENSIONS = (".js", ".css", ".svg", ".json", ".map", ".txt")
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+@lru_cache(maxsize=None)
+def content_type_for(extension: str) -> str:
+    mime_type, _ = mimetypes.guess_type(f"file{extension}")
+    return mime_type or "application/octet-stream"
+
+
+def cache_control_for(key: str) -> str:
+    if key.startswith(HASHED_PREFIX):
+        return IMMUTABLE
+    if key.endswith(".html"):
+        return NO_CACHE
+    return DEFAULT_CACHE_CONTROL
+
+
+def is_html(entry: dict) -> bool:
+    return entry["content_type"] == "text/html"
+
+
+def is_precompressed(key: str) -> bool:
+    return key.startswith(HASHED_PREFIX) and key.endswith(PRECOMPRESSED_EXTENSIONS)
+
+
+def build_manifest(root: str) -> dict:
+    """
+    {key: {"hash": sha256, "content_type": ..., "cache_control": ...}} for
+    every file under root, from one os.scandir walk. Compressed variants
+    are listed under their own keys with the original as "source"; they are
+    only compressed when uploaded.
+    """
+    manifest = {}
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    key = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    with open(entry.path, "rb") as file:
+                        digest = hashlib.sha256(file.read()).hexdigest()
+                    manifest[key] = {
+                        "hash": digest,
+                        "content_type": content_type_for(
+                            os.path.splitext(entry.name)[1].lower()
+                        ),
+                        "cache_control": cache_control_for(key),
+                    }
+                    if is_precompressed(key):
+                        for encoding, suffix in ENCODING_SUFFIXES.items():
+                            manifest[key + suffix] = {
+                                **manifest[key],
+                                "content_encoding": encoding,
+                                "source": key,
+                            }
+    return dict(sorted(manifest.items()))
+
+
+def diff_manifests(old: dict, new: dict) -> tuple[list[str], list[str]]:
+    """Keys to upload and keys to delete to go from old to new"""
+    changed = [key for key, entry in new.items() if old.get(key) != entry]
+    removed = [key for key in old if key not in new]
+    return changed, removed
+
+
+def retain_removed(
+    old: dict, new: dict, removed: list[str], retained: list[str]
+) -> tuple[list[str], list[str]]:
+    """
+    Splits removed keys into ones to delete now and ones to keep for one
+    more release. Pages loaded before the deploy still reference the old
+    hashed assets, so those are kept until the next deploy. Keys kept by
+    the last deploy are deleted now, unless the new build has them again.
+    """
+    keep = [key for key in removed if old[key]["cache_control"] == IMMUTABLE]
+    delete = [key for key in removed if key not in keep]
+    delete += [key for key in retained if key not in new]
+    return delete, keep
+
+
+def invalidation_paths(old: dict, new: dict, keys: list[str]) -> list[str]:
+    """
+    CloudFront paths to invalidate for changed keys. Immutable keys are
+    skipped, a changed hashed asset is a new file name.
+    """
+    paths = []
+    for key in keys:
+        entry = new.get(key) or old[key]
+        if entry["cache_control"] == IMMUTABLE:
+            continue
+        paths.append(f"/{key}")
+        if key == "index.html":
+            # The distribution's default root object is cached under /
+            paths.append("/")
+    return sorted(paths)
+
+
+def manifest_hash(manifest: dict) -> str:
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(data, quality=11)
+    # mtime=0 so the same input always compresses to the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class StaticSiteSyncProvider(ResourceProvider):
+    """
+    Uploads only the objects whose hash changed since the last deploy, in
+    parallel, and deletes objects that are no longer in the build. The
+    manifest lives in Pulumi state as this resource's output, along with
+    the paths CloudFront should invalidate for this deploy.
+
+    HTML is uploaded after every other object, so a new page never
+    references an asset that isn't there yet, and deletes come last.
+    Removed hashed assets are kept for one more release, see
+    retain_removed.
+    """
+
+    def _client(self, region: str):
+        # Imported here, the provider is serialized into the Pulumi state
+        import boto3
+
+        return boto3.client("s3", region_name=region)
+
+    def _sync(self, props: dict, changed: list[str], removed: list[str]) -> None:
+        client = self._client(props["region"])
+        root = props["source_dir"]
+        manifest = props["manifest"]
+
+        def upload(key: str) -> None:
+            entry = manifest[key]
+            extra_args = {
+                "ACL": "public-read",
+                "ContentType": entry["content_type"],
+                "CacheControl": entry["cache_control"],
+            }
+            if "content_encoding" not in entry:
+                client.upload_file(
+                    os.path.join(root, key), props["bucket"], key, ExtraArgs=extra_args
+                )
+                return
+            with open(os.path.join(root, entry["source"]), "rb") as file:
+                body = compress(file.read(), entry["content_encoding"])
+            client.put_object(
+                Bucket=props["bucket"],
+                Key=key,
+                Body=body,
+                ContentEncoding=entry["content_encoding"],
+                **extra_args,
+            )
+
+        assets = [key for key in changed if not is_html(manifest[key])]
+        pages = [key for key in changed if is_html(manifest[key])]
+        with ThreadPoolExecutor(UPLOAD_WORKERS) as pool:
+            for batch in (assets, pages):
+                # list() so the first failed upload is raised here, before
+                # any page goes up
+                list(pool.map(upload, batch))
+        for start in range(0, len(removed), DELETE_BATCH_SIZE):
+            client.delete_objects(
+                Bucket=props["bucket"],
+                Delete={
+                    "Objects": [
+                        {"Key": key}
+                        for key in removed[start : start + DELETE_BATCH_SIZE]
+                    ],
+                    "Quiet": True,
+                },
+            )
+
+    def create(self, props: dict) -> CreateResult:
+        changed = list(props["manifest"])
+        self._sync(props, changed=changed, removed=[])
+        paths = invalidation_paths({}, props["manifest"], changed)
+        return CreateResult(
+            id_=props["bucket"],
+            outs={**props, "invalidation_paths": paths, "retained": []},
+        )
+
+    def diff(self, id: str, olds: dict, news: dict) -> DiffResult:
+        # source_dir is a local path and is left out so deploying from
+        # another checkout isn't a change
+        replaces = ["bucket"] if olds["bucket"] != news["bucket"] else []
+        changes = bool(replaces) or olds["manifest"] != news["manifest"]
+        return DiffResult(
+            changes=changes, replaces=replaces, delete_before_replace=True
+        )
+
+    def update(self, id: str, olds: dict, news: dict) -> UpdateResult:
+        changed, removed = diff_manifests(olds["manifest"], news["manifest"])
+        delete, retained = retain_removed(
+            olds["manifest"],
+            news["manifest"],
+            removed,
+            # Missing from state written before retention existed
+            olds.get("retained") or [],
+        )
+        self._sync(news, changed, delete)
+        paths = invalidation_paths(
+            olds["manifest"], news["manifest"], changed + removed
+        )
+        return UpdateResult(
+            outs={**news, "invalidation_paths": paths, "retained": retained}
+        )
+
+    def delete(self, id: str, props: dict) -> None:
+        removed = list(props["manifest"]) + (props.get("retained") or [])
+        self._sync(props, changed=[], removed=removed)
+
+
+class StaticSiteSync(Resource):
+    """
+    Every file under source_dir as one resource, rather than one
+    BucketObject per file. Object keys are paths relative to source_dir.
+    """
+
+    manifest: pulumi.Output[dict]
+    # Non-immutable paths changed by the last update, for CloudFront
+    invalidation_paths: pulumi.Output[list]
+    # Hashed assets the last update removed from the build but left in the
+    # bucket, deleted by the next one
+    retained: pulumi.Output[list]
+
+    def __init__(
+        self,
+        name: str,
+        bucket: pulumi.Input[str],
+        source_dir: str,
+        region: str,
+        opts: Optional[pulumi.ResourceOptions] = None,
+    ):
+        manifest = build_manifest(source_dir)
+        # Changes whenever the build does, so dependents can key off it
+        self.manifest_hash = manifest_hash(manifest)
+        super().__init__(
+            StaticSiteSyncProvider(),
+            name,
+            {
+                "bucket": bucket,
+                "region": region,
+                "source_dir": source_dir,
+                "manifest": manifest,
+                "invalidation_paths": None,
+                "retained": None,
+            },
+            opts,
+        )
@@ -0,0 +1,134 @@
+import pulumi
+import pytest
+
+BUCKET = "test-static-bucket"
+REGION = "us-east-2"
+SITE = {
+    "index.html": b"<html>index</html>",
+    "favicon.ico": b"icon",
+    "static/js/main.1a2b3c.js": b"console.log('main');" * 20,
+    "static/css/main.4d5e6f.css": b"body { margin: 0 }" * 20,
+    "static/media/logo.7a8b9c.png": b"\x89PNG",
+}
+
+
+def write_site(root, files: dict) -> None:
+    for key, content in files.items():
+        path = root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A UI build like the one react-scripts writes to ui/build"""
+    root = tmp_path / "build"
+    write_site(root, SITE)
+    return root
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """An empty bucket on moto's in process S3"""
+    from moto import mock_aws
+    import boto3
+
+    # Never let a test reach a real account
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN"):
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    with mock_aws():
+        client = boto3.client("s3", region_name=REGION)
+        client.create_bucket(
+            Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": REGION}
+        )
+        yield client
+
+
+# awsx components echoing their inputs don't type check as outputs, these
+# only get the outputs the program reads
+COMPONENT_OUTPUTS = {
+    "awsx:ec2:Vpc": {
+        "vpcId": "vpc-id",
+        "privateSubnetIds": ["private-subnet-id"],
+        "publicSubnetIds": ["public-subnet-id"],
+    },
+    "awsx:ecr:Repository": {"url": "repository-url"},
+    "awsx:ecr:Image": {"imageUri": "image-uri"},
+}
+# Outputs the provider computes that the program reads
+COMPUTED_OUTPUTS = {
+    "aws:acm/certificate:Certificate": {
+        "domainValidationOptions": [
+            {
+                "resourceRecordName": "_validation.example.com",
+                "resourceRecordType": "CNAME",
+                "resourceRecordValue": "_validation.acm-validations.aws",
+            }
+        ]
+    },
+    "aws:cloudfront/function:Function": {
+        "arn": "arn:aws:cloudfront::123456789012:function/precompressed-assets"
+    },
+    "aws:rds/instance:Instance": {"endpoint": "db:5432"},
+    "aws:apigateway/deployment:Deployment": {
+        "executionArn": "arn:aws:execute-api:us-east-2:123456789012:api/"
+    },
+    "aws:apigateway/stage:Stage": {
+        "invokeUrl": "https://api.execute-api.us-east-2.amazonaws.com/dev"
+    },
+}
+
+
+class Mocks(pulumi.runtime.Mocks):
+    def __init__(self):
+        self.resources = []
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        self.resources.append(args)
+        if args.typ in COMPONENT_OUTPUTS:
+            return f"{args.name}-id", COMPONENT_OUTPUTS[args.typ]
+        return f"{args.name}-id", {
+            **args.inputs,
+            **COMPUTED_OUTPUTS.get(args.typ, {}),
+        }
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        # get_canonical_user_id and get_log_delivery_canonical_user_id have
+        # no arguments, the managed policies are looked up by name
+        return {"id": args.args.get("name") or "canonical-user"}
+
+
+@pytest.fixture(scope="session")
+def mocks():
+    mocks = Mocks()
+    pulumi.runtime.set_mocks(mocks, project="exampulumi", stack="dev", preview=False)
+    pulumi.runtime.set_all_config(
+        {
+            "exampulumi:env": "dev",
+            "exampulumi:origin-header": "origin",
+            "exampulumi:db_password": "password",
+        }
+    )
+    return mocks
+
+
+@pytest.fixture(scope="session")
+def s3_module(mocks, tmp_path_factory):
+    """resources.s3 deployed under mocks, with a UI build in a temp dir"""
+    import config
+
+    root = tmp_path_factory.mktemp("build")
+    write_site(root, SITE)
+    config.static_site_path = str(root)
+    from resources import s3
+
+    return s3
+
+
+@pytest.fixture(scope="session")
+def cloud_front_module(s3_module):
+    """resources.cloud_front and everything it references, under mocks"""
+    from resources import cloud_front
+
+    return cloud_front
@@ -0,0 +1,152 @@
+import json
+import shutil
+import subprocess
+
+import pulumi
+import pytest
+
+CACHE_POLICY = "aws:cloudfront/cachePolicy:CachePolicy"
+DISTRIBUTION = "aws:cloudfront/distribution:Distribution"
+FUNCTION = "aws:cloudfront/function:Function"
+FUNCTION_ARN = "arn:aws:cloudfront::123456789012:function/precompressed-assets"
+
+
+def registered(mocks, typ: str, name: str) -> dict:
+    [resource] = [
+        resource
+        for resource in mocks.resources
+        if resource.typ == typ and resource.name == name
+    ]
+    return resource.inputs
+
+
+def once_deployed(cloud_front, check):
+    """Runs check after the distribution, and so everything, is registered"""
+    return cloud_front.cf_distro.id.apply(lambda _: check())
+
+
+@pulumi.runtime.test
+def test_static_cache_policy(mocks, cloud_front_module):
+    def check():
+        policy = registered(
+            mocks, CACHE_POLICY, f"{cloud_front_module.prefix}-static-cache-policy"
+        )
+        key = policy["parametersInCacheKeyAndForwardedToOrigin"]
+        # Only what the uploaded Cache-Control says is cached
+        assert (policy["defaultTtl"], policy["maxTtl"]) == (0, 31536000)
+        assert key["queryStringsConfig"]["queryStringBehavior"] == "none"
+        # The .br and .gz variants are cached apart
+        assert key["enableAcceptEncodingBrotli"] and key["enableAcceptEncodingGzip"]
+
+    return once_deployed(cloud_front_module, check)
+
+
+@pulumi.runtime.test
+def test_api_read_cache_policy(mocks, cloud_front_module):
+    def check():
+        policy = registered(
+            mocks, CACHE_POLICY, f"{cloud_front_module.prefix}-api-read-cache-policy"
+        )
+        key = policy["parametersInCacheKeyAndForwardedToOrigin"]
+        # Nothing is cached without an s-maxage from the route
+        assert (policy["defaultTtl"], policy["maxTtl"]) == (
+            0,
+            cloud_front_module.api_cache_max_ttl,
+        )
+        assert key["queryStringsConfig"]["queryStringBehavior"] == "all"
+        # One caller never gets another's response
+        assert key["headersConfig"] == {
+            "headerBehavior": "whitelist",
+            "headers": {"items": ["Authorization"]},
+        }
+        assert key["cookiesConfig"]["cookieBehavior"] == "none"
+
+    return once_deployed(cloud_front_module, check)
+
+
+@pulumi.runtime.test
+def test_cacheable_api_paths_come_first(mocks, cloud_front_module):
+    prefix = cloud_front_module.prefix
+
+    def check():
+        distribution = registered(mocks, DISTRIBUTION, f"{prefix}-distribution")
+        behaviors = distribution["orderedCacheBehaviors"]
+        read_policy = f"{prefix}-api-read-cache-policy-id"
+        # First match wins, the catch-all that never caches goes last
+        assert [(b["pathPattern"], b["cachePolicyId"]) for b in behaviors] == [
+            *[(path, read_policy) for path in cloud_front_module.api_cacheable_paths],
+            ("api/*", "Managed-CachingDisabled"),
+        ]
+        for behavior in behaviors:
+            assert behavior["cachedMethods"] == ["GET", "HEAD"]
+            assert behavior["originRequestPolicyId"] == (
+                "Managed-AllViewerExceptHostHeader"
+            )
+
+    return once_deployed(cloud_front_module, check)
+
+
+@pulumi.runtime.test
+def test_static_behavior(mocks, cloud_front_module):
+    prefix = cloud_front_module.prefix
+
+    def check():
+        distribution = registered(mocks, DISTRIBUTION, f"{prefix}-distribution")
+        behavior = distribution["defaultCacheBehavior"]
+        function = registered(mocks, FUNCTION, f"{prefix}-precompressed-assets")
+        assert behavior["cachePolicyId"] == f"{prefix}-static-cache-policy-id"
+        assert behavior["functionAssociations"] == [
+            {"eventType": "viewer-request", "functionArn": FUNCTION_ARN}
+        ]
+        assert function["runtime"] == "cloudfront-js-1.0"
+        assert function["code"] == cloud_front_module.precompressed_function_code()
+
+    return once_deployed(cloud_front_module, check)
+
+
+def viewer_request(code: str, uri: str, accept_encoding: str | None) -> str:
+    """The uri the function rewrites the request to, run under node"""
+    headers = {}
+    if accept_encoding is not None:
+        headers["accept-encoding"] = {"value": accept_encoding}
+    event = {"request": {"uri": uri, "headers": headers}}
+    script = f"{code}\nconsole.log(handler({json.dumps(event)}).uri);"
+    result = subprocess.run(
+        ["node", "-e", script], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+@pytest.mark.parametrize(
+    "accept_encoding, suffix",
+    [
+        ("gzip, deflate, br", ".br"),
+        ("BR", ".br"),
+        ("gzip;q=0.5, br;q=1.0", ".br"),
+        ("br;q=0, gzip", ".gz"),
+        ("gzip , br ; q=0", ".gz"),
+        ("*", ".br"),
+        ("*;q=0, gzip", ".gz"),
+        ("br;q=0, *", ".gz"),
+        ("gzip;q=0", ""),
+        ("identity", ""),
+        # Codings are whole tokens, not substrings
+        ("x-br, gzipped", ""),
+        ("", ""),
+        (None, ""),
+    ],
+)
+def test_precompressed_rewrite(cloud_front_module, accept_encoding, suffix):
+    code = cloud_front_module.precompressed_function_code()
+    uri = "/static/js/main.1a2b3c.js"
+    assert viewer_request(code, uri, accept_encoding) == uri + suffix
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+@pytest.mark.parametrize(
+    "uri", ["/index.html", "/static/media/logo.1a2b3c.png", "/api/items"]
+)
+def test_precompressed_rewrite_skips_other_paths(cloud_front_module, uri):
+    code = cloud_front_module.precompressed_function_code()
+    assert viewer_request(code, uri, "br, gzip") == uri
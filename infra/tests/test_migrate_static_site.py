@@ -0,0 +1,52 @@
+import pytest
+
+from migrate_static_site import forget, legacy_bucket_objects
+
+STACK = "urn:pulumi:dev::exampulumi::"
+BUCKET = f"{STACK}aws:s3/bucket:Bucket::dev-exampulumi-static-bucket"
+LOG_BUCKET = f"{STACK}aws:s3/bucket:Bucket::dev-exampulumi-cf-logs-bucket"
+
+
+def bucket_object(name: str, parent: str = BUCKET) -> dict:
+    return {
+        "urn": f"{STACK}aws:s3/bucket:Bucket$aws:s3/bucketObject:BucketObject::{name}",
+        "type": "aws:s3/bucketObject:BucketObject",
+        "parent": parent,
+    }
+
+
+def deployment(*resources: dict) -> dict:
+    return {
+        "manifest": {},
+        "resources": [
+            {"urn": BUCKET, "type": "aws:s3/bucket:Bucket"},
+            {"urn": LOG_BUCKET, "type": "aws:s3/bucket:Bucket"},
+            *resources,
+        ],
+    }
+
+
+def test_forgets_static_site_objects():
+    index, js = bucket_object("index.html"), bucket_object("static/js/main.js")
+    log = bucket_object("log.txt", parent=LOG_BUCKET)
+    state = deployment(index, js, log)
+
+    urns = legacy_bucket_objects(state)
+
+    assert urns == [index["urn"], js["urn"]]
+    assert [resource["urn"] for resource in forget(state, urns)["resources"]] == [
+        BUCKET,
+        LOG_BUCKET,
+        log["urn"],
+    ]
+
+
+def test_migrated_stack_is_unchanged():
+    assert legacy_bucket_objects(deployment()) == []
+
+
+def test_refuses_to_break_dependents():
+    index = bucket_object("index.html")
+    dependent = {"urn": "other", "type": "t", "dependencies": [index["urn"]]}
+    with pytest.raises(ValueError):
+        forget(deployment(index, dependent), [index["urn"]])
@@ -0,0 +1,29 @@
+import pulumi
+
+from resources.static_site import build_manifest, manifest_hash
+
+DYNAMIC = "pulumi-python:dynamic:Resource"
+
+
+@pulumi.runtime.test
+def test_static_site_is_one_resource(mocks, s3_module):
+    sync = s3_module.static_site_sync
+    manifest = build_manifest(s3_module.get_web_contents_root_path())
+
+    def check(outputs):
+        synced_manifest, bucket = outputs
+        types = [resource.typ for resource in mocks.resources]
+        # Per file BucketObjects are gone, see migrate_static_site.py
+        assert "aws:s3/bucketObject:BucketObject" not in types
+        [registered] = [
+            resource
+            for resource in mocks.resources
+            if resource.typ == DYNAMIC
+            and resource.name == "dev-exampulumi-static-site-sync"
+        ]
+        assert registered.inputs["manifest"] == manifest
+        assert synced_manifest == manifest
+        assert bucket == "dev-exampulumi-static-bucket-id"
+        assert sync.manifest_hash == manifest_hash(manifest)
+
+    return pulumi.Output.all(sync.manifest, s3_module.static_bucket.id).apply(check)
@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+
+import brotli
+import pytest
+
+from resources.static_site import (
+    DEFAULT_CACHE_CONTROL,
+    IMMUTABLE,
+    NO_CACHE,
+    StaticSiteSyncProvider,
+    build_manifest,
+    cache_control_for,
+    diff_manifests,
+    invalidation_paths,
+    manifest_hash,
+)
+from tests.conftest import BUCKET, REGION, SITE, write_site
+
+JS = "static/js/main.1a2b3c.js"
+NEW_JS = "static/js/main.9f8e7d.js"
+
+
+def props(site, bucket: str = BUCKET) -> dict:
+    return {
+        "bucket": bucket,
+        "region": REGION,
+        "source_dir": str(site),
+        "manifest": build_manifest(str(site)),
+        "invalidation_paths": None,
+    }
+
+
+def bucket_keys(s3) -> set[str]:
+    response = s3.list_objects_v2(Bucket=BUCKET)
+    return {obj["Key"] for obj in response.get("Contents", [])}
+
+
+@pytest.fixture
+def provider(s3, monkeypatch):
+    """The provider on the moto bucket, recording the keys it uploads"""
+    provider = StaticSiteSyncProvider()
+    # In call order, with repeats, upload_file goes through put_object too
+    provider.uploaded = []
+    monkeypatch.setattr(provider, "_client", lambda region: s3)
+    for method in ("upload_file", "put_object"):
+        upload = getattr(s3, method)
+
+        def record(*args, upload=upload, **kwargs):
+            provider.uploaded.append(kwargs.get("Key") or args[2])
+            return upload(*args, **kwargs)
+
+        monkeypatch.setattr(s3, method, record)
+    return provider
+
+
+def test_build_manifest(site):
+    manifest = build_manifest(str(site))
+
+    css = "static/css/main.4d5e6f.css"
+    assert list(manifest) == sorted(
+        [*SITE, f"{JS}.br", f"{JS}.gz", f"{css}.br", f"{css}.gz"]
+    )
+    assert manifest["index.html"] == {
+        "hash": hashlib.sha256(SITE["index.html"]).hexdigest(),
+        "content_type": "text/html",
+        "cache_control": NO_CACHE,
+    }
+    assert manifest[JS]["cache_control"] == IMMUTABLE
+    assert manifest[f"{JS}.br"] == {
+        **manifest[JS],
+        "content_encoding": "br",
+        "source": JS,
+    }
+    # Images are already compressed
+    assert "static/media/logo.7a8b9c.png.br" not in manifest
+
+
+@pytest.mark.parametrize(
+    "key, cache_control",
+    [
+        (JS, IMMUTABLE),
+        (f"{JS}.br", IMMUTABLE),
+        ("static/media/logo.7a8b9c.png", IMMUTABLE),
+        ("index.html", NO_CACHE),
+        ("docs/about.html", NO_CACHE),
+        ("favicon.ico", DEFAULT_CACHE_CONTROL),
+        ("manifest.json", DEFAULT_CACHE_CONTROL),
+        # Only the top level static/ is hashed
+        ("docs/static/guide.js", DEFAULT_CACHE_CONTROL),
+    ],
+)
+def test_cache_control_for(key, cache_control):
+    assert cache_control_for(key) == cache_control
+
+
+def test_diff_manifests():
+    old = {"same": {"hash": "1"}, "changed": {"hash": "2"}, "removed": {"hash": "3"}}
+    new = {"same": {"hash": "1"}, "changed": {"hash": "4"}, "added": {"hash": "5"}}
+    assert diff_manifests(old, new) == (["changed", "added"], ["removed"])
+    assert diff_manifests(new, new) == ([], [])
+
+
+def test_invalidation_paths(site):
+    manifest = build_manifest(str(site))
+    removed = {"old.html": {"cache_control": NO_CACHE}}
+    keys = ["index.html", JS, f"{JS}.br", "old.html"]
+    # Hashed assets are new file names when they change, only what's
+    # cached under a fixed name is invalidated
+    assert invalidation_paths(removed, manifest, keys) == [
+        "/",
+        "/index.html",
+        "/old.html",
+    ]
+
+
+def test_manifest_hash(site):
+    manifest = build_manifest(str(site))
+    assert manifest_hash(manifest) == manifest_hash(dict(reversed(manifest.items())))
+    (site / "index.html").write_bytes(b"<html>changed</html>")
+    assert manifest_hash(build_manifest(str(site))) != manifest_hash(manifest)
+
+
+def test_create_uploads_everything(provider, s3, site):
+    result = provider.create(props(site))
+
+    assert result.id == BUCKET
+    assert bucket_keys(s3) == set(result.outs["manifest"])
+    assert result.outs["invalidation_paths"] == ["/", "/favicon.ico", "/index.html"]
+    index = s3.get_object(Bucket=BUCKET, Key="index.html")
+    assert (index["ContentType"], index["CacheControl"]) == ("text/html", NO_CACHE)
+    assert index["Body"].read() == SITE["index.html"]
+    for suffix, encoding, decompress in [
+        (".br", "br", brotli.decompress),
+        (".gz", "gzip", gzip.decompress),
+    ]:
+        variant = s3.get_object(Bucket=BUCKET, Key=JS + suffix)
+        assert variant["ContentEncoding"] == encoding
+        assert variant["ContentType"] == result.outs["manifest"][JS]["content_type"]
+        assert variant["CacheControl"] == IMMUTABLE
+        assert decompress(variant["Body"].read()) == SITE[JS]
+
+
+def test_update_syncs_only_changes(provider, s3, site):
+    olds = provider.create(props(site)).outs
+    provider.uploaded.clear()
+    (site / JS).unlink()
+    (site / "favicon.ico").unlink()
+    write_site(site, {"index.html": b"<html>new</html>", NEW_JS: b"1"})
+
+    news = props(site)
+    assert provider.diff(BUCKET, olds, news).changes
+    outs = provider.update(BUCKET, olds, news).outs
+
+    assert sorted(set(provider.uploaded)) == [
+        "index.html",
+        NEW_JS,
+        f"{NEW_JS}.br",
+        f"{NEW_JS}.gz",
+    ]
+    # The page goes up last, after the assets it references
+    assert provider.uploaded[-1] == "index.html"
+    assert provider.uploaded.index("index.html") > max(
+        provider.uploaded.index(key) for key in (NEW_JS, f"{NEW_JS}.br")
+    )
+    assert s3.get_object(Bucket=BUCKET, Key="index.html")["Body"].read() == (
+        b"<html>new</html>"
+    )
+    # Pages loaded before the deploy can still fetch the old bundle
+    old_js = {JS, f"{JS}.br", f"{JS}.gz"}
+    assert bucket_keys(s3) == set(news["manifest"]) | old_js
+    assert sorted(outs["retained"]) == sorted(old_js)
+    assert outs["invalidation_paths"] == ["/", "/favicon.ico", "/index.html"]
+
+    # The next release deletes it
+    (site / "index.html").write_bytes(b"<html>newer</html>")
+    outs = provider.update(BUCKET, outs, props(site)).outs
+    assert bucket_keys(s3) == set(news["manifest"])
+    assert outs["retained"] == []
+
+
+def test_update_keeps_retained_assets_that_come_back(provider, s3, site):
+    olds = provider.create(props(site)).outs
+    content = (site / JS).read_bytes()
+    (site / JS).unlink()
+    outs = provider.update(BUCKET, olds, props(site)).outs
+
+    write_site(site, {JS: content})
+    outs = provider.update(BUCKET, outs, props(site)).outs
+
+    assert bucket_keys(s3) == set(outs["manifest"])
+    assert outs["retained"] == []
+
+
+def test_diff(provider, site):
+    olds = props(site)
+    # Deploying the same build from another checkout changes nothing
+    assert not provider.diff(BUCKET, olds, {**olds, "source_dir": "/other"}).changes
+    diff = provider.diff(BUCKET, olds, props(site, bucket="other-bucket"))
+    assert diff.changes
+    assert diff.replaces == ["bucket"]
+
+
+def test_delete_removes_everything(provider, s3, site):
+    outs = provider.create(props(site)).outs
+    (site / JS).unlink()
+    outs = provider.update(BUCKET, outs, props(site)).outs
+    s3.put_object(Bucket=BUCKET, Key="not-synced.txt", Body=b"")
+
+    provider.delete(BUCKET, outs)
+
+    assert bucket_keys(s3) == {"not-synced.txt"}